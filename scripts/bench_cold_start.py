@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold-start component loading: loose JSON files vs compiled bundle.
+
+Each sample runs in a fresh interpreter that loads codes.json and every
+component once, which is what a single CLI invocation pays for. Only the
+loading itself is timed; interpreter and module import time is excluded.
+
+Usage:
+    python scripts/bench_cold_start.py [--samples 20]
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.registry import compile_registry
+
+CHILD = """
+import time
+from src.registry import BASE_DIR, COMPONENT_CACHE, get_all_codes
+from src.bundle import collect_sources
+sources = collect_sources(BASE_DIR)
+t0 = time.perf_counter()
+get_all_codes()
+for path in sources:
+    COMPONENT_CACHE.get(path)
+print(time.perf_counter() - t0)
+"""
+
+def sample(no_bundle, samples):
+    env = dict(os.environ)
+    env.pop("AVATAR_DB_NO_BUNDLE", None)
+    if no_bundle:
+        env["AVATAR_DB_NO_BUNDLE"] = "1"
+    timings = []
+    for _ in range(samples):
+        out = subprocess.check_output([sys.executable, "-c", CHILD], cwd=ROOT_DIR, env=env)
+        timings.append(float(out.decode().strip()) * 1000)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=20)
+    args = parser.parse_args()
+
+    info = compile_registry()
+    print(f"Bundle: {info['entries']} files, {info['bytes']} bytes")
+    print()
+
+    loose = sample(True, args.samples)
+    bundled = sample(False, args.samples)
+
+    print(f"{'mode':<10} {'median ms':>10} {'min ms':>10}")
+    print(f"{'loose':<10} {statistics.median(loose):>10.2f} {min(loose):>10.2f}")
+    print(f"{'bundle':<10} {statistics.median(bundled):>10.2f} {min(bundled):>10.2f}")
+    print()
+    print(f"Speedup (median): {statistics.median(loose) / statistics.median(bundled):.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold vs cached lint on a synthetic 5k-component catalog.
+
+Writes a registry and component tree to a temp directory, then times:
+a full lint without the cache, the first cached lint (populates the
+cache), a warm lint with nothing changed, and a warm lint after editing
+a handful of files.
+
+Usage:
+    python scripts/bench_lint.py [--components 5000] [--workers N]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+import io
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.registry import Registry, DIMENSION_FOLDERS
+from src.lint import run_lint
+
+DIMS = ["FACE", "BODY", "HAIR", "ETHNICITY", "BACKGROUND", "OUTFIT"]
+TOP_LEVEL = {"FACE": "subject", "BODY": "subject", "HAIR": "subject", "ETHNICITY": "skin",
+             "BACKGROUND": "setting", "OUTFIT": "clothing"}
+
+def write_catalog(root, n):
+    codes = {}
+    for i in range(n):
+        dim = DIMS[i % len(DIMS)]
+        code = f"C{i:05d}"
+        section = {f"key_{j}": f"{dim} {code} value {j}" for j in range(12)}
+        if dim == "FACE":
+            section.update({"face_anchor": f"anchor {code}", "do_not_change": ["eyes"]})
+        folder = os.path.join(root, "components", DIMENSION_FOLDERS[dim])
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"{code}.json"), 'w') as f:
+            json.dump({TOP_LEVEL[dim]: section}, f, indent=2)
+        codes.setdefault(dim, {})[code] = {"code": code, "label": code, "status": "active"}
+    os.makedirs(os.path.join(root, "registry"))
+    with open(os.path.join(root, "registry", "codes.json"), 'w') as f:
+        json.dump(codes, f)
+
+def timed(label, **kwargs):
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_lint(**kwargs)
+    print(f"{label:<28} {time.perf_counter() - t0:.3f}s")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--components", type=int, default=5000)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="avatar-db-lint-")
+    try:
+        write_catalog(root, args.components)
+        cache_path = os.path.join(root, "lint-cache.json")
+
+        def registry():
+            return Registry.load(os.path.join(root, "registry", "codes.json"), os.path.join(root, "components"))
+
+        print(f"Components: {args.components} (CPUs: {os.cpu_count()})")
+        t0 = time.perf_counter()
+        registry()
+        print(f"{'registry load':<28} {time.perf_counter() - t0:.3f}s")
+        timed("no cache", registry=registry(), use_cache=False, workers=args.workers)
+        timed("cold cache (populates)", registry=registry(), cache_path=cache_path, workers=args.workers)
+        timed("warm, nothing changed", registry=registry(), cache_path=cache_path, workers=args.workers)
+
+        hair = os.path.join(root, "components", "hair")
+        for name in sorted(os.listdir(hair))[:10]:
+            with open(os.path.join(hair, name), 'a') as f:
+                f.write("\n")
+        timed("warm, 10 files edited", registry=registry(), cache_path=cache_path, workers=args.workers)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark the compiled keyword scanner against per-keyword substring search.
+
+Generates a keyword list and a set of component-shaped documents, then
+times the old approach (json.dumps + one `in` test per keyword) against
+KeywordScanner.scan, and checks both find the same keywords.
+
+Usage:
+    python scripts/bench_lint_rules.py [--keywords 5000] [--components 2000]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.rule_scan import KeywordScanner
+
+def make_word(rng):
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 10)))
+
+def make_component(rng, vocabulary):
+    section = {f"key_{j}": " ".join(rng.choice(vocabulary) for _ in range(8)) for j in range(12)}
+    section["do_not_change"] = [rng.choice(vocabulary) for _ in range(4)]
+    return {"subject": section}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keywords", type=int, default=5000)
+    parser.add_argument("--components", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    keywords = sorted({make_word(rng) for _ in range(args.keywords)})
+    vocabulary = [make_word(rng) for _ in range(2000)] + keywords[:50]
+    components = [make_component(rng, vocabulary) for _ in range(args.components)]
+
+    t0 = time.perf_counter()
+    scanner = KeywordScanner(keywords)
+    print(f"{'compile':<24} {time.perf_counter() - t0:.3f}s ({len(keywords)} keywords)")
+
+    t0 = time.perf_counter()
+    naive = []
+    for content in components:
+        text = json.dumps(content).lower()
+        naive.append({kw for kw in keywords if kw in text})
+    print(f"{'json.dumps + in':<24} {time.perf_counter() - t0:.3f}s ({len(components)} components)")
+
+    t0 = time.perf_counter()
+    scanned = [set(scanner.scan(content)) for content in components]
+    print(f"{'compiled scan':<24} {time.perf_counter() - t0:.3f}s")
+
+    assert scanned == naive, "scanner and substring search disagree"
+    print(f"Hits: {sum(map(len, scanned))} (identical)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark naive vs prefix-cached merging on a synthetic 10k-combination grid.
+
+Components are generated in memory (no disk I/O), so the numbers isolate
+merge cost: naive merge_prompts re-merges every dimension per combination,
+MergeTrie only merges the suffix that differs from an earlier combination.
+
+Usage:
+    python scripts/bench_merge_trie.py [--seed 7]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from itertools import product
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.merge import merge_prompts
+from src.merge_plan import MergeTrie
+from src.utils import copy_json, json_fingerprint
+
+# Codes per dimension: 5 * 4 * 10 * 5 * 10 = 10,000 combinations
+GRID = {"SC": 5, "ET": 4, "FA": 10, "BT": 5, "HR": 10}
+FIXED = ["BASE", "PF", "ST", "NB", "APPEARANCE"]
+TOP_LEVEL = {
+    "BASE": "camera", "PF": "composition", "SC": "setting", "ET": "skin",
+    "FA": "subject", "BT": "subject", "HR": "subject", "ST": "clothing",
+    "NB": "negative_prompt", "APPEARANCE": "appearance"
+}
+
+def synthetic_component(rng, dim, code):
+    """A nested dict roughly the size of a real component."""
+    section = {}
+    for i in range(rng.randint(8, 16)):
+        key = f"{dim.lower()}_{i}"
+        if rng.random() < 0.4:
+            section[key] = {f"k{j}": f"{dim}-{code}-{i}-{j}" for j in range(rng.randint(2, 6))}
+        elif rng.random() < 0.5:
+            section[key] = [f"{dim}-{code}-{i}-{j}" for j in range(rng.randint(2, 5))]
+        else:
+            section[key] = f"{dim} {code} value {i}"
+    if dim == "FA":
+        section.update({"face_anchor": f"anchor {code}", "do_not_change": ["eyes", "nose"]})
+        return {"subject": section}
+    return {TOP_LEVEL[dim]: {dim.lower(): section}}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    comps = {dim: [synthetic_component(rng, dim, "FIXED")] for dim in FIXED}
+    for dim, n in GRID.items():
+        comps[dim] = [synthetic_component(rng, dim, f"C{i}") for i in range(n)]
+    fps = {dim: [json_fingerprint(c) for c in items] for dim, items in comps.items()}
+
+    order = ["BASE", "PF", "SC", "ET", "FA", "BT", "HR", "ST", "NB", "APPEARANCE"]
+    combos = list(product(*[range(len(comps[d])) for d in order]))
+    print(f"Combinations: {len(combos)}")
+
+    # Naive: private copies (as the component cache hands out) + full merge
+    t0 = time.perf_counter()
+    naive_last = None
+    for combo in combos:
+        contents = [copy_json(comps[d][i]) for d, i in zip(order, combo)]
+        naive_last = merge_prompts({}, contents, order, [fps[d][i] for d, i in zip(order, combo)])
+    naive_s = time.perf_counter() - t0
+
+    def run_trie(copy):
+        trie = MergeTrie(max_nodes=0)
+        t0 = time.perf_counter()
+        last = None
+        for combo in combos:
+            contents = [comps[d][i] for d, i in zip(order, combo)]
+            last = trie.merge(contents, order, [fps[d][i] for d, i in zip(order, combo)], copy=copy)
+        assert naive_last == last, "prefix-cached merge diverged from naive merge"
+        return time.perf_counter() - t0, trie.stats()
+
+    # copy=True hands out private trees; copy=False (what build_prompt uses)
+    # returns the shared read-only state
+    trie_copy_s, _ = run_trie(True)
+    trie_s, stats = run_trie(False)
+
+    print(f"{'mode':<12} {'total s':>9} {'per combo us':>14} {'speedup':>9}")
+    for name, secs in [("naive", naive_s), ("trie+copy", trie_copy_s), ("trie", trie_s)]:
+        print(f"{name:<12} {secs:>9.3f} {secs / len(combos) * 1e6:>14.1f} {naive_s / secs:>8.2f}x")
+    print()
+    print(f"Trie nodes: {stats['nodes']}, steps reused: {stats['reuse_rate']:.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark `batch --grid` throughput with 1/2/4/8 worker processes.
+
+A synthetic component tree is written to a temp directory (picked up by
+every worker through AVATAR_DB_COMPONENTS_DIR), then the same grid is built
+once per worker count into a fresh builds directory. Manifests are compared
+byte for byte against the single-process run.
+
+Usage:
+    python scripts/bench_parallel_batch.py [--runs 2] [--workers 1,2,4,8] [--seed 7]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Codes per grid dimension: 8 * 4 * 5 * 8 * 4 * 3 = 15,360 combinations
+GRID = {"FA": 8, "BT": 4, "ET": 5, "HR": 8, "SC": 4, "ST": 3}
+FIXED = {"BASE": "BASE", "PF": "POSTURE_FRAMING", "APPEARANCE": "PORCELAIN_COOL", "NB": "NB"}
+TOP_LEVEL = {
+    "BASE": "camera", "PF": "composition", "SC": "setting", "ET": "skin",
+    "FA": "subject", "BT": "subject", "HR": "subject", "ST": "clothing",
+    "NB": "negative_prompt", "APPEARANCE": "appearance"
+}
+
+def synthetic_component(rng, dim, code):
+    section = {}
+    for i in range(rng.randint(6, 12)):
+        key = f"{dim.lower()}_{i}"
+        if rng.random() < 0.4:
+            section[key] = {f"k{j}": f"{dim}-{code}-{i}-{j}" for j in range(rng.randint(2, 5))}
+        else:
+            section[key] = f"{dim} {code} value {i}"
+    if dim == "FA":
+        section.update({"face_anchor": f"anchor {code}", "do_not_change": ["eyes", "nose"]})
+        return {"subject": section}
+    return {TOP_LEVEL[dim]: {dim.lower(): section}}
+
+def write_tree(root, rng):
+    from src.registry import DIMENSION_FOLDERS, canonical_dim
+    grid = {}
+    codes = dict((dim, [code]) for dim, code in FIXED.items())
+    for dim, n in GRID.items():
+        codes[dim] = grid[dim] = [f"C{i}" for i in range(n)]
+    for dim, dim_codes in codes.items():
+        folder = os.path.join(root, DIMENSION_FOLDERS[canonical_dim(dim)])
+        os.makedirs(folder, exist_ok=True)
+        for code in dim_codes:
+            with open(os.path.join(folder, f"{code}.json"), 'w') as f:
+                json.dump(synthetic_component(rng, dim, code), f, indent=2)
+    return " ".join(f"{dim}={','.join(c)}" for dim, c in grid.items())
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=2)
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="avatar-db-bench-")
+    components = os.path.join(work_dir, "components")
+    os.environ["AVATAR_DB_COMPONENTS_DIR"] = components
+    os.environ["AVATAR_DB_NO_BUNDLE"] = "1"
+
+    from src import registry
+    from src.batch import parse_grid, grid_jobs, run_jobs
+    from src.build_store import open_build_store
+    from src.manifest import write_manifest
+
+    try:
+        spec = write_tree(components, random.Random(args.seed))
+        grid = parse_grid(spec)
+        n_jobs = args.runs
+        for codes in grid.values():
+            n_jobs *= len(codes)
+        print(f"Jobs: {n_jobs} (CPUs: {os.cpu_count()})")
+
+        baseline_s = None
+        baseline_manifest = None
+        for workers in [int(w) for w in args.workers.split(",")]:
+            builds_dir = os.path.join(work_dir, "builds")
+            shutil.rmtree(builds_dir, ignore_errors=True)
+            registry.BASE_DIR = work_dir  # manifests land in work_dir/builds/manifests
+            store = open_build_store("files", builds_dir=builds_dir)
+
+            t0 = time.perf_counter()
+            with store.batch():
+                results = list(run_jobs(
+                    grid_jobs(grid, "01", args.runs), store=store, workers=workers,
+                    store_options={"kind": "files", "builds_dir": builds_dir}
+                ))
+            elapsed = time.perf_counter() - t0
+
+            with open(write_manifest("bench", results), 'rb') as f:
+                manifest = f.read()
+            if baseline_s is None:
+                baseline_s, baseline_manifest = elapsed, manifest
+            same = "identical" if manifest == baseline_manifest else "DIFFERENT"
+            print(f"workers={workers}: {elapsed:.2f}s  {len(results) / elapsed:,.0f} builds/s  "
+                  f"speedup {baseline_s / elapsed:.2f}x  manifest {same}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
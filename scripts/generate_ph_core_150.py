@@ -7,13 +7,16 @@ Filipina-only prompts with regional variation.
 import os
 import sys
 import csv
+import argparse
 from datetime import datetime
 from itertools import product
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.builder import build_prompt
+from src.builder import build_prompt, component_selection, inputs_fingerprint
+from src.journal import BatchJournal
+from src.planner import GridPlanner
 
 # Combinatorial parameters
 REGIONS = ["ILOCOS", "TAGALOG", "BICOL", "VISAYAS", "MINDANAO", "BANGSAMORO"]
@@ -24,8 +27,14 @@ SCENE = "JUNGLE"
 OUTFIT = "POCA"
 ETHNICITY = "PH"
 VERSION = "01"
+BATCH_NAME = "ph_core_150_v01"
 
 def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip combinations already built with unchanged inputs (builds/journals/ph_core_150_v01.jsonl)")
+    args = parser.parse_args()
+
     print("=" * 80)
     print("PH CORE 150 - Filipina Regional Combinatorial Set")
     print("=" * 80)
@@ -36,13 +45,17 @@ def main():
     os.makedirs(manifests_dir, exist_ok=True)
     
     # CSV output
-    csv_path = os.path.join(manifests_dir, "ph_core_150_v01.csv")
+    csv_path = os.path.join(manifests_dir, f"{BATCH_NAME}.csv")
     
     results = []
     skipped = []
     
-    # Generate all combinations
-    combinations = list(product(REGIONS, FACE_ARCHETYPES, BODY_TYPES))
+    # Generate all combinations, pruning invalid ones (constraints, missing components) up front
+    planner = GridPlanner()
+    combinations = [
+        (region, fa, bt) for region, fa, bt in product(REGIONS, FACE_ARCHETYPES, BODY_TYPES)
+        if planner.allows({"FA": fa, "BT": bt, "ET": ETHNICITY, "HR": HAIR, "SC": SCENE, "ST": OUTFIT, "PH_REGION": region})
+    ]
     total = len(combinations)
     
     print(f"Generating {total} combinations...")
@@ -52,46 +65,60 @@ def main():
     print(f"  Hair: {HAIR}")
     print(f"  Scene: {SCENE}")
     print(f"  Outfit: {OUTFIT}")
+    for line in planner.report():
+        print(f"  {line}")
     print()
     
-    for idx, (region, fa, bt) in enumerate(combinations, 1):
-        try:
-            result = build_prompt(
-                fa=fa,
-                bt=bt,
-                et=ETHNICITY,
-                hr=HAIR,
-                sc=SCENE,
-                st=OUTFIT,
-                v=VERSION,
-                r="01",
-                ph_region=region
-            )
-            
-            results.append({
-                "canonical_id": result["canonical_id"],
-                "ET": ETHNICITY,
-                "PH_REGION": region,
-                "FA": fa,
-                "BT": bt,
-                "HR": HAIR,
-                "SC": SCENE,
-                "ST": OUTFIT,
-                "v": VERSION,
-                "created_at": datetime.now().isoformat()
-            })
-            
-            if idx % 10 == 0:
-                print(f"  Progress: {idx}/{total} ({idx/total*100:.1f}%)")
+    with BatchJournal(BATCH_NAME, resume=args.resume) as journal:
+        for idx, (region, fa, bt) in enumerate(combinations, 1):
+            try:
+                job = (region, fa, bt)
+                inputs = inputs_fingerprint(*component_selection(
+                    fa, bt, ETHNICITY, HAIR, SCENE, OUTFIT, ph_region=region
+                ))
+                row = journal.lookup(idx, job, inputs)
+                if row is None:
+                    result = build_prompt(
+                        fa=fa,
+                        bt=bt,
+                        et=ETHNICITY,
+                        hr=HAIR,
+                        sc=SCENE,
+                        st=OUTFIT,
+                        v=VERSION,
+                        r="01",
+                        ph_region=region
+                    )
+                    
+                    row = {
+                        "canonical_id": result["canonical_id"],
+                        "ET": ETHNICITY,
+                        "PH_REGION": region,
+                        "FA": fa,
+                        "BT": bt,
+                        "HR": HAIR,
+                        "SC": SCENE,
+                        "ST": OUTFIT,
+                        "v": VERSION,
+                        "created_at": datetime.now().isoformat()
+                    }
+                    journal.record(idx, job, inputs, row)
+                results.append(row)
                 
-        except Exception as e:
-            skipped.append({
-                "region": region,
-                "fa": fa,
-                "bt": bt,
-                "error": str(e)
-            })
-            print(f"  ⚠️  Skipped {region}/{fa}/{bt}: {e}")
+                if idx % 10 == 0:
+                    print(f"  Progress: {idx}/{total} ({idx/total*100:.1f}%)")
+                    
+            except Exception as e:
+                skipped.append({
+                    "region": region,
+                    "fa": fa,
+                    "bt": bt,
+                    "error": str(e)
+                })
+                print(f"  ⚠️  Skipped {region}/{fa}/{bt}: {e}")
+    
+    if args.resume:
+        print(f"  Resumed: {journal.reused} combinations reused from journal")
     
     # Write CSV manifest
     if results:
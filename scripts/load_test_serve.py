@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Load test for `avatar-db serve`.
+
+By default a synthetic component tree is written to a temp directory and a
+daemon is started on it (free port, throwaway builds directory). With --url
+or --socket an already running daemon is targeted instead; pass --grid with
+codes that exist there.
+
+Each client thread keeps one keep-alive connection and sends POST /build
+(or /render) requests for random combinations of the grid. Reports
+throughput and client-side latency percentiles, plus the server-side
+handling time from the X-Elapsed-Ms header.
+
+Usage:
+    python scripts/load_test_serve.py [--requests 2000] [--concurrency 8] [--endpoint build|render]
+    python scripts/load_test_serve.py --socket /tmp/avatar-db.sock --grid "FA=... BT=..."
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+from urllib.parse import urlparse
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=30):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+def connect(url=None, socket_path=None):
+    if socket_path:
+        return UnixHTTPConnection(socket_path)
+    parsed = urlparse(url)
+    return http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=30)
+
+def start_daemon(work_dir, socket_path=None):
+    """Starts a daemon on a synthetic tree; returns (process, url, grid spec)."""
+    from bench_parallel_batch import write_tree
+    components = os.path.join(work_dir, "components")
+    spec = write_tree(components, random.Random(7))
+    env = dict(os.environ, AVATAR_DB_COMPONENTS_DIR=components, AVATAR_DB_NO_BUNDLE="1")
+    cmd = [sys.executable, "-m", "src.cli", "serve", "--quiet", "--builds-dir", os.path.join(work_dir, "builds")]
+    cmd += ["--socket", socket_path] if socket_path else ["--port", "0"]
+    proc = subprocess.Popen(cmd, cwd=ROOT_DIR, env=env, stdout=subprocess.PIPE, text=True)
+    for line in proc.stdout:
+        print(f"[serve] {line.rstrip()}")
+        if line.startswith("Serving on "):
+            return proc, line[len("Serving on "):].strip(), spec
+    raise RuntimeError("daemon exited before it was ready")
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+def run_client(conn_factory, endpoint, bodies, latencies, server_ms, errors):
+    conn = conn_factory()
+    for body in bodies:
+        data = json.dumps(body)
+        t0 = time.perf_counter()
+        try:
+            conn.request("POST", endpoint, data, {"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            payload = resp.read()
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(str(e))
+            conn.close()
+            conn = conn_factory()
+            continue
+        latencies.append((time.perf_counter() - t0) * 1000)
+        if resp.status != 200:
+            errors.append(f"{resp.status}: {payload[:200]!r}")
+        server_ms.append(float(resp.getheader("X-Elapsed-Ms") or 0))
+    conn.close()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="Target a running daemon, e.g. http://127.0.0.1:8765")
+    parser.add_argument("--socket", help="Unix socket of a running daemon (or for the started one with --start-on-socket)")
+    parser.add_argument("--start-on-socket", action="store_true", help="Start the synthetic daemon on --socket instead of TCP")
+    parser.add_argument("--grid", help="Codes to draw from (required with --url/--socket)")
+    parser.add_argument("--endpoint", choices=["build", "render"], default="build")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=200, help="Requests sent (and not measured) first")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    external = (args.url or args.socket) and not args.start_on_socket
+    if external and not args.grid:
+        parser.error("--grid is required when targeting a running daemon")
+
+    work_dir = None if external else tempfile.mkdtemp(prefix="avatar-db-serve-")
+    proc = None
+    try:
+        url, spec = args.url, args.grid
+        if not external:
+            proc, url, spec = start_daemon(work_dir, args.socket if args.start_on_socket else None)
+        socket_path = url[len("unix:"):] if url and url.startswith("unix:") else (args.socket if external else None)
+        conn_factory = lambda: connect(url, socket_path)
+
+        from src.batch import parse_grid
+        grid = parse_grid(spec)
+        rng = random.Random(args.seed)
+        def body(i):
+            req = {dim: rng.choice(codes) for dim, codes in grid.items()}
+            req.update({"v": "01", "r": f"{i % 99 + 1:02d}"})
+            return req
+
+        endpoint = f"/{args.endpoint}"
+        run_client(conn_factory, endpoint, [body(i) for i in range(args.warmup)], [], [], [])
+
+        bodies = [body(i) for i in range(args.requests)]
+        per_client = [bodies[i::args.concurrency] for i in range(args.concurrency)]
+        latencies, server_ms, errors = [], [], []
+        threads = [
+            threading.Thread(target=run_client, args=(conn_factory, endpoint, chunk, latencies, server_ms, errors))
+            for chunk in per_client
+        ]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - t0
+
+        print(f"Target:      {url} {endpoint} ({args.concurrency} clients, CPUs: {os.cpu_count()})")
+        print(f"Requests:    {len(latencies)} in {elapsed:.2f}s ({len(latencies) / elapsed:.0f} req/s), {len(errors)} errors")
+        for label, values in [("Client ms", latencies), ("Server ms", server_ms)]:
+            print(f"{label + ':':<12} p50 {percentile(values, 50):.2f}  p90 {percentile(values, 90):.2f}  "
+                  f"p99 {percentile(values, 99):.2f}  max {max(values or [0]):.2f}")
+        for error in errors[:5]:
+            print(f"  error: {error}")
+        return 1 if errors else 0
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+"""
+Batch engine for `avatar-db batch`.
+
+Expands a grid into build jobs and runs them either serially or on a
+process pool. Parallel runs hand out jobs in chunks, keep a bounded number
+of chunks in flight and yield results strictly in job order, so manifests
+are identical to a serial run.
+"""
+
+import hashlib
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from typing import Dict, Any, List, Iterable, Iterator, Optional, Tuple
+
+GRID_KEYS = ["FA", "BT", "ET", "HR", "SC", "ST"]
+# Optional grid axes; NO_REGION among their values means "no region"
+REGION_KEYS = ["PH_REGION", "VN_REGION"]
+NO_REGION = "-"
+
+# (fa, bt, et, hr, sc, st, v, r), plus (ph_region, vn_region) when the grid has region axes
+Job = Tuple[Optional[str], ...]
+
+def parse_grid(spec: str) -> Dict[str, List[str]]:
+    """Simple grid parser: "FA=A,B BT=C,D ..." -> {"FA": ["A", "B"], ...}"""
+    grid_params = {}
+    for p in spec.split():
+        k, v_list = p.split("=")
+        grid_params[k] = v_list.split(",")
+    return grid_params
+
+def job_parts(job: Job) -> Tuple[Tuple[str, ...], str, str, Dict[str, Optional[str]]]:
+    """(six grid codes, v, r, {"ph_region", "vn_region"}) of a job."""
+    ph_region, vn_region = job[8:10] if len(job) > 8 else (None, None)
+    return tuple(job[:6]), job[6], job[7], {"ph_region": ph_region, "vn_region": vn_region}
+
+def grid_jobs(
+    grid_params: Dict[str, List[str]], v: str, runs: int,
+    strategy: str = "full", sample: Optional[int] = None, seed: int = 0,
+    planner=None
+) -> Iterator[Job]:
+    """
+    Lazily expands the grid with a grid.expand_grid strategy, repeating
+    each combination for runs 01..NN. The six GRID_KEYS are required;
+    PH_REGION / VN_REGION axes are optional, and when present every job
+    carries (ph_region, vn_region) after r. With a planner.GridPlanner,
+    combinations it rejects (e.g. a PH_REGION without ET=PH) are dropped
+    (and counted) before any build.
+    """
+    from .grid import expand_grid
+    # Requirements example shows all keys provided in grid.
+    axes = GRID_KEYS + [k for k in REGION_KEYS if k in grid_params]
+    values = [grid_params[k] for k in axes]
+    for combo in expand_grid(values, strategy, sample, seed):
+        selection = {k: (None if code == NO_REGION else code) for k, code in zip(axes, combo)}
+        if planner is not None and not planner.allows(selection):
+            continue
+        regions = (selection.get("PH_REGION"), selection.get("VN_REGION")) if len(axes) > len(GRID_KEYS) else ()
+        for r_idx in range(1, runs + 1):
+            yield tuple(combo[:len(GRID_KEYS)]) + (v, f"{r_idx:02d}") + regions
+
+def batch_jobs(
+    v: str, grid: Optional[str] = None, preset: Optional[str] = None,
+    constraints: Optional[str] = None, **overrides
+) -> Tuple[Any, Iterator[Job], Dict[str, Any]]:
+    """
+    (planner, lazy job stream, resolved options) for a --grid spec or a
+    preset name/path. overrides (runs, strategy, sample, seed) that are not
+    None win over the preset's options, which win over DEFAULT_OPTIONS.
+    Raises ValueError for an unknown or invalid preset.
+    """
+    from .planner import GridPlanner, load_constraints
+    from .presets import DEFAULT_OPTIONS, load_preset
+    options = dict(DEFAULT_OPTIONS)
+    if preset:
+        # Preset axes resolve through the registry indexes
+        preset = load_preset(preset)
+        grid_params = preset.compile()
+        options.update(preset.options)
+    elif grid:
+        grid_params = parse_grid(grid)
+    else:
+        raise ValueError("Pass a grid or a preset")
+    options.update({k: val for k, val in overrides.items() if val is not None})
+    # Invalid combinations (constraints, missing components) are pruned before building
+    planner = GridPlanner(load_constraints(constraints) if constraints else None)
+    jobs = grid_jobs(grid_params, v, options["runs"], options["strategy"], options["sample"], options["seed"], planner)
+    return planner, jobs, options
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """"i/N" -> (i, N); shards are numbered 0..N-1."""
+    index, count = (int(part) for part in spec.split("/"))
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard {spec}: expected i/N with 0 <= i < N")
+    return index, count
+
+def shard_of(canonical_id: str, count: int) -> int:
+    """Stable shard of a canonical ID (same on every host and Python run)."""
+    digest = hashlib.sha1(canonical_id.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+def shard_jobs(jobs: Iterable[Job], index: int, count: int) -> Iterator[Tuple[int, Job]]:
+    """
+    (position, job) for the jobs of one shard, where position is the job's
+    index in the unsharded stream. All runs of a canonical ID share a shard.
+    """
+    from .builder import canonical_id_for
+    for position, job in enumerate(jobs):
+        codes, v, _, regions = job_parts(job)
+        if shard_of(canonical_id_for(*codes, v, **regions), count) == index:
+            yield position, job
+
+# Per-process state for pool workers
+_worker_store = None
+
+def _init_worker(store_options: Dict[str, Any]):
+    """Opens the worker's build store and warms its component cache once."""
+    global _worker_store
+    from .build_store import open_build_store
+    from .merge import VALIDATION_CACHE
+    from .registry import warm_component_cache
+
+    _worker_store = open_build_store(**store_options)
+    warm_component_cache()
+    # Boundary warnings go back to the parent with each chunk (see _build_chunk)
+    VALIDATION_CACHE.echo = False
+
+def _build_jobs(jobs: List[Job], store) -> List[Dict[str, Any]]:
+    from .builder import build_canonical, emit_runs
+    results = []
+    with store.batch():
+        # Consecutive runs of one combination share a single prompt build;
+        # runs 2..N only write their run records
+        for _, group in itertools.groupby(jobs, key=lambda job: job[:7] + job[8:]):
+            group = list(group)
+            codes, v, _, regions = job_parts(group[0])
+            canonical = build_canonical(*codes, v, store=store, **regions)
+            results.extend(emit_runs(canonical, [job[7] for job in group], store=store))
+    return results
+
+def _build_chunk(jobs: List[Job]) -> Tuple[List[Dict[str, Any]], List[Tuple[str, str, List[str], int]]]:
+    """Build results of one chunk, plus the boundary warnings it raised."""
+    from .merge import VALIDATION_CACHE
+    results = _build_jobs(jobs, _worker_store)
+    return results, VALIDATION_CACHE.drain()
+
+def _chunks(jobs: Iterable[Job], size: int) -> Iterator[List[Job]]:
+    it = iter(jobs)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+def job_inputs(job: Job) -> str:
+    """Input hash of a job (see builder.inputs_fingerprint)."""
+    from .builder import component_selection, inputs_fingerprint
+    codes, _, _, regions = job_parts(job)
+    return inputs_fingerprint(*component_selection(*codes, **regions))
+
+def run_jobs(
+    jobs: Iterable[Job],
+    store=None,
+    workers: int = 1,
+    chunk_size: int = 64,
+    store_options: Optional[Dict[str, Any]] = None,
+    journal=None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Builds every job and yields build results in job order.
+
+    workers <= 1 builds in this process through store. Otherwise jobs are
+    sent to a process pool in chunks of chunk_size; each worker opens its
+    own store via open_build_store(**store_options) and at most
+    2 * workers chunks are in flight at a time. Boundary warnings raised in
+    the workers are counted in this process's merge.VALIDATION_CACHE.
+
+    With a journal (journal.BatchJournal), jobs whose journaled result
+    still matches their inputs are not rebuilt; their recorded result is
+    yielded in place, and every new result is journaled.
+    """
+    if journal is not None:
+        for res in _run_journaled(jobs, journal, store, workers, chunk_size, store_options):
+            yield res
+        return
+
+    if workers <= 1:
+        for chunk in _chunks(jobs, chunk_size):
+            for res in _build_jobs(chunk, store):
+                yield res
+        return
+
+    from .merge import VALIDATION_CACHE
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(store_options or {},)) as pool:
+        pending = deque()
+        chunks = _chunks(jobs, chunk_size)
+        for chunk in itertools.islice(chunks, workers * 2):
+            pending.append(pool.submit(_build_chunk, chunk))
+        while pending:
+            results, warnings = pending.popleft().result()
+            VALIDATION_CACHE.absorb(warnings)
+            for chunk in itertools.islice(chunks, 1):
+                pending.append(pool.submit(_build_chunk, chunk))
+            for res in results:
+                yield res
+
+def _run_journaled(jobs, journal, store, workers, chunk_size, store_options):
+    def plan():
+        for index, job in enumerate(jobs):
+            inputs = job_inputs(job)
+            yield index, job, inputs, journal.lookup(index, job, inputs)
+
+    # One pass decides what to build; the tee buffers only the jobs
+    # between the build frontier and the results being yielded.
+    planned, ordered = itertools.tee(plan())
+    todo = (job for _, job, _, done in planned if done is None)
+    built = run_jobs(todo, store=store, workers=workers, chunk_size=chunk_size, store_options=store_options)
+    for index, job, inputs, done in ordered:
+        if done is not None:
+            yield done
+            continue
+        res = next(built)
+        journal.record(index, job, inputs, res)
+        yield res
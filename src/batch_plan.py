@@ -0,0 +1,158 @@
+"""
+Dry-run planning for `avatar-db batch --plan`.
+
+Walks the job stream once without building it: counts runs and distinct
+canonical prompts, and sums the on-disk size of the components behind each
+distinct prompt. A few real builds then go into a throwaway store. They
+calibrate how component bytes turn into prompt bytes, the size of run
+records and manifest rows, the time to build a canonical prompt and the
+time to emit one run of it. Those rates are extrapolated to the whole
+batch: every distinct prompt is built once and every run is emitted.
+"""
+
+import os
+import csv
+import io
+import time
+import shutil
+import hashlib
+import tempfile
+import statistics
+from typing import Dict, Any, List, Iterable, Optional
+
+DEFAULT_SAMPLE = 20
+
+def _id_key(canonical_id: str) -> bytes:
+    # 8-byte digests keep the distinct-prompt set small for huge batches
+    return hashlib.sha1(canonical_id.encode("utf-8")).digest()[:8]
+
+def plan_batch(jobs: Iterable[tuple], sample: int = DEFAULT_SAMPLE, workers: int = 1) -> Dict[str, Any]:
+    from .batch import job_parts
+    from .builder import canonical_id_for, component_selection
+    from .registry import get_component_path
+
+    sizes: Dict[str, int] = {}
+    seen = set()
+    runs = 0
+    component_bytes = 0
+    sample_jobs = []
+    for job in jobs:
+        runs += 1
+        codes, v, _, regions = job_parts(job)
+        key = _id_key(canonical_id_for(*codes, v, **regions))
+        if key in seen:
+            continue
+        seen.add(key)
+        job_bytes = 0
+        for dim, code in zip(*component_selection(*codes, **regions)):
+            path = get_component_path(dim, code)
+            if path not in sizes:
+                sizes[path] = os.path.getsize(path) if os.path.exists(path) else 0
+            job_bytes += sizes[path]
+        component_bytes += job_bytes
+        if len(sample_jobs) < sample:
+            sample_jobs.append((job, job_bytes))
+
+    plan = {
+        "runs": runs,
+        "prompts": len(seen),
+        # run record + prompt link per canonical ID + at most one object per prompt, and the manifest
+        "files": runs + 2 * len(seen) + (1 if runs else 0),
+        "component_bytes": component_bytes,
+        "workers": workers,
+        "calibration": _calibrate(sample_jobs)
+    }
+    cal = plan["calibration"]
+    if cal["builds"]:
+        plan["prompt_bytes"] = int(component_bytes * cal["prompt_ratio"])
+        plan["run_bytes"] = int(runs * cal["run_bytes"])
+        plan["manifest_bytes"] = int(runs * cal["row_bytes"])
+        # Runs 2..N of a prompt only emit a run record (see builder.emit_runs)
+        plan["seconds"] = (len(seen) * cal["seconds_per_build"] + runs * cal["seconds_per_emit"]) / max(1, workers)
+    return plan
+
+def _calibrate(sample_jobs: List[tuple]) -> Dict[str, Any]:
+    """Builds the sample into a temporary store and measures it."""
+    from .batch import job_parts
+    from .builder import build_canonical, emit_runs
+    from .build_store import FileBuildStore
+    from .manifest import manifest_row, HEADERS
+
+    builds = []
+    errors = []
+    tmp_dir = tempfile.mkdtemp(prefix="avatar-db-plan-")
+    try:
+        store = FileBuildStore(tmp_dir)
+        for job, job_bytes in sample_jobs:
+            codes, v, r, regions = job_parts(job)
+            t0 = time.perf_counter()
+            try:
+                canonical = build_canonical(*codes, v, store=store, **regions)
+                t1 = time.perf_counter()
+                (res,) = emit_runs(canonical, [r], store=store)
+            except (OSError, ValueError) as e:
+                errors.append(f"{'/'.join(codes)}: {e}")
+                continue
+            t2 = time.perf_counter()
+            row = io.StringIO()
+            csv.DictWriter(row, fieldnames=HEADERS).writerow(manifest_row("plan", res))
+            builds.append({
+                "build_seconds": t1 - t0,
+                "emit_seconds": t2 - t1,
+                "component_bytes": job_bytes,
+                "prompt_bytes": os.path.getsize(res["prompt_path"]),
+                "run_bytes": os.path.getsize(res["run_path"]),
+                "row_bytes": len(row.getvalue().encode("utf-8"))
+            })
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    cal = {"builds": len(builds), "errors": errors}
+    if builds:
+        component_total = sum(b["component_bytes"] for b in builds)
+        cal.update({
+            # Median resists the cold-cache first build
+            "seconds_per_build": statistics.median(b["build_seconds"] for b in builds),
+            "seconds_per_emit": statistics.median(b["emit_seconds"] for b in builds),
+            "prompt_ratio": (sum(b["prompt_bytes"] for b in builds) / component_total) if component_total else 0.0,
+            "run_bytes": statistics.mean(b["run_bytes"] for b in builds),
+            "row_bytes": statistics.mean(b["row_bytes"] for b in builds)
+        })
+    return cal
+
+def _human_bytes(n: float) -> str:
+    for unit in ["B", "KB", "MB", "GB"]:
+        if n < 1024:
+            return f"{n:.1f} {unit}" if unit != "B" else f"{int(n)} B"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+def _human_seconds(s: float) -> str:
+    if s < 120:
+        return f"{s:.1f}s"
+    if s < 7200:
+        return f"{s / 60:.1f} min"
+    return f"{s / 3600:.1f} h"
+
+def format_plan(plan: Dict[str, Any], batch_name: Optional[str] = None) -> List[str]:
+    cal = plan["calibration"]
+    lines = [f"Plan{': ' + batch_name if batch_name else ''}"]
+    lines.append(f"  Runs:              {plan['runs']:,}")
+    lines.append(f"  Distinct prompts:  {plan['prompts']:,}")
+    lines.append(f"  Files:             ~{plan['files']:,} (runs + prompt links + prompt objects + manifest)")
+    if cal["builds"]:
+        total = plan["prompt_bytes"] + plan["run_bytes"] + plan["manifest_bytes"]
+        lines.append(
+            f"  Output size:       ~{_human_bytes(total)} (prompts {_human_bytes(plan['prompt_bytes'])}, "
+            f"runs {_human_bytes(plan['run_bytes'])}, manifest {_human_bytes(plan['manifest_bytes'])})"
+        )
+        lines.append(
+            f"  Estimated time:    ~{_human_seconds(plan['seconds'])} at {plan['workers']} worker(s) "
+            f"(calibrated on {cal['builds']} builds, {cal['seconds_per_build'] * 1000:.1f} ms/prompt build, "
+            f"{cal['seconds_per_emit'] * 1000:.2f} ms/run)"
+        )
+    else:
+        lines.append(f"  Component input:   {_human_bytes(plan['component_bytes'])} (no successful sample builds to calibrate size/time)")
+    for error in cal["errors"][:5]:
+        lines.append(f"  Sample build failed: {error}")
+    return lines
@@ -0,0 +1,194 @@
+"""
+Lint of built prompts for `avatar-db lint --builds [path]`.
+
+Component lint checks sources only. This checks what was actually built:
+every prompt under builds/prompts and archive/builds__*/prompts (or a given
+path) goes through CompiledRules.validate_prompt. Paths are walked lazily and
+validated in chunks, in a process pool when there are many, with a bounded
+number of chunks in flight. Only per-class counts and the first few examples
+are kept in memory; every failing file is streamed to a JSON report.
+"""
+
+import os
+import sys
+import glob
+import json
+import itertools
+import threading
+from collections import Counter, deque
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .registry import BASE_DIR
+
+LINT_REPORT_PATH = os.path.join(BASE_DIR, "builds", "lint-builds-report.json")
+DEFAULT_EXAMPLES = 5
+CHUNK_SIZE = 256
+
+def default_targets() -> List[str]:
+    targets = [os.path.join(BASE_DIR, "builds", "prompts")]
+    targets.extend(sorted(glob.glob(os.path.join(BASE_DIR, "archive", "builds__*", "prompts"))))
+    return [t for t in targets if os.path.isdir(t)]
+
+def resolve_targets(path: Optional[str] = None) -> List[str]:
+    """The default locations, or path (its prompts/ folder when it has one)."""
+    if not path:
+        return default_targets()
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No such file or directory: {path}")
+    prompts = os.path.join(path, "prompts")
+    return [prompts if os.path.isdir(prompts) else path]
+
+def iter_prompt_files(targets: Iterable[str]) -> Iterator[str]:
+    """*.json files under targets, depth first with names sorted per folder."""
+    for target in targets:
+        if os.path.isfile(target):
+            yield target
+            continue
+        stack = [target]
+        while stack:
+            folder = stack.pop()
+            with os.scandir(folder) as it:
+                entries = sorted(it, key=lambda e: e.name)
+            subfolders = []
+            for entry in entries:
+                if entry.is_dir():
+                    subfolders.append(entry.path)
+                elif entry.name.endswith(".json"):
+                    yield entry.path
+            stack.extend(reversed(subfolders))
+
+def _lint_prompt(path: str) -> Tuple[str, List[Tuple[str, str]]]:
+    from .lint import compiled_rules
+    try:
+        with open(path, 'rb') as f:
+            content = json.loads(f.read())
+    except (OSError, ValueError) as e:
+        return path, [("unreadable", f"Failed to load: {e}")]
+    return path, compiled_rules().validate_prompt(content)
+
+def _lint_chunk(paths: List[str]) -> List[Tuple[str, List[Tuple[str, str]]]]:
+    return [_lint_prompt(path) for path in paths]
+
+def lint_prompts(paths: Iterable[str], workers: Optional[int] = None, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, List[Tuple[str, str]]]]:
+    """(path, errors) per prompt file, in input order."""
+    from .lint import PARALLEL_THRESHOLD
+
+    paths = iter(paths)
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    head = list(itertools.islice(paths, PARALLEL_THRESHOLD))
+    if workers <= 1 or len(head) < PARALLEL_THRESHOLD:
+        for path in itertools.chain(head, paths):
+            yield _lint_prompt(path)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    chunks = iter(lambda it=itertools.chain(head, paths): list(itertools.islice(it, chunk_size)), [])
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque(pool.submit(_lint_chunk, chunk) for chunk in itertools.islice(chunks, workers * 2))
+        while pending:
+            results = pending.popleft().result()
+            for chunk in itertools.islice(chunks, 1):
+                pending.append(pool.submit(_lint_chunk, chunk))
+            yield from results
+
+def _display(path: str) -> str:
+    rel = os.path.relpath(path, BASE_DIR)
+    return path if rel.startswith("..") else rel
+
+class BuildLintReport:
+    """
+    Summary of a builds lint: file and failure counts, errors per class and
+    the first examples of each. Failing files are written to the JSON
+    report as they arrive; the summary is appended on close().
+    """
+
+    def __init__(self, targets: List[str], path: Optional[str] = LINT_REPORT_PATH, examples: int = DEFAULT_EXAMPLES):
+        self.targets = [_display(t) for t in targets]
+        self.path = path
+        self.examples_per_class = examples
+        self.files = 0
+        self.failed = 0
+        self.counts: Counter = Counter()
+        self.examples: Dict[str, List[Dict[str, str]]] = {}
+        self._tmp_path = None
+        self._f = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            self._f = open(self._tmp_path, 'w')
+            self._f.write('{"targets": ' + json.dumps(self.targets) + ', "failures": [')
+
+    def add(self, path: str, errors: List[Tuple[str, str]]):
+        self.files += 1
+        if not errors:
+            return
+        shown = _display(path)
+        if self._f is not None:
+            record = {"path": shown, "errors": [{"class": cls, "message": msg} for cls, msg in errors]}
+            self._f.write(("\n" if self.failed == 0 else ",\n") + json.dumps(record))
+        self.failed += 1
+        for cls, msg in errors:
+            self.counts[cls] += 1
+            examples = self.examples.setdefault(cls, [])
+            if len(examples) < self.examples_per_class:
+                examples.append({"path": shown, "message": msg})
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "files": self.files,
+            "failed": self.failed,
+            "errors": dict(self.counts.most_common()),
+            "examples": self.examples
+        }
+
+    def close(self):
+        if self._f is None:
+            return
+        self._f.write('\n], "summary": ' + json.dumps(self.summary()) + '}\n')
+        self._f.close()
+        self._f = None
+        os.replace(self._tmp_path, self.path)
+
+    def discard(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+            os.remove(self._tmp_path)
+
+    def format(self) -> List[str]:
+        lines = [f"Linted {self.files:,} built prompts in {len(self.targets)} location(s): {self.failed:,} failed"]
+        for cls, n in self.counts.most_common():
+            lines.append(f"  {cls}: {n:,}")
+            for example in self.examples[cls]:
+                lines.append(f"    {example['path']}: {example['message']}")
+        return lines
+
+def run_build_lint(
+    path: Optional[str] = None,
+    workers: Optional[int] = None,
+    report_path: Optional[str] = LINT_REPORT_PATH,
+    examples: int = DEFAULT_EXAMPLES
+) -> int:
+    try:
+        targets = resolve_targets(path)
+    except FileNotFoundError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if not targets:
+        print("No built prompts found")
+        return 0
+
+    report = BuildLintReport(targets, report_path, examples)
+    try:
+        for prompt_path, errors in lint_prompts(iter_prompt_files(targets), workers):
+            report.add(prompt_path, errors)
+    except BaseException:
+        report.discard()
+        raise
+    report.close()
+
+    for line in report.format():
+        print(line)
+    if report_path:
+        print(f"Report: {_display(report_path)}")
+    return 1 if report.failed else 0
@@ -0,0 +1,342 @@
+"""
+Build output storage.
+
+BuildStore is the interface build_prompt writes through:
+  - FileBuildStore: the loose-file layout (builds/objects + builds/prompts
+    links from PromptStore, one builds/runs/<run_id>.json per run).
+  - SQLiteBuildStore: one SQLite database (WAL mode, batched transactions)
+    holding prompts, run metadata and manifests, with indexes on every
+    selection code, prompt version, timestamp and rating so run queries are
+    index lookups instead of directory scans. export_loose() writes the
+    database back out in the loose-file layout.
+
+Paths returned by SQLiteBuildStore are the ones export_loose() would
+produce, so manifests look the same whichever backend wrote them.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple
+from .prompt_store import PromptStore
+from .utils import load_json, save_json
+
+# Selection codes stored (and indexed) as run columns
+SELECTION_COLUMNS = ["FA", "BT", "ET", "HR", "SC", "ST", "APPEARANCE", "PH_REGION", "VN_REGION", "BASE", "PF", "NB"]
+
+def _rating(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+class BuildStore:
+    """Interface for build output backends."""
+
+    def put_prompt(self, canonical_id: str, prompt: Dict[str, Any]) -> Tuple[str, str]:
+        """Stores a merged prompt; returns (prompt hash, prompt path)."""
+        raise NotImplementedError
+
+    def put_run(self, run_id: str, canonical_id: str, meta: Dict[str, Any]) -> str:
+        """Stores a run record; returns its path."""
+        raise NotImplementedError
+
+    def get_prompt(self, prompt_hash: str) -> Optional[Dict[str, Any]]:
+        """A stored prompt by hash, or None."""
+        raise NotImplementedError
+
+    def put_manifest(self, batch_name: str, manifest_path: str, rows: List[Dict[str, Any]], start: int = 0):
+        """
+        Records rows of a written manifest, starting at row index start.
+        start=0 replaces the manifest; streaming writers append with start > 0.
+        Optional for backends.
+        """
+
+    def query_runs(
+        self,
+        codes: Optional[Dict[str, str]] = None,
+        min_rating: Optional[int] = None,
+        prompt_version: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    @contextmanager
+    def batch(self):
+        """Groups writes; backends with transactions commit once at the end."""
+        yield self
+
+    def flush(self):
+        """Commits pending writes now, even inside batch()."""
+
+    def close(self):
+        pass
+
+def _matches(meta: Dict[str, Any], codes, min_rating, prompt_version, since, until) -> bool:
+    selection = meta.get("selection_codes", {})
+    for dim, code in (codes or {}).items():
+        if selection.get(dim) != code:
+            return False
+    if min_rating is not None:
+        rating = _rating(meta.get("rating"))
+        if rating is None or rating < min_rating:
+            return False
+    if prompt_version is not None and meta.get("prompt_version") != prompt_version:
+        return False
+    ts = meta.get("timestamp", "")
+    if since is not None and ts < since:
+        return False
+    if until is not None and ts > until:
+        return False
+    return True
+
+class FileBuildStore(BuildStore):
+    """The loose-file layout under builds/ (the default backend)."""
+
+    def __init__(self, builds_dir: str):
+        self.builds_dir = builds_dir
+        self.prompts = PromptStore(builds_dir)
+        self.runs_dir = os.path.join(builds_dir, "runs")
+
+    def put_prompt(self, canonical_id: str, prompt: Dict[str, Any]) -> Tuple[str, str]:
+        prompt_hash, _, _ = self.prompts.put(prompt)
+        return prompt_hash, self.prompts.link(canonical_id, prompt_hash)
+
+    def get_prompt(self, prompt_hash: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self.prompts.get(prompt_hash)
+        except FileNotFoundError:
+            return None
+
+    def put_run(self, run_id: str, canonical_id: str, meta: Dict[str, Any]) -> str:
+        run_path = os.path.join(self.runs_dir, f"{run_id}.json")
+        save_json(run_path, meta)
+        return run_path
+
+    def query_runs(self, codes=None, min_rating=None, prompt_version=None, since=None, until=None, limit=None):
+        # Directory scan; use SQLiteBuildStore for indexed queries
+        results = []
+        if not os.path.isdir(self.runs_dir):
+            return results
+        for name in sorted(os.listdir(self.runs_dir)):
+            if not name.endswith(".json"):
+                continue
+            meta = load_json(os.path.join(self.runs_dir, name))
+            if _matches(meta, codes, min_rating, prompt_version, since, until):
+                results.append(dict(meta, output_id=name[:-len(".json")]))
+                if limit and len(results) >= limit:
+                    break
+        return results
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prompts (
+    hash TEXT PRIMARY KEY,
+    body TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS canonical (
+    canonical_id TEXT PRIMARY KEY,
+    prompt_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    output_id TEXT PRIMARY KEY,
+    canonical_id TEXT NOT NULL,
+    prompt_hash TEXT,
+    run_id TEXT,
+    prompt_version TEXT,
+    timestamp TEXT,
+    rating INTEGER,
+    {columns},
+    meta TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS manifests (
+    batch_id TEXT NOT NULL,
+    manifest_path TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    output_id TEXT NOT NULL,
+    row TEXT NOT NULL,
+    PRIMARY KEY (manifest_path, position)
+);
+CREATE INDEX IF NOT EXISTS idx_runs_canonical ON runs(canonical_id);
+CREATE INDEX IF NOT EXISTS idx_runs_version ON runs(prompt_version);
+CREATE INDEX IF NOT EXISTS idx_runs_timestamp ON runs(timestamp);
+CREATE INDEX IF NOT EXISTS idx_runs_rating ON runs(rating);
+CREATE INDEX IF NOT EXISTS idx_manifests_batch ON manifests(batch_id);
+{indexes}
+""".format(
+    columns=",\n    ".join(f"{c} TEXT" for c in SELECTION_COLUMNS),
+    indexes="\n".join(f"CREATE INDEX IF NOT EXISTS idx_runs_{c.lower()} ON runs({c}, rating);" for c in SELECTION_COLUMNS)
+)
+
+class SQLiteBuildStore(BuildStore):
+    """
+    SQLite backend. Outside a batch() block every write commits on its own;
+    inside one, writes are grouped into transactions of up to batch_size
+    statements, with a final commit when the block exits.
+    """
+
+    def __init__(self, db_path: str, builds_dir: str, batch_size: int = 500):
+        self.db_path = db_path
+        self.builds_dir = builds_dir
+        self.batch_size = batch_size
+        self._layout = PromptStore(builds_dir)
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.RLock()
+        self._pending = 0
+        self._depth = 0
+
+    def _write(self, sql: str, params: tuple):
+        with self._lock:
+            if self._pending == 0:
+                self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute(sql, params)
+            self._pending += 1
+            if self._depth == 0 or self._pending >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        with self._lock:
+            if self._pending:
+                self._conn.execute("COMMIT")
+                self._pending = 0
+
+    @contextmanager
+    def batch(self):
+        with self._lock:
+            self._depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.flush()
+
+    def put_prompt(self, canonical_id: str, prompt: Dict[str, Any]) -> Tuple[str, str]:
+        # Hash the same bytes the file layout would write, so hashes match across backends
+        prompt_hash = PromptStore.digest(PromptStore.serialize(prompt))
+        body = json.dumps(prompt, separators=(",", ":"))
+        self._write("INSERT OR IGNORE INTO prompts (hash, body) VALUES (?, ?)", (prompt_hash, body))
+        self._write("INSERT OR REPLACE INTO canonical (canonical_id, prompt_hash) VALUES (?, ?)", (canonical_id, prompt_hash))
+        return prompt_hash, self._layout.prompt_path(canonical_id)
+
+    def put_run(self, run_id: str, canonical_id: str, meta: Dict[str, Any]) -> str:
+        selection = meta.get("selection_codes", {})
+        columns = ["output_id", "canonical_id", "prompt_hash", "run_id", "prompt_version", "timestamp", "rating"] + SELECTION_COLUMNS + ["meta"]
+        values = (
+            run_id, canonical_id, meta.get("prompt_hash"), meta.get("run_id"), meta.get("prompt_version"),
+            meta.get("timestamp"), _rating(meta.get("rating"))
+        ) + tuple(selection.get(c) for c in SELECTION_COLUMNS) + (json.dumps(meta),)
+        self._write(
+            f"INSERT OR REPLACE INTO runs ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+            values
+        )
+        return os.path.join(self.builds_dir, "runs", f"{run_id}.json")
+
+    def put_manifest(self, batch_name: str, manifest_path: str, rows: List[Dict[str, Any]], start: int = 0):
+        with self.batch():
+            if start == 0:
+                self._write("DELETE FROM manifests WHERE manifest_path = ?", (manifest_path,))
+            for position, row in enumerate(rows, start):
+                self._write(
+                    "INSERT INTO manifests (batch_id, manifest_path, position, output_id, row) VALUES (?, ?, ?, ?, ?)",
+                    (batch_name, manifest_path, position, row.get("output_id", ""), json.dumps(row))
+                )
+
+    def set_rating(self, output_id: str, rating: Optional[int], notes: Optional[str] = None):
+        """Updates a run's rating (and notes) in both the indexed column and its metadata."""
+        with self._lock:
+            row = self._conn.execute("SELECT meta FROM runs WHERE output_id = ?", (output_id,)).fetchone()
+            if row is None:
+                raise ValueError(f"Unknown run: {output_id}")
+            meta = json.loads(row[0])
+            meta["rating"] = "" if rating is None else str(rating)
+            if notes is not None:
+                meta["notes"] = notes
+            self._write("UPDATE runs SET rating = ?, meta = ? WHERE output_id = ?", (rating, json.dumps(meta), output_id))
+
+    def get_prompt(self, prompt_hash: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT body FROM prompts WHERE hash = ?", (prompt_hash,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def query_runs(self, codes=None, min_rating=None, prompt_version=None, since=None, until=None, limit=None):
+        clauses, params = [], []
+        for dim, code in (codes or {}).items():
+            if dim not in SELECTION_COLUMNS:
+                raise ValueError(f"Invalid dimension: {dim}")
+            clauses.append(f"{dim} = ?")
+            params.append(code)
+        if min_rating is not None:
+            clauses.append("rating >= ?")
+            params.append(min_rating)
+        if prompt_version is not None:
+            clauses.append("prompt_version = ?")
+            params.append(prompt_version)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp <= ?")
+            params.append(until)
+        sql = "SELECT output_id, meta FROM runs"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY output_id"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(json.loads(meta), output_id=output_id) for output_id, meta in rows]
+
+    def explain(self, sql: str, params: tuple = ()) -> List[str]:
+        """Query plan lines, for checking that lookups hit an index."""
+        with self._lock:
+            return [row[-1] for row in self._conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+    def export_loose(self, builds_dir: Optional[str] = None) -> Dict[str, int]:
+        """Writes prompts, canonical links and runs back out as loose files."""
+        self.flush()
+        target = PromptStore(builds_dir or self.builds_dir)
+        counts = {"prompts": 0, "runs": 0}
+        with self._lock:
+            canonical = self._conn.execute(
+                "SELECT c.canonical_id, p.body FROM canonical c JOIN prompts p ON p.hash = c.prompt_hash"
+            ).fetchall()
+            runs = self._conn.execute("SELECT output_id, meta FROM runs").fetchall()
+        for canonical_id, body in canonical:
+            prompt_hash, _, _ = target.put(json.loads(body))
+            target.link(canonical_id, prompt_hash)
+            counts["prompts"] += 1
+        for output_id, meta in runs:
+            save_json(os.path.join(target.builds_dir, "runs", f"{output_id}.json"), json.loads(meta))
+            counts["runs"] += 1
+        return counts
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+def open_build_store(kind: Optional[str] = None, builds_dir: Optional[str] = None, db_path: Optional[str] = None) -> BuildStore:
+    """
+    Opens the configured backend: kind is "files" (default) or "sqlite",
+    falling back to AVATAR_DB_STORE. The database defaults to
+    builds/avatar-db.sqlite (or AVATAR_DB_STORE_PATH).
+    """
+    from .registry import BASE_DIR
+    builds_dir = builds_dir or os.path.join(BASE_DIR, "builds")
+    kind = kind or os.environ.get("AVATAR_DB_STORE", "files")
+    if kind == "files":
+        return FileBuildStore(builds_dir)
+    if kind == "sqlite":
+        db_path = db_path or os.environ.get("AVATAR_DB_STORE_PATH") or os.path.join(builds_dir, "avatar-db.sqlite")
+        return SQLiteBuildStore(db_path, builds_dir)
+    raise ValueError(f"Invalid build store: {kind}")
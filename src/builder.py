@@ -1,66 +1,94 @@
 import os
 import json
 from datetime import datetime
-from typing import Dict, Any, Optional
-from .registry import get_component_path, BASE_DIR
-from .utils import load_json, save_json
-from .merge import merge_prompts
+from typing import Dict, Any, List, Optional, Tuple
+from .registry import get_component_path, short_dim, COMPONENT_CACHE
+from .utils import load_json, json_fingerprint
+from .merge_plan import MERGE_TRIE
+from .build_store import BuildStore, open_build_store
 
-def build_prompt(
-    fa: str, bt: str, et: str, hr: str, sc: str, st: str, v: str, r: str,
+# Default output backend (loose files unless AVATAR_DB_STORE=sqlite)
+BUILD_STORE: Optional[BuildStore] = None
+
+def get_build_store() -> BuildStore:
+    global BUILD_STORE
+    if BUILD_STORE is None:
+        BUILD_STORE = open_build_store()
+    return BUILD_STORE
+
+SELECTION_KEYS = ["FA", "BT", "ET", "HR", "SC", "ST"]
+
+# Locked components every build merges when the tree has them
+DEFAULT_CODES = {"PF": "POSTURE_FRAMING", "NB": "NB"}
+
+def default_code(dim: str, code: Optional[str] = None) -> Optional[str]:
+    """code if given, else the dimension's default code if its component exists (else None)."""
+    if code is not None:
+        return code
+    code = DEFAULT_CODES[dim]
+    return code if os.path.exists(get_component_path(dim, code)) else None
+
+def parse_selection(data: Dict[str, Any], require_run: bool = False) -> Dict[str, Any]:
+    """
+    Builder arguments from a JSON selection (daemon requests, build-stream
+    lines): the six codes keyed by short or registry dimension name (FA or
+    FACE), "v", "r" and optional "ph_region", "vn_region", "appearance",
+    "age", "BASE", "SUBJECT_TYPE", "SKIN", "POSE" and "overrides".
+    Returns {"codes", "v", "r", "options"}.
+    """
+    data = {short_dim(k): val for k, val in data.items()}
+    required = SELECTION_KEYS + (["v", "r"] if require_run else [])
+    missing = [k for k in required if not data.get(k)]
+    if missing:
+        raise ValueError(f"Missing required parameters: {', '.join(missing)}")
+    options = {
+        "ph_region": data.get("ph_region") or data.get("PH_REGION"),
+        "vn_region": data.get("vn_region") or data.get("VN_REGION"),
+        "age_code": data.get("age") or data.get("AGE"),
+        "overrides": data.get("overrides")
+    }
+    appearance = data.get("appearance") or data.get("APPEARANCE")
+    if appearance:
+        options["appearance_code"] = appearance
+    # UI selections also name the base, subject type, skin and pose
+    for key, option in [("BASE", "base_code"), ("SUBJECT_TYPE", "subject_type_code"), ("SKIN", "skin_code"), ("POSE", "pose_code")]:
+        if data.get(key):
+            options[option] = data[key]
+    return {"codes": [data[k] for k in SELECTION_KEYS], "v": data.get("v"), "r": data.get("r"), "options": options}
+
+def component_selection(
+    fa: str, bt: str, et: str, hr: str, sc: str, st: str,
     ph_region: Optional[str] = None,
     vn_region: Optional[str] = None,
-    appearance_code: str = "PORCELAIN_COOL", # Default from original logic
+    appearance_code: str = "PORCELAIN_COOL",
     age_code: Optional[str] = None,
     base_code: str = "BASE",
-    pf_code: str = "POSTURE_FRAMING",
-    nb: str = "NB",
-    overrides: Optional[Dict[str, Any]] = None
-) -> Dict[str, Any]:
-    # Canonical ID segments
-    segments = [
-        f"FA-{fa}",
-        f"BT-{bt}",
-        f"ET-{et}"
-    ]
-    
-    # Optional regions in canonical ID
-    if ph_region:
-        segments.append(f"PH_REGION-{ph_region}")
-    if vn_region:
-        segments.append(f"VN_REGION-{vn_region}")
-        
-    # appearance_code is now a direct parameter, no need to pop from overrides
-    # appearance_code = overrides.pop("APPEARANCE", "PORCELAIN_COOL") if overrides and "APPEARANCE" in overrides else "PORCELAIN_COOL"
-
-    segments.extend([
-        f"HR-{hr}",
-        f"SC-{sc}",
-        f"ST-{st}",
-        f"APPEARANCE-{appearance_code}"
-    ])
-    
-    if age_code:
-        segments.append(f"AGE-{age_code}")
-
-    segments.append(f"v{v}")
-    
-    canonical_id = "__".join(segments)
-    run_id = f"{canonical_id}__r{r}"
-    
+    pf_code: Optional[str] = None,
+    nb: Optional[str] = None,
+    subject_type_code: Optional[str] = None,
+    skin_code: Optional[str] = None,
+    pose_code: Optional[str] = None
+) -> Tuple[List[str], List[str]]:
+    """
+    Returns the (dims, codes) a build merges, in merge order. PF and NB
+    default to DEFAULT_CODES when those components exist.
+    """
     # Merge Order (Surgical):
     # 1. BASE (locked foundation)
-    # 2. PF (locked posture/framing)
-    # 3. SC (scene)
-    # 4. ET (ethnicity)
-    # 5. [REGION] (optional)
-    # 6. FA (face)
-    # 7. BT (body)
-    # 8. HR (hair)
-    # 9. APPEARANCE (color/skin)
-    # 10. AGE (optional)
-    # 11. ST (outfit)
-    # 12. NB (negative)
+    # 2. PF (locked posture/framing, when present)
+    # 3. SUBJECT_TYPE (optional)
+    # 4. SC (scene)
+    # 5. ET (ethnicity)
+    # 6. [REGION] (optional)
+    # 7. SKIN (optional)
+    # 8. FA (face)
+    # 9. BT (body)
+    # 10. HR (hair)
+    # 11. APPEARANCE (color/skin)
+    # 12. AGE (optional)
+    # 13. ST (outfit)
+    # 14. POSE (optional)
+    # 15. NB (negative, when present)
     
     dims = []
     codes = []
@@ -70,92 +98,302 @@ def build_prompt(
     codes.append(base_code)
     
     # 2. Posture/Framing
-    dims.append("PF")
-    codes.append(pf_code)
+    pf_code = default_code("PF", pf_code)
+    if pf_code:
+        dims.append("PF")
+        codes.append(pf_code)
+    
+    # 3. Subject type (Optional)
+    if subject_type_code:
+        dims.append("SUBJECT_TYPE")
+        codes.append(subject_type_code)
     
-    # 3. Scene
+    # 4. Scene
     dims.append("SC")
     codes.append(sc)
     
-    # 4. Ethnicity
+    # 5. Ethnicity
     dims.append("ET")
     codes.append(et)
     
-    # 5. Region (Optional)
+    # 6. Region (Optional)
     if ph_region and et == "PH":
         dims.append("PH_REGION")
         codes.append(ph_region)
     elif vn_region and et == "VN":
         dims.append("VN_REGION")
         codes.append(vn_region)
+    
+    # 7. Skin (Optional)
+    if skin_code:
+        dims.append("SKIN")
+        codes.append(skin_code)
         
-    # 6. Rest of dimensions
+    # 8. Rest of dimensions
     rest_dims = ["FA", "BT", "HR"]
     rest_codes = [fa, bt, hr]
     
-    # 9. Appearance
+    # 11. Appearance
     rest_dims.append("APPEARANCE")
     rest_codes.append(appearance_code)
     
-    # 10. Age (Optional)
+    # 12. Age (Optional)
     if age_code:
         rest_dims.append("AGE")
         rest_codes.append(age_code)
         
-    # 11-12. Outfit and Negative
-    rest_dims.extend(["ST", "NB"])
-    rest_codes.extend([st, nb])
+    # 13. Outfit
+    rest_dims.append("ST")
+    rest_codes.append(st)
+    
+    # 14. Pose (Optional)
+    if pose_code:
+        rest_dims.append("POSE")
+        rest_codes.append(pose_code)
+    
+    # 15. Negative
+    nb = default_code("NB", nb)
+    if nb:
+        rest_dims.append("NB")
+        rest_codes.append(nb)
     
     dims.extend(rest_dims)
     codes.extend(rest_codes)
+    return dims, codes
+
+def inputs_fingerprint(dims: List[str], codes: List[str]) -> str:
+    """
+    Hash of everything a build reads: each selected component's dimension,
+    code and content fingerprint. Unchanged inputs mean an unchanged prompt.
+    """
+    parts = []
+    for dim, code in zip(dims, codes):
+        path = get_component_path(dim, code)
+        # get() revalidates the entry against the file before fingerprinting
+        COMPONENT_CACHE.get(path, loader=load_json, copy=False)
+        parts.append([dim, code, COMPONENT_CACHE.fingerprint(path)])
+    return json_fingerprint(parts)
+
+def canonical_id_for(
+    fa: str, bt: str, et: str, hr: str, sc: str, st: str, v: str,
+    ph_region: Optional[str] = None,
+    vn_region: Optional[str] = None,
+    appearance_code: str = "PORCELAIN_COOL",
+    age_code: Optional[str] = None,
+    base_code: str = "BASE",
+    subject_type_code: Optional[str] = None,
+    skin_code: Optional[str] = None,
+    pose_code: Optional[str] = None
+) -> str:
+    """
+    Canonical prompt ID, e.g. FA-GOLD__BT-GOLD__...__APPEARANCE-PORCELAIN_COOL__v01.
+    A non-default base and the optional subject type, skin and pose get
+    segments only when selected, so other IDs are unchanged.
+    """
+    # Canonical ID segments
+    segments = []
+    if base_code != "BASE":
+        segments.append(f"BASE-{base_code}")
+    if subject_type_code:
+        segments.append(f"SUBJECT_TYPE-{subject_type_code}")
+    segments.extend([
+        f"FA-{fa}",
+        f"BT-{bt}",
+        f"ET-{et}"
+    ])
+    
+    # Optional regions in canonical ID
+    if ph_region:
+        segments.append(f"PH_REGION-{ph_region}")
+    if vn_region:
+        segments.append(f"VN_REGION-{vn_region}")
+    if skin_code:
+        segments.append(f"SKIN-{skin_code}")
+        
+    # appearance_code is now a direct parameter, no need to pop from overrides
+    # appearance_code = overrides.pop("APPEARANCE", "PORCELAIN_COOL") if overrides and "APPEARANCE" in overrides else "PORCELAIN_COOL"
+
+    segments.extend([
+        f"HR-{hr}",
+        f"SC-{sc}",
+        f"ST-{st}"
+    ])
+    if pose_code:
+        segments.append(f"POSE-{pose_code}")
+    segments.append(f"APPEARANCE-{appearance_code}")
+    
+    if age_code:
+        segments.append(f"AGE-{age_code}")
+
+    segments.append(f"v{v}")
+    
+    canonical_id = "__".join(segments)
+    return canonical_id
+
+def compose_prompt(
+    fa: str, bt: str, et: str, hr: str, sc: str, st: str,
+    ph_region: Optional[str] = None,
+    vn_region: Optional[str] = None,
+    appearance_code: str = "PORCELAIN_COOL", # Default from original logic
+    age_code: Optional[str] = None,
+    base_code: str = "BASE",
+    pf_code: Optional[str] = None,
+    nb: Optional[str] = None,
+    subject_type_code: Optional[str] = None,
+    skin_code: Optional[str] = None,
+    pose_code: Optional[str] = None,
+    overrides: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Loads, merges and renders the prompt for a selection without storing
+    anything. The result may share subtrees with the merge cache and must
+    not be mutated in place.
+    """
+    dims, codes = component_selection(
+        fa, bt, et, hr, sc, st, ph_region=ph_region, vn_region=vn_region,
+        appearance_code=appearance_code, age_code=age_code,
+        base_code=base_code, pf_code=pf_code, nb=nb,
+        subject_type_code=subject_type_code, skin_code=skin_code, pose_code=pose_code
+    )
     
     component_contents = []
+    fingerprints = []
     is_body_comp_enabled = overrides and overrides.get("body_components", {}).get("enabled") is True
     
     for dim, code in zip(dims, codes):
         if dim == "BT" and is_body_comp_enabled:
             # Skip loading body archetype if pure components system is active
             component_contents.append({})
+            fingerprints.append(None)
             continue
         path = get_component_path(dim, code)
-        component_contents.append(load_json(path))
+        # Shared read-only view; the merge trie copies what it merges
+        component_contents.append(COMPONENT_CACHE.get(path, loader=load_json, copy=False))
+        fingerprints.append(COMPONENT_CACHE.fingerprint(path))
     
-    final_prompt = merge_prompts({}, component_contents, dims)
+    # Reuses cached merge states for the shared BASE -> PF -> SC -> ... prefix.
+    # The returned tree is shared with the trie, so everything below must
+    # derive new dicts instead of mutating it.
+    final_prompt = MERGE_TRIE.merge(component_contents, dims, fingerprints=fingerprints, copy=False)
     
     if overrides:
-        from .utils import deep_merge
-        final_prompt = deep_merge(final_prompt, overrides)
+        from .utils import persistent_merge
+        final_prompt = persistent_merge(final_prompt, overrides)
     
     # NEW: Render natural language clauses
     from .renderer import enrich_prompt_with_renderings
-    final_prompt = enrich_prompt_with_renderings(final_prompt)
+    return enrich_prompt_with_renderings(final_prompt)
+
+def build_canonical(
+    fa: str, bt: str, et: str, hr: str, sc: str, st: str, v: str,
+    ph_region: Optional[str] = None,
+    vn_region: Optional[str] = None,
+    appearance_code: str = "PORCELAIN_COOL", # Default from original logic
+    age_code: Optional[str] = None,
+    base_code: str = "BASE",
+    pf_code: Optional[str] = None,
+    nb: Optional[str] = None,
+    subject_type_code: Optional[str] = None,
+    skin_code: Optional[str] = None,
+    pose_code: Optional[str] = None,
+    overrides: Optional[Dict[str, Any]] = None,
+    store: Optional[BuildStore] = None
+) -> Dict[str, Any]:
+    """
+    Composes the canonical prompt and stores it once.
+    Runs of the prompt are then recorded with emit_run(s), which write
+    only run metadata.
+    """
+    extra_codes = {"subject_type_code": subject_type_code, "skin_code": skin_code, "pose_code": pose_code}
+    canonical_id = canonical_id_for(
+        fa, bt, et, hr, sc, st, v, ph_region=ph_region, vn_region=vn_region,
+        appearance_code=appearance_code, age_code=age_code, base_code=base_code, **extra_codes
+    )
+    pf_code, nb = default_code("PF", pf_code), default_code("NB", nb)
+    final_prompt = compose_prompt(
+        fa, bt, et, hr, sc, st, ph_region=ph_region, vn_region=vn_region,
+        appearance_code=appearance_code, age_code=age_code,
+        base_code=base_code, pf_code=pf_code, nb=nb, overrides=overrides, **extra_codes
+    )
     
-    # Write builds/prompts/<canonical_id>.json (Always overwrite)
-    prompt_path = os.path.join(BASE_DIR, "builds", "prompts", f"{canonical_id}.json")
-    save_json(prompt_path, final_prompt)
+    # Store the prompt by content hash (written once); the file backend
+    # points builds/prompts/<canonical_id>.json at it
+    store = store or get_build_store()
+    prompt_hash, prompt_path = store.put_prompt(canonical_id, final_prompt)
+    
+    selection_codes = {
+        "FA": fa, "BT": bt, "ET": et, "HR": hr, "SC": sc, "ST": st, "APPEARANCE": appearance_code,
+        "PH_REGION": ph_region, "VN_REGION": vn_region,
+        "BASE": base_code, "PF": pf_code, "NB": nb
+    }
+    # Optional dimensions are recorded only when selected
+    for dim, code in [("SUBJECT_TYPE", subject_type_code), ("SKIN", skin_code), ("POSE", pose_code)]:
+        if code:
+            selection_codes[dim] = code
+    return {
+        "canonical_id": canonical_id,
+        "prompt_path": prompt_path,
+        "prompt_hash": prompt_hash,
+        "prompt_version": v,
+        "selection_codes": selection_codes
+    }
+
+def emit_run(canonical: Dict[str, Any], r: str, store: Optional[BuildStore] = None) -> Dict[str, Any]:
+    """Writes the run record for run r of a build_canonical() result."""
+    canonical_id = canonical["canonical_id"]
+    run_id = f"{canonical_id}__r{r}"
     
-    # Write builds/runs/<run_id>.json (Always)
-    run_path = os.path.join(BASE_DIR, "builds", "runs", f"{run_id}.json")
+    # Write the run record (builds/runs/<run_id>.json for the file backend)
     run_meta = {
         "timestamp": datetime.now().isoformat(),
-        "selection_codes": {
-            "FA": fa, "BT": bt, "ET": et, "HR": hr, "SC": sc, "ST": st, "APPEARANCE": appearance_code,
-            "PH_REGION": ph_region, "VN_REGION": vn_region,
-            "BASE": base_code, "PF": pf_code, "NB": nb
-        },
-        "prompt_version": v,
+        "selection_codes": dict(canonical["selection_codes"]),
+        "prompt_version": canonical["prompt_version"],
         "run_id": r,
-        "prompt_json_path": prompt_path,
+        "prompt_json_path": canonical["prompt_path"],
+        "prompt_hash": canonical["prompt_hash"],
         "image_path": "",
         "rating": "",
         "notes": ""
     }
-    save_json(run_path, run_meta)
+    store = store or get_build_store()
+    run_path = store.put_run(run_id, canonical_id, run_meta)
     
     return {
         "canonical_id": canonical_id,
         "run_id": run_id,
-        "prompt_path": prompt_path,
+        "prompt_path": canonical["prompt_path"],
+        "prompt_hash": canonical["prompt_hash"],
         "run_path": run_path,
         "meta": run_meta
     }
+
+def emit_runs(canonical: Dict[str, Any], runs: List[str], store: Optional[BuildStore] = None) -> List[Dict[str, Any]]:
+    """Run records for several runs of one canonical prompt (inside one store batch)."""
+    store = store or get_build_store()
+    with store.batch():
+        return [emit_run(canonical, r, store=store) for r in runs]
+
+def build_prompt(
+    fa: str, bt: str, et: str, hr: str, sc: str, st: str, v: str, r: str,
+    ph_region: Optional[str] = None,
+    vn_region: Optional[str] = None,
+    appearance_code: str = "PORCELAIN_COOL", # Default from original logic
+    age_code: Optional[str] = None,
+    base_code: str = "BASE",
+    pf_code: Optional[str] = None,
+    nb: Optional[str] = None,
+    subject_type_code: Optional[str] = None,
+    skin_code: Optional[str] = None,
+    pose_code: Optional[str] = None,
+    overrides: Optional[Dict[str, Any]] = None,
+    store: Optional[BuildStore] = None
+) -> Dict[str, Any]:
+    """Builds the canonical prompt and records run r of it."""
+    canonical = build_canonical(
+        fa, bt, et, hr, sc, st, v, ph_region=ph_region, vn_region=vn_region,
+        appearance_code=appearance_code, age_code=age_code,
+        base_code=base_code, pf_code=pf_code, nb=nb,
+        subject_type_code=subject_type_code, skin_code=skin_code, pose_code=pose_code,
+        overrides=overrides, store=store
+    )
+    return emit_run(canonical, r, store=store)
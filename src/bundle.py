@@ -0,0 +1,167 @@
+"""
+Compiled registry bundle.
+
+Packs registry/codes.json and every components/**/*.json into a single
+versioned file that can be memory-mapped and decoded lazily per component.
+
+Layout:
+    MAGIC (8 bytes) | format version (u32) | index length (u32)
+    | content hash (20 bytes, sha1) | index (JSON) | payloads
+
+The index maps each source path (relative to the repo root) to
+[offset, length, mtime_ns, size, sha1] where offset is relative to the
+start of the payload section. An entry is only served when the loose
+file's stat still matches, otherwise callers fall back to the loose file.
+"""
+
+import os
+import json
+import mmap
+import struct
+import hashlib
+from typing import Dict, Any, List, Optional
+
+MAGIC = b"AVDBBNDL"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sII20s")
+
+def collect_sources(base_dir: str) -> List[str]:
+    """Returns the absolute paths of every file that belongs in the bundle."""
+    sources = []
+    registry_path = os.path.join(base_dir, "registry", "codes.json")
+    if os.path.exists(registry_path):
+        sources.append(registry_path)
+    components_dir = os.path.join(base_dir, "components")
+    for root, dirs, files in os.walk(components_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith(".json"):
+                sources.append(os.path.join(root, name))
+    return sources
+
+def compile_bundle(out_path: str, base_dir: str) -> Dict[str, Any]:
+    """
+    Compiles every source under base_dir into out_path.
+    Payloads are re-serialized compactly so they decode faster than the
+    pretty-printed originals.
+    """
+    index = {}
+    payloads = []
+    offset = 0
+    content_hash = hashlib.sha1()
+
+    for path in collect_sources(base_dir):
+        with open(path, 'rb') as f:
+            raw = f.read()
+        st = os.stat(path)
+        payload = json.dumps(json.loads(raw), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        rel = os.path.relpath(path, base_dir).replace(os.sep, "/")
+        index[rel] = [offset, len(payload), st.st_mtime_ns, st.st_size, hashlib.sha1(raw).hexdigest()]
+        content_hash.update(rel.encode("utf-8"))
+        content_hash.update(payload)
+        payloads.append(payload)
+        offset += len(payload)
+
+    index_bytes = json.dumps({"entries": index}, separators=(",", ":")).encode("utf-8")
+    digest = content_hash.digest()
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp_path = f"{out_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(index_bytes), digest))
+        f.write(index_bytes)
+        for payload in payloads:
+            f.write(payload)
+    os.replace(tmp_path, out_path)
+
+    return {
+        "path": out_path,
+        "entries": len(index),
+        "bytes": HEADER.size + len(index_bytes) + offset,
+        "content_hash": digest.hex()
+    }
+
+class RegistryBundle:
+    """
+    Read-only view over a compiled bundle.
+    The file is mmap'd once; payloads are decoded only when requested.
+    """
+
+    def __init__(self, path: str, base_dir: str):
+        self.path = path
+        self.base_dir = base_dir
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Empty bundle: {path}")
+        if len(self._mm) < HEADER.size:
+            self.close()
+            raise ValueError(f"Truncated bundle: {path}")
+        magic, version, index_len, digest = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported bundle format: {path}")
+        self.content_hash = digest.hex()
+        index_start = HEADER.size
+        self._payload_start = index_start + index_len
+        entries = json.loads(self._mm[index_start:self._payload_start])["entries"]
+        # Keyed by absolute path so lookups avoid a relpath() per call
+        self._entries: Dict[str, List[Any]] = {
+            os.path.join(base_dir, *rel.split("/")): entry for rel, entry in entries.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, path: str) -> bool:
+        return os.path.abspath(path) in self._entries
+
+    def entry(self, path: str) -> Optional[List[Any]]:
+        return self._entries.get(os.path.abspath(path))
+
+    def is_fresh(self, path: str, signature: Any) -> bool:
+        """
+        True when the bundled copy of path matches signature, which is
+        either (mtime_ns, size) from os.stat or a sha1 hex digest.
+        """
+        entry = self.entry(path)
+        if entry is None:
+            return False
+        if isinstance(signature, tuple):
+            return (entry[2], entry[3]) == signature
+        return entry[4] == signature
+
+    def load(self, path: str, signature: Any = None) -> Optional[Dict[str, Any]]:
+        """
+        Decodes the bundled payload for path, or None if it is not bundled
+        (or, when signature is given, if the bundled copy is stale).
+        """
+        entry = self.entry(path)
+        if entry is None:
+            return None
+        if signature is not None:
+            if isinstance(signature, tuple):
+                if (entry[2], entry[3]) != signature:
+                    return None
+            elif entry[4] != signature:
+                return None
+        start = self._payload_start + entry[0]
+        return json.loads(self._mm[start:start + entry[1]])
+
+    def close(self):
+        mm = getattr(self, "_mm", None)
+        if mm is not None:
+            mm.close()
+            self._mm = None
+        self._file.close()
+
+def open_bundle(path: str, base_dir: str) -> Optional[RegistryBundle]:
+    """Opens a bundle if it exists and is readable, else None."""
+    if not os.path.exists(path):
+        return None
+    try:
+        return RegistryBundle(path, base_dir)
+    except (OSError, ValueError):
+        return None
@@ -1,23 +1,241 @@
 import argparse
 import sys
-import json
-from .lint import run_lint
-from .registry import get_all_codes, get_pack_path
-from .utils import load_json
-from .builder import build_prompt
-from .manifest import write_manifest
-from .presets import face_pass
 
-def main():
+# Subcommand handlers import their modules on demand so that cheap commands
+# (`list`, `--help`) do not pay for the builder/renderer/lint import chain.
+
+def cmd_lint(args):
+    if args.builds is not None:
+        from .build_lint import run_build_lint, LINT_REPORT_PATH
+        sys.exit(run_build_lint(
+            args.builds or None, workers=args.workers,
+            report_path=args.report or LINT_REPORT_PATH, examples=args.examples
+        ))
+    from .lint import run_lint
+    sys.exit(run_lint(changed_only=args.changed_only, workers=args.workers, use_cache=not args.no_cache))
+
+def cmd_compile(args):
+    from .registry import compile_registry, BUNDLE_PATH
+    info = compile_registry(args.out or BUNDLE_PATH)
+    print(f"Compiled {info['entries']} files ({info['bytes']} bytes) -> {info['path']}")
+    print(f"Content hash: {info['content_hash']}")
+
+def cmd_list(args):
+    from .registry import get_registry
+    registry = get_registry()
+    if registry.has_dimension(args.dim):
+        for code in registry.codes(args.dim):
+            print(code)
+    else:
+        print(f"Unknown dimension: {args.dim}")
+
+def _open_store(args):
+    from .build_store import open_build_store
+    return open_build_store(args.store)
+
+def cmd_build(args):
+    from .builder import build_prompt
+    store = _open_store(args)
+    try:
+        res = build_prompt(
+            fa=args.FA, bt=args.BT, et=args.ET, hr=args.HR,
+            sc=args.SC, st=args.ST, v=args.v, r=args.r,
+            ph_region=args.ph_region, vn_region=args.vn_region,
+            store=store
+        )
+    finally:
+        store.close()
+    print(f"Built: {res['run_id']}")
+
+def cmd_build_pack(args):
+    from .registry import get_pack_path
+    from .utils import load_json
+    from .builder import build_prompt
+    sub_pack = load_json(get_pack_path("SUB", args.SUB))
+    sty_pack = load_json(get_pack_path("STY", args.STY))
+    store = _open_store(args)
+    try:
+        res = build_prompt(
+            fa=sub_pack["FA"], bt=sub_pack["BT"], et=sub_pack["ET"], hr=sub_pack["HR"],
+            sc=sty_pack["SC"], st=sty_pack["ST"], v=args.v, r=args.r,
+            ph_region=args.ph_region, vn_region=args.vn_region,
+            store=store
+        )
+    finally:
+        store.close()
+    print(f"Built from pack: {res['run_id']}")
+
+def cmd_batch(args):
+    if args.plan:
+        _plan_batch(args)
+        return
+    store = _open_store(args)
+    try:
+        with store.batch():
+            _run_batch(args, store)
+    finally:
+        store.close()
+
+def _batch_jobs(args):
+    """(planner, lazy job stream, options) for --grid or --preset with the selected strategy."""
+    from .batch import batch_jobs
+    try:
+        return batch_jobs(
+            args.v, grid=args.grid, preset=args.preset, constraints=args.constraints,
+            runs=args.runs, strategy=args.strategy, sample=args.sample, seed=args.seed
+        )
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+def _plan_batch(args):
+    from .batch_plan import plan_batch, format_plan
+    if not (args.grid or args.preset):
+        print("Nothing to plan: pass --grid or --preset.")
+        return
+    planner, jobs, _ = _batch_jobs(args)
+    if args.shard:
+        from .batch import parse_shard, shard_jobs
+        jobs = (job for _, job in shard_jobs(jobs, *parse_shard(args.shard)))
+    # Expands lazily and builds only a small calibration sample into a temp dir
+    plan = plan_batch(jobs, sample=args.plan_sample, workers=args.workers)
+    for line in format_plan(plan, args.batch_name):
+        print(line)
+    for line in planner.report():
+        print(f"  {line}")
+
+def _run_batch(args, store):
+    from .manifest import ManifestWriter
+    from .merge import VALIDATION_CACHE
+    planner, jobs, options = (None, None, None)
+    if args.grid or args.preset:
+        planner, jobs, options = _batch_jobs(args)
+    selection = None
+    if options and options["strategy"] != "full":
+        from .grid import describe_selection
+        selection = describe_selection(options["strategy"], options["sample"], options["seed"])
+    shard = None
+    if args.shard:
+        from .batch import parse_shard
+        shard = parse_shard(args.shard)
+    # Rows are streamed to the manifest as builds complete
+    with ManifestWriter(args.batch_name, store=store, selection=selection, shard=shard) as manifest:
+        if jobs is not None:
+            from .batch import run_jobs
+            from .journal import BatchJournal
+            journal_name = args.batch_name
+            positions = None
+            enumerated = [0]
+            if shard:
+                import itertools
+                from .batch import shard_jobs
+
+                def counted(jobs):
+                    for job in jobs:
+                        enumerated[0] += 1
+                        yield job
+
+                # Keep this shard's jobs; positions (in the unsharded batch) go into the manifest
+                journal_name = f"{args.batch_name}__shard-{shard[0]}of{shard[1]}"
+                with_positions, only_jobs = itertools.tee(shard_jobs(counted(jobs), *shard))
+                positions = (position for position, _ in with_positions)
+                jobs = (job for _, job in only_jobs)
+            # Completed jobs are journaled; --resume reuses those whose inputs are unchanged
+            with BatchJournal(journal_name, resume=args.resume) as journal:
+                # Workers open their own store of the same kind; results come back in grid order
+                for res in run_jobs(
+                    jobs, store=store, workers=args.workers, chunk_size=args.chunk_size,
+                    store_options={"kind": args.store}, journal=journal
+                ):
+                    manifest.write(res, next(positions) if positions else None)
+            if shard:
+                # The shard stream is exhausted: every job of the batch was
+                # enumerated, so a merge can tell when rows at its end were lost
+                manifest.finish(enumerated[0])
+            for line in planner.report():
+                print(line)
+            if args.resume:
+                print(f"Resumed: {journal.reused} runs reused from journal, {journal.recorded} built")
+
+    VALIDATION_CACHE.summarize()
+
+    if manifest.count or shard:
+        print(f"Batch completed. Manifest: {manifest.path}")
+    else:
+        print("No runs generated.")
+
+def cmd_build_stream(args):
+    from .stream import run_stream
+    counts = run_stream(
+        sys.stdin, sys.stdout, workers=args.workers, read_ahead=args.read_ahead,
+        chunk_size=args.chunk_size, default_v=args.v, include_prompt=not args.hash_only
+    )
+    print(f"Streamed {counts['lines']} selections, {counts['errors']} errors", file=sys.stderr)
+    sys.exit(1 if counts["errors"] else 0)
+
+def cmd_serve(args):
+    from .server import serve
+    serve(host=args.host, port=args.port, socket_path=args.socket, store_kind=args.store,
+          builds_dir=args.builds_dir, quiet=args.quiet)
+
+def cmd_manifest(args):
+    from .manifest import merge_manifests
+    try:
+        info = merge_manifests(args.shards, args.out)
+    except ValueError as e:
+        print(f"Manifest merge failed: {e}")
+        sys.exit(1)
+    print(f"Merged {info['shards']} shards ({info['rows']} rows) -> {info['path']}")
+
+def cmd_store(args):
+    from .build_store import open_build_store
+    if args.action == "export":
+        store = open_build_store("sqlite", db_path=args.db)
+        try:
+            counts = store.export_loose(args.out)
+        finally:
+            store.close()
+        print(f"Exported {counts['prompts']} prompts and {counts['runs']} runs")
+    elif args.action == "query":
+        codes = {}
+        for pair in args.code or []:
+            k, v = pair.split("=")
+            codes[k] = v
+        store = open_build_store(args.backend, db_path=args.db)
+        try:
+            runs = store.query_runs(
+                codes=codes, min_rating=args.min_rating, prompt_version=args.v,
+                since=args.since, until=args.until, limit=args.limit
+            )
+        finally:
+            store.close()
+        for run in runs:
+            print(run["output_id"])
+
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(prog="avatar-db")
     subparsers = parser.add_subparsers(dest="command")
 
     # Lint
-    subparsers.add_parser("lint")
+    lint_parser = subparsers.add_parser("lint")
+    lint_parser.add_argument("--changed-only", action="store_true", help="Lint only components changed in git's working tree")
+    lint_parser.add_argument("--workers", type=int, help="Processes for validating uncached files (default: CPU count)")
+    lint_parser.add_argument("--no-cache", action="store_true", help="Ignore and do not update builds/lint-cache.json")
+    lint_parser.add_argument("--builds", nargs="?", const="", metavar="PATH",
+                             help="Lint built prompts instead of components: PATH, or builds/prompts and archive/builds__*/prompts")
+    lint_parser.add_argument("--report", help="JSON report for --builds (default: builds/lint-builds-report.json)")
+    lint_parser.add_argument("--examples", type=int, default=5, help="Examples shown per error class with --builds")
+    lint_parser.set_defaults(handler=cmd_lint)
+
+    # Compile
+    compile_parser = subparsers.add_parser("compile")
+    compile_parser.add_argument("--out", help="Bundle output path (default: builds/registry.bundle)")
+    compile_parser.set_defaults(handler=cmd_compile)
 
     # List
     list_parser = subparsers.add_parser("list")
     list_parser.add_argument("dim", help="Dimension to list (FA, BT, etc.)")
+    list_parser.set_defaults(handler=cmd_list)
 
     # Build
     build_parser = subparsers.add_parser("build")
@@ -31,6 +249,8 @@ def main():
     build_parser.add_argument("--r", required=True)
     build_parser.add_argument("--ph-region", help="Philippines regional modifier")
     build_parser.add_argument("--vn-region", help="Vietnam regional modifier")
+    build_parser.add_argument("--store", choices=["files", "sqlite"], help="Build output backend (default: AVATAR_DB_STORE or files)")
+    build_parser.set_defaults(handler=cmd_build)
 
     # Build Pack
     pack_parser = subparsers.add_parser("build-pack")
@@ -40,79 +260,86 @@ def main():
     pack_parser.add_argument("--r", required=True)
     pack_parser.add_argument("--ph-region", help="Philippines regional modifier")
     pack_parser.add_argument("--vn-region", help="Vietnam regional modifier")
+    pack_parser.add_argument("--store", choices=["files", "sqlite"], help="Build output backend (default: AVATAR_DB_STORE or files)")
+    pack_parser.set_defaults(handler=cmd_build_pack)
 
     # Batch
     batch_parser = subparsers.add_parser("batch")
-    batch_parser.add_argument("--grid")
-    batch_parser.add_argument("--preset")
+    batch_source = batch_parser.add_mutually_exclusive_group()
+    batch_source.add_argument("--grid", help='e.g. "FA=A,B BT=C ET=PH,VN HR=D SC=E ST=F"; optional PH_REGION=/VN_REGION= axes, "-" for none')
+    batch_source.add_argument("--preset", help="Preset name (registry/presets/<name>.json) or path to a preset JSON file")
     batch_parser.add_argument("--v", required=True)
-    batch_parser.add_argument("--runs", type=int, default=1)
+    batch_parser.add_argument("--runs", type=int, help="Runs per combination (default: the preset's, else 1)")
     batch_parser.add_argument("--batch_name", required=True)
+    batch_parser.add_argument("--strategy", choices=["full", "random", "stratified", "pairwise"],
+                              help="How combinations are chosen (default: the preset's, else full cartesian product)")
+    batch_parser.add_argument("--sample", type=int, help="Combinations to draw (random; minimum rows for stratified)")
+    batch_parser.add_argument("--seed", type=int, help="Seed for random/stratified/pairwise selection (default: the preset's, else 0)")
+    batch_parser.add_argument("--constraints", help="Grid constraint rules (default: registry/constraints.json)")
+    batch_parser.add_argument("--shard", help="Build only shard i/N of the batch (0 <= i < N, by canonical ID hash)")
+    batch_parser.add_argument("--plan", action="store_true", help="Dry run: count runs/prompts/files, estimate size and time; builds nothing under builds/")
+    batch_parser.add_argument("--plan-sample", type=int, default=20, help="Builds timed to calibrate --plan (default: 20)")
+    batch_parser.add_argument("--workers", type=int, default=1, help="Build jobs on N worker processes (default: 1, in-process)")
+    batch_parser.add_argument("--resume", action="store_true", help="Skip jobs already built with unchanged inputs (builds/journals/<batch_name>.jsonl)")
+    batch_parser.add_argument("--chunk-size", type=int, default=64, help="Jobs handed to a worker at a time (default: 64)")
+    batch_parser.add_argument("--store", choices=["files", "sqlite"], help="Build output backend (default: AVATAR_DB_STORE or files)")
+    batch_parser.set_defaults(handler=cmd_batch)
 
-    args = parser.parse_args()
+    # Streaming JSONL builds
+    stream_parser = subparsers.add_parser("build-stream", help="Build JSONL selections from stdin to JSONL results on stdout; writes nothing to builds/")
+    stream_parser.add_argument("--v", help="Version for lines without a \"v\"")
+    stream_parser.add_argument("--workers", type=int, default=1, help="Worker processes (default: 1, in-process)")
+    stream_parser.add_argument("--read-ahead", type=int, default=256, help="Most input lines in flight at once (default: 256)")
+    stream_parser.add_argument("--chunk-size", type=int, default=16, help="Lines handed to a worker at a time (default: 16)")
+    stream_parser.add_argument("--hash-only", action="store_true", help="Omit the merged prompt; keep its hash and rendered text")
+    stream_parser.set_defaults(handler=cmd_build_stream)
 
-    if args.command == "lint":
-        sys.exit(run_lint())
+    # Warm build daemon
+    serve_parser = subparsers.add_parser("serve", help="Keep caches warm and serve build/render/batch/lint over local HTTP")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    serve_parser.add_argument("--port", type=int, default=8765, help="Port (default: 8765; 0 picks a free one)")
+    serve_parser.add_argument("--socket", help="Serve on this Unix socket path instead of TCP")
+    serve_parser.add_argument("--store", choices=["files", "sqlite"], help="Build output backend (default: AVATAR_DB_STORE or files)")
+    serve_parser.add_argument("--builds-dir", help="Build output directory (default: builds/)")
+    serve_parser.add_argument("--quiet", action="store_true", help="Do not log each request")
+    serve_parser.set_defaults(handler=cmd_serve)
 
-    elif args.command == "list":
-        codes = get_all_codes()
-        if args.dim in codes:
-            for code in codes[args.dim]:
-                print(code)
-        else:
-            print(f"Unknown dimension: {args.dim}")
+    # Manifest tools
+    manifest_parser = subparsers.add_parser("manifest")
+    manifest_sub = manifest_parser.add_subparsers(dest="action", required=True)
+    merge_parser = manifest_sub.add_parser("merge", help="Combine shard manifests into the single-host manifest")
+    merge_parser.add_argument("shards", nargs="+", help="Shard manifests (..__shard-<i>of<N>.csv)")
+    merge_parser.add_argument("--out", help="Output path (default: shard name without the shard suffix)")
+    manifest_parser.set_defaults(handler=cmd_manifest)
 
-    elif args.command == "build":
-        res = build_prompt(
-            fa=args.FA, bt=args.BT, et=args.ET, hr=args.HR, 
-            sc=args.SC, st=args.ST, v=args.v, r=args.r,
-            ph_region=args.ph_region, vn_region=args.vn_region
-        )
-        print(f"Built: {res['run_id']}")
+    # Build store (SQLite backend)
+    store_parser = subparsers.add_parser("store")
+    store_sub = store_parser.add_subparsers(dest="action", required=True)
+    export_parser = store_sub.add_parser("export", help="Write the SQLite store back out as loose files")
+    export_parser.add_argument("--db", help="Database path (default: builds/avatar-db.sqlite)")
+    export_parser.add_argument("--out", help="Target builds directory (default: builds/)")
+    query_parser = store_sub.add_parser("query", help="List run IDs matching selection codes / rating")
+    query_parser.add_argument("--code", action="append", help="Selection code filter, e.g. HR=SLEEK_POWER_WOMAN (repeatable)")
+    query_parser.add_argument("--min-rating", type=int)
+    query_parser.add_argument("--v", help="Prompt version")
+    query_parser.add_argument("--since", help="ISO timestamp lower bound")
+    query_parser.add_argument("--until", help="ISO timestamp upper bound")
+    query_parser.add_argument("--limit", type=int)
+    query_parser.add_argument("--backend", choices=["files", "sqlite"], default="sqlite")
+    query_parser.add_argument("--db", help="Database path (default: builds/avatar-db.sqlite)")
+    store_parser.set_defaults(handler=cmd_store)
 
-    elif args.command == "build-pack":
-        sub_pack = load_json(get_pack_path("SUB", args.SUB))
-        sty_pack = load_json(get_pack_path("STY", args.STY))
-        res = build_prompt(
-            fa=sub_pack["FA"], bt=sub_pack["BT"], et=sub_pack["ET"], hr=sub_pack["HR"],
-            sc=sty_pack["SC"], st=sty_pack["ST"], v=args.v, r=args.r,
-            ph_region=args.ph_region, vn_region=args.vn_region
-        )
-        print(f"Built from pack: {res['run_id']}")
-
-    elif args.command == "batch":
-        results = []
-        if args.preset == "face_pass":
-            results = face_pass(v=args.v, runs=args.runs, batch_name=args.batch_name)
-        elif args.grid:
-            # Simple grid parser: FA=A,B BT=C,D ...
-            parts = args.grid.split()
-            grid_params = {}
-            for p in parts:
-                k, v_list = p.split("=")
-                grid_params[k] = v_list.split(",")
-            
-            # Cartesian product
-            import itertools
-            keys = ["FA", "BT", "ET", "HR", "SC", "ST"]
-            # Ensure all keys exist in grid_params or use default? 
-            # Requirements example shows all keys provided in grid.
-            values = [grid_params[k] for k in keys]
-            for combo in itertools.product(*values):
-                fa, bt, et, hr, sc, st = combo
-                for r_idx in range(1, args.runs + 1):
-                    r_str = f"{r_idx:02d}"
-                    res = build_prompt(fa, bt, et, hr, sc, st, args.v, r_str)
-                    results.append(res)
-        
-        if results:
-            m_path = write_manifest(args.batch_name, results)
-            print(f"Batch completed. Manifest: {m_path}")
-        else:
-            print("No runs generated.")
+    return parser
 
-    else:
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+
+    handler = getattr(args, "handler", None)
+    if handler is None:
         parser.print_help()
+        return
+    handler(args)
 
 if __name__ == "__main__":
     main()
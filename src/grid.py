@@ -0,0 +1,162 @@
+"""
+Grid expansion strategies for `avatar-db batch --grid`.
+
+Every strategy is a generator over code combinations (tuples in key
+order) and never materializes the full cartesian product:
+
+- full:       every combination, in product order
+- random:     K distinct combinations drawn uniformly (seeded), in product order
+- stratified: every code of every dimension appears, in balanced proportions
+              (max code count rows, or K if larger)
+- pairwise:   a covering array; every pair of codes from two different
+              dimensions appears in at least one combination
+
+The output depends only on the grid, the strategy, K and the seed, so a
+selection can be reproduced from what the manifest records.
+"""
+
+import random
+import itertools
+from typing import Iterator, Optional, Sequence, Tuple
+
+STRATEGIES = ["full", "random", "stratified", "pairwise"]
+
+# Candidate rows tried per pairwise row (AETG); more is smaller but slower
+PAIRWISE_CANDIDATES = 20
+
+Combo = Tuple[str, ...]
+
+def grid_size(values: Sequence[Sequence[str]]) -> int:
+    size = 1
+    for codes in values:
+        size *= len(codes)
+    return size
+
+def _decode(index: int, values: Sequence[Sequence[str]]) -> Combo:
+    """Product-order index -> combination (mixed radix, last dimension fastest)."""
+    combo = []
+    for codes in reversed(values):
+        index, digit = divmod(index, len(codes))
+        combo.append(codes[digit])
+    return tuple(reversed(combo))
+
+def full(values: Sequence[Sequence[str]]) -> Iterator[Combo]:
+    return itertools.product(*values)
+
+def random_sample(values: Sequence[Sequence[str]], k: int, seed: int = 0) -> Iterator[Combo]:
+    total = grid_size(values)
+    rng = random.Random(seed)
+    # Floyd's algorithm: k distinct indices in O(k), even past sys.maxsize
+    # where random.sample(range(total)) overflows
+    indices = set()
+    for top in range(total - min(k, total), total):
+        index = rng.randrange(top + 1)
+        indices.add(top if index in indices else index)
+    # Product order keeps shared merge prefixes adjacent
+    for index in sorted(indices):
+        yield _decode(index, values)
+
+def stratified(values: Sequence[Sequence[str]], k: Optional[int] = None, seed: int = 0) -> Iterator[Combo]:
+    rng = random.Random(seed)
+    rows = max(max(len(codes) for codes in values), k or 0)
+    columns = []
+    for codes in values:
+        # Each code fills rows/len(codes) rows (+1 for the remainder), shuffled
+        column = [codes[i % len(codes)] for i in range(rows)]
+        rng.shuffle(column)
+        columns.append(column)
+    seen = set()
+    for combo in zip(*columns):
+        if combo not in seen:
+            seen.add(combo)
+            yield combo
+
+def pairwise(values: Sequence[Sequence[str]], seed: int = 0) -> Iterator[Combo]:
+    """
+    Greedy all-pairs covering array (AETG): each row is the best of a few
+    seeded candidates, built by picking per dimension the code that covers
+    the most still-uncovered pairs.
+    """
+    rng = random.Random(seed)
+    n = len(values)
+    if n < 2:
+        for combo in itertools.product(*values):
+            yield combo
+        return
+
+    # Uncovered pairs in a list (for seeded choice) with each pair's
+    # position (for O(1) removal); built in sorted order, so the choice
+    # depends only on the seed
+    pool = [
+        (a, i, b, j)
+        for a, b in itertools.combinations(range(n), 2)
+        for i in range(len(values[a]))
+        for j in range(len(values[b]))
+    ]
+    uncovered = {pair: position for position, pair in enumerate(pool)}
+
+    def cover(pair):
+        position = uncovered.pop(pair, None)
+        if position is None:
+            return
+        last = pool.pop()
+        if last != pair:
+            pool[position] = last
+            uncovered[last] = position
+
+    def gain(row, dim, choice):
+        covered = 0
+        for other, value in row.items():
+            pair = (dim, choice, other, value) if dim < other else (other, value, dim, choice)
+            if pair in uncovered:
+                covered += 1
+        return covered
+
+    while uncovered:
+        best_row, best_gain = None, -1
+        for _ in range(PAIRWISE_CANDIDATES):
+            # Start each candidate from an uncovered pair so every row makes progress
+            a, i, b, j = rng.choice(pool)
+            row = {a: i, b: j}
+            rest = [d for d in range(n) if d not in row]
+            rng.shuffle(rest)
+            for dim in rest:
+                scores = [gain(row, dim, choice) for choice in range(len(values[dim]))]
+                top = max(scores)
+                row[dim] = rng.choice([c for c, s in enumerate(scores) if s == top])
+            row_gain = sum(
+                1 for x, y in itertools.combinations(range(n), 2)
+                if (x, row[x], y, row[y]) in uncovered
+            )
+            if row_gain > best_gain:
+                best_row, best_gain = row, row_gain
+        for x, y in itertools.combinations(range(n), 2):
+            cover((x, best_row[x], y, best_row[y]))
+        yield tuple(values[d][best_row[d]] for d in range(n))
+
+def expand_grid(
+    values: Sequence[Sequence[str]],
+    strategy: str = "full",
+    sample: Optional[int] = None,
+    seed: int = 0
+) -> Iterator[Combo]:
+    if strategy == "full":
+        return full(values)
+    if strategy == "random":
+        if not sample:
+            raise ValueError("The random strategy needs a sample size (--sample K)")
+        return random_sample(values, sample, seed)
+    if strategy == "stratified":
+        return stratified(values, sample, seed)
+    if strategy == "pairwise":
+        return pairwise(values, seed)
+    raise ValueError(f"Invalid grid strategy: {strategy}")
+
+def describe_selection(strategy: str, sample: Optional[int] = None, seed: int = 0) -> str:
+    """Manifest record of a selection, e.g. "random k=500 seed=7"."""
+    parts = [strategy]
+    if sample:
+        parts.append(f"k={sample}")
+    if strategy != "full":
+        parts.append(f"seed={seed}")
+    return " ".join(parts)
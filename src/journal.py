@@ -0,0 +1,97 @@
+"""
+Checkpoint journal for resumable batches.
+
+Every completed job is appended to builds/journals/<batch_name>.jsonl as
+one JSON line: the job's index in the batch, the job itself, the hash of
+its inputs (see builder.inputs_fingerprint) and its build result. A resumed
+batch reuses a journaled result only when index, job and input hash all
+match, so anything whose components changed since is rebuilt.
+"""
+
+import os
+import json
+from typing import Dict, Any, Optional, Sequence
+
+def journal_path_for(batch_name: str) -> str:
+    from .registry import BASE_DIR
+    return os.path.join(BASE_DIR, "builds", "journals", f"{batch_name}.jsonl")
+
+class BatchJournal:
+    """
+    Append-only record of completed jobs.
+
+    With resume=False an existing journal is discarded on open; with
+    resume=True its entries are loaded (the last entry per index wins) and
+    new entries are appended. Lines are flushed as written and fsynced
+    every fsync_every entries; a torn last line from a crash is truncated
+    on resume.
+    """
+
+    def __init__(self, batch_name: str, path: Optional[str] = None, resume: bool = False, fsync_every: int = 100):
+        self.batch_name = batch_name
+        self.path = path or journal_path_for(batch_name)
+        self.resume = resume
+        self.fsync_every = fsync_every
+        self._entries: Dict[int, Dict[str, Any]] = {}
+        self._file = None
+        self.recorded = 0
+        self.reused = 0
+
+    def __enter__(self) -> "BatchJournal":
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def open(self):
+        if self.resume:
+            self._load()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path, 'a' if self.resume else 'w')
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        complete = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                complete += len(line)
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self._entries[entry["index"]] = entry
+        # Cut a torn last line so the next entry starts on a fresh line
+        if complete < os.path.getsize(self.path):
+            os.truncate(self.path, complete)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, index: int, job: Sequence[Any], inputs: str) -> Optional[Dict[str, Any]]:
+        """Journaled result for this job, or None if it must be (re)built."""
+        entry = self._entries.get(index)
+        if entry is None or entry["job"] != list(job) or entry["inputs"] != inputs:
+            return None
+        self.reused += 1
+        return entry["result"]
+
+    def record(self, index: int, job: Sequence[Any], inputs: str, result: Dict[str, Any]):
+        entry = {"index": index, "job": list(job), "inputs": inputs, "result": result}
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        self.recorded += 1
+        if self.fsync_every and self.recorded % self.fsync_every == 0:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is None:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
@@ -1,9 +1,17 @@
 import os
 import json
-import sys
-from typing import Dict, Any, List
-from .utils import load_json
-from .registry import get_all_codes, get_component_path
+import hashlib
+import threading
+import subprocess
+from typing import Dict, Any, List, Optional, Set, Tuple
+from .utils import json_fingerprint
+from .registry import get_registry, short_dim, BASE_DIR
+from .rule_scan import KeywordScanner
+
+# Bump when the rule engine's logic changes; rule table edits are
+# picked up automatically (see rules_fingerprint)
+LINT_RULES_VERSION = 2
+LINT_CACHE_PATH = os.path.join(BASE_DIR, "builds", "lint-cache.json")
 
 ALLOWED_TOP_LEVEL_KEYS = {
     "setting", "viewing_angle", "subject", "lighting", "skin", "clothing", 
@@ -17,84 +25,445 @@ BOUNDARY_RULES = {
     "PF": ["posture_anchor", "framing_anchor", "subject", "pose", "composition", "viewing_angle", "setting"],
     "PH_REGION": ["subject", "skin"],
     "VN_REGION": ["subject", "skin"],
+    "SUBJECT_TYPE": ["subject"],
+    "SKIN": ["skin"],
     "FA": ["subject"],
     "BT": ["subject"],
     "HR": ["subject"],
     "ET": ["subject", "skin"],
     "SC": ["setting", "lighting", "clothing", "pose", "surrounding", "overall_mood", "composition", "aspect_ratio", "image_quality", "subject"],
     "ST": ["setting", "lighting", "clothing", "pose", "surrounding", "overall_mood", "composition", "aspect_ratio", "image_quality", "subject"],
+    "POSE": ["pose"],
     "NB": ["negative_prompt"]
 }
 
+STYLE_DIMS = ["SC", "ST"]
 PROHIBITED_STYLE_SUBKEYS = ["facial_features", "face_anchor", "do_not_change"]
 
-def validate_component(dim: str, code: str, content: Dict[str, Any]) -> List[str]:
-    errors = []
-    # Top level keys
-    for key in content.keys():
-        if key not in ALLOWED_TOP_LEVEL_KEYS:
-            errors.append(f"[{dim}-{code}] Invalid top-level key: {key}")
-
-    # Boundary rules
-    allowed_keys = BOUNDARY_RULES.get(dim, [])
-    for key in content.keys():
-        if key not in allowed_keys:
-            errors.append(f"[{dim}-{code}] Dimension {dim} not allowed to write to top-level key: {key}")
-
-    # Style boundary check
-    if dim in ["SC", "ST"]:
-        if "subject" in content:
+REQUIRED_KEYS = {
+    "FA": ["subject.face_anchor", "subject.do_not_change"],
+    "NB": ["negative_prompt"]
+}
+
+ETHNICITY_KEYWORDS = [
+    "Filipina", "Filipino", "Vietnamese", "Korean", "Japanese", "Chinese", "Thai",
+    "Asian", "Caucasian", "Black", "Hispanic", "Latina", "Latino"
+]
+
+# Keywords banned anywhere in a dimension's components (keys and string values)
+KEYWORD_BANS = {
+    "FA": ETHNICITY_KEYWORDS
+}
+
+# Keywords banned in a dimension's registry metadata
+METADATA_KEYWORD_BANS = {
+    "FA": ETHNICITY_KEYWORDS
+}
+
+# Built prompts: the merged tree of every dimension plus the builder's
+# metadata, and the APPEARANCE / body-components sections it carries through
+PROMPT_TOP_LEVEL_KEYS = ALLOWED_TOP_LEVEL_KEYS | {"appearance", "body_components", "metadata"}
+
+# Every build merges an FA and an NB, so their required keys must survive
+PROMPT_REQUIRED_KEYS = [key for dim in ["FA", "NB"] for key in REQUIRED_KEYS[dim]]
+
+# Keywords banned under a path of the built prompt (FA-owned fields)
+PROMPT_KEYWORD_BANS = {
+    "subject.face_anchor": ETHNICITY_KEYWORDS
+}
+
+_MISSING = object()
+
+def _get_path(content: Any, dotted: str, default: Any = None) -> Any:
+    node = content
+    for part in dotted.split("."):
+        if not isinstance(node, dict) or part not in node:
+            return default
+        node = node[part]
+    return node
+
+def _has_path(content: Any, dotted: str) -> bool:
+    return _get_path(content, dotted, _MISSING) is not _MISSING
+
+class CompiledRules:
+    """
+    The rule tables compiled once per process: allowed-key sets per dimension
+    and one KeywordScanner per banned keyword list, so validating a component
+    is a pass over its top-level keys plus one scan of its strings.
+    """
+
+    def __init__(self):
+        self.allowed = {dim: set(keys) for dim, keys in BOUNDARY_RULES.items()}
+        self.style_dims = set(STYLE_DIMS)
+        self.prohibited_style = set(PROHIBITED_STYLE_SUBKEYS)
+        scanners: Dict[int, KeywordScanner] = {}
+        def scanner(keywords):
+            # Dimensions sharing a keyword list share its compiled pattern
+            return scanners.setdefault(id(keywords), KeywordScanner(keywords))
+        self.keyword_bans = {dim: scanner(kws) for dim, kws in KEYWORD_BANS.items()}
+        self.metadata_bans = {dim: scanner(kws) for dim, kws in METADATA_KEYWORD_BANS.items()}
+        self.prompt_bans = {path: scanner(kws) for path, kws in PROMPT_KEYWORD_BANS.items()}
+
+    def validate(self, dim: str, code: str, content: Dict[str, Any]) -> List[str]:
+        errors = []
+        # Top level keys
+        for key in content.keys():
+            if key not in ALLOWED_TOP_LEVEL_KEYS:
+                errors.append(f"[{dim}-{code}] Invalid top-level key: {key}")
+
+        # Boundary rules
+        allowed_keys = self.allowed.get(dim, ())
+        for key in content.keys():
+            if key not in allowed_keys:
+                errors.append(f"[{dim}-{code}] Dimension {dim} not allowed to write to top-level key: {key}")
+
+        # Style boundary check
+        if dim in self.style_dims and isinstance(content.get("subject"), dict):
             for subkey in content["subject"].keys():
-                if subkey in PROHIBITED_STYLE_SUBKEYS:
+                if subkey in self.prohibited_style:
                     errors.append(f"[{dim}-{code}] Style dimension {dim} prohibited from writing to subject.{subkey}")
 
-    # Required keys
-    if dim == "FA":
-        subject = content.get("subject", {})
-        if "face_anchor" not in subject:
-            errors.append(f"[{dim}-{code}] Missing required key: subject.face_anchor")
-        if "do_not_change" not in subject:
-            errors.append(f"[{dim}-{code}] Missing required key: subject.do_not_change")
-    
-    if dim == "NB":
-        if "negative_prompt" not in content:
-            errors.append(f"[{dim}-{code}] Missing required key: negative_prompt")
-
-    # Ethnicity neutral check for FA
-    if dim == "FA":
-        ethnicity_keywords = ["Filipina", "Filipino", "Vietnamese", "Korean", "Japanese", "Chinese", "Thai", "Asian", "Caucasian", "Black", "Hispanic", "Latina", "Latino"]
-        content_str = json.dumps(content).lower()
-        for kw in ethnicity_keywords:
-            if kw.lower() in content_str:
-                errors.append(f"[{dim}-{code}] FA module must be ethnicity-neutral. Found term: {kw}")
-
-    return errors
-
-def run_lint():
-    codes = get_all_codes()
-    all_errors = []
+        # Required keys
+        for dotted in REQUIRED_KEYS.get(dim, ()):
+            if not _has_path(content, dotted):
+                errors.append(f"[{dim}-{code}] Missing required key: {dotted}")
+
+        # Keyword bans (ethnicity neutrality for FA)
+        scanner = self.keyword_bans.get(dim)
+        if scanner is not None:
+            hits = scanner.scan(content)
+            for kw in scanner.keywords:
+                if kw in hits:
+                    errors.append(f"[{dim}-{code}] {dim} module must be ethnicity-neutral. Found term: {kw} (at {hits[kw]})")
+
+        return errors
+
+    def metadata_errors(self, dim: str, code: str, meta: Any) -> List[str]:
+        scanner = self.metadata_bans.get(dim)
+        if scanner is None:
+            return []
+        hits = scanner.scan(meta)
+        return [
+            f"Registry ERROR [{dim}-{code}]: Metadata must be ethnicity-neutral. Found term: {kw} (at {hits[kw]})"
+            for kw in scanner.keywords if kw in hits
+        ]
+
+    def validate_prompt(self, content: Any) -> List[Tuple[str, str]]:
+        """(error class, message) pairs for one built prompt."""
+        if not isinstance(content, dict):
+            return [("not_an_object", f"Prompt is a JSON {type(content).__name__}, not an object")]
+        errors = []
+        for key in content.keys():
+            if key not in PROMPT_TOP_LEVEL_KEYS:
+                errors.append(("invalid_top_level_key", f"Invalid top-level key: {key}"))
+        for dotted in PROMPT_REQUIRED_KEYS:
+            if not _has_path(content, dotted):
+                errors.append(("missing_required_key", f"Missing required key: {dotted}"))
+        rendered = _get_path(content, "metadata.rendered_prompt")
+        if not isinstance(rendered, str) or not rendered.strip():
+            errors.append(("missing_rendered_prompt", "Missing or empty metadata.rendered_prompt"))
+        for dotted, scanner in self.prompt_bans.items():
+            hits = scanner.scan(_get_path(content, dotted), path=dotted)
+            for kw in scanner.keywords:
+                if kw in hits:
+                    errors.append(("ethnicity_term", f"{dotted} must be ethnicity-neutral. Found term: {kw} (at {hits[kw]})"))
+        return errors
+
+_compiled: Optional[CompiledRules] = None
+
+def compiled_rules() -> CompiledRules:
+    global _compiled
+    if _compiled is None:
+        _compiled = CompiledRules()
+    return _compiled
+
+def validate_component(dim: str, code: str, content: Dict[str, Any]) -> List[str]:
+    return compiled_rules().validate(dim, code, content)
+
+class ValidationCache:
+    """
+    Memoizes validate_component per (dimension, content fingerprint).
+
+    Each distinct component is validated once per process. Warnings are
+    de-duplicated: warn() prints the first occurrence and counts repeats,
+    and summarize() reports how often each one recurred. A pool worker
+    sets echo = False and hands its counts to the parent with drain();
+    the parent adds them with absorb(), so a parallel batch prints and
+    counts warnings like a serial one.
+    """
+
+    def __init__(self):
+        self._results: Dict[Tuple[str, str], List[str]] = {}
+        self._occurrences: Dict[Tuple[str, str], int] = {}
+        self._messages: Dict[Tuple[str, str], List[str]] = {}
+        self._lock = threading.Lock()
+        self.echo = True
+        self.hits = 0
+        self.misses = 0
+
+    def validate(self, dim: str, content: Dict[str, Any], fingerprint: Optional[str] = None) -> List[str]:
+        key = (dim, fingerprint or json_fingerprint(content))
+        with self._lock:
+            errors = self._results.get(key)
+            if errors is not None:
+                self.hits += 1
+                return errors
+            self.misses += 1
+        errors = validate_component(dim, "merge-check", content)
+        with self._lock:
+            self._results[key] = errors
+        return errors
+
+    def warn(self, dim: str, errors: List[str], fingerprint: str, count: int = 1):
+        """Prints a boundary warning the first time it is seen for this component."""
+        key = (dim, fingerprint)
+        with self._lock:
+            seen = self._occurrences.get(key, 0)
+            self._occurrences[key] = seen + count
+            self._messages.setdefault(key, errors)
+        if seen == 0 and self.echo:
+            print(f"Warning: Boundary violation during merge for {dim}: {errors}")
+
+    def drain(self) -> List[Tuple[str, str, List[str], int]]:
+        """(dim, fingerprint, errors, count) per warning since the last drain; resets the counts."""
+        with self._lock:
+            warnings = [(dim, fp, self._messages[(dim, fp)], n) for (dim, fp), n in self._occurrences.items()]
+            self._occurrences.clear()
+        return warnings
+
+    def absorb(self, warnings: List[Tuple[str, str, List[str], int]]):
+        """Adds warnings drained from another process (see drain)."""
+        for dim, fp, errors, count in warnings:
+            self.warn(dim, errors, fp, count)
+
+    def summarize(self):
+        """Prints one line per warning that recurred, with its occurrence count."""
+        with self._lock:
+            repeated = [(key, n) for key, n in self._occurrences.items() if n > 1]
+        for (dim, fp), n in repeated:
+            print(f"Warning: Boundary violation for {dim} (component {fp[:8]}) occurred {n} times")
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+            self._occurrences.clear()
+            self._messages.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._results),
+                "warnings": sum(self._occurrences.values()),
+                "distinct_warnings": len(self._occurrences)
+            }
+
+def rules_fingerprint() -> str:
+    """Identifies the lint rules; cached results from other rules are discarded."""
+    return json_fingerprint([
+        LINT_RULES_VERSION, sorted(ALLOWED_TOP_LEVEL_KEYS), BOUNDARY_RULES, STYLE_DIMS,
+        PROHIBITED_STYLE_SUBKEYS, REQUIRED_KEYS, KEYWORD_BANS, METADATA_KEYWORD_BANS,
+        sorted(PROMPT_TOP_LEVEL_KEYS), PROMPT_REQUIRED_KEYS, PROMPT_KEYWORD_BANS
+    ])
+
+def _lint_file(task: Tuple[str, str, str, str]) -> Tuple[str, Optional[str], List[str]]:
+    """Validates one component file: (path, content sha1, errors)."""
+    path, dim, code, label = task
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha1(data).hexdigest()
+        return path, digest, validate_component(dim, code, json.loads(data))
+    except Exception as e:
+        return path, None, [f"Failed to load {label}: {e}"]
+
+class LintCache:
+    """
+    Per-file lint results keyed on path + content hash + rules fingerprint.
+
+    An entry whose file still has the recorded mtime and size is reused
+    without reading the file; otherwise the file is re-hashed and the entry
+    reused only if the content is unchanged. Results of other rules are
+    dropped on load.
+    """
+
+    def __init__(self, path: str = LINT_CACHE_PATH):
+        self.path = path
+        self.rules = rules_fingerprint()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                if data.get("rules") == self.rules:
+                    self.entries = data.get("entries", {})
+            except (OSError, ValueError):
+                self._dirty = True
+
+    def lookup(self, path: str, dim: str, code: str) -> Optional[List[str]]:
+        entry = self.entries.get(path)
+        if entry is None or entry["dim"] != dim or entry["code"] != code:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if (st.st_mtime_ns, st.st_size) != tuple(entry["stat"]):
+            with open(path, 'rb') as f:
+                if hashlib.sha1(f.read()).hexdigest() != entry["hash"]:
+                    return None
+            # Touched but unchanged: refresh the stat signature
+            entry["stat"] = [st.st_mtime_ns, st.st_size]
+            self._dirty = True
+        return entry["errors"]
+
+    def store(self, path: str, dim: str, code: str, digest: str, errors: List[str]):
+        st = os.stat(path)
+        self.entries[path] = {
+            "dim": dim, "code": code, "hash": digest,
+            "stat": [st.st_mtime_ns, st.st_size], "errors": errors
+        }
+        self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Unique per thread too: the daemon can save from concurrent requests
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"rules": self.rules, "entries": self.entries}, f)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+def git_changed_paths(repo_dir: str = BASE_DIR) -> Set[str]:
+    """Absolute paths modified, added or untracked in git's working tree."""
+    out = subprocess.run(
+        ["git", "status", "--porcelain", "--untracked-files=all", "--", "components", "registry"],
+        cwd=repo_dir, capture_output=True, text=True, check=True
+    ).stdout
+    changed = set()
+    for line in out.splitlines():
+        # "XY path" or "XY old -> new" for renames
+        name = line[3:].split(" -> ")[-1].strip('"')
+        changed.add(os.path.abspath(os.path.join(repo_dir, name)))
+    return changed
+
+# Below this many files to validate, a process pool costs more than it saves
+PARALLEL_THRESHOLD = 64
+
+def lint_components(
+    tasks: List[Tuple[str, str, str, str]],
+    cache: Optional[LintCache] = None,
+    workers: Optional[int] = None
+) -> Dict[str, List[str]]:
+    """
+    Errors per component path for (path, dim, code, label) tasks, reusing cached
+    results and validating the rest (in a process pool when there are many).
+    """
+    results: Dict[str, List[str]] = {}
+    todo = []
+    for task in tasks:
+        errors = cache.lookup(*task[:3]) if cache is not None else None
+        if errors is None:
+            todo.append(task)
+        else:
+            results[task[0]] = errors
+    if cache is not None:
+        cache.hits += len(results)
+        cache.misses += len(todo)
+
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    if workers > 1 and len(todo) >= PARALLEL_THRESHOLD:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            linted = list(pool.map(_lint_file, todo, chunksize=max(1, len(todo) // (workers * 4))))
+    else:
+        linted = [_lint_file(task) for task in todo]
+
+    for (path, dim, code, _), (_, digest, errors) in zip(todo, linted):
+        results[path] = errors
+        if cache is not None and digest is not None:
+            cache.store(path, dim, code, digest, errors)
+    return results
+
+def lint_errors(
+    changed_only: bool = False,
+    workers: Optional[int] = None,
+    use_cache: bool = True,
+    registry=None,
+    cache_path: str = LINT_CACHE_PATH
+) -> Tuple[List[str], Optional[int]]:
+    """
+    Registry and component lint errors, plus the number of components linted
+    when only git changes were (None when everything was in scope).
+    """
+    registry = registry or get_registry()
+    all_errors = [f"Registry ERROR {err}" for err in registry.check()]
+
+    changed = None
+    if changed_only:
+        try:
+            changed = git_changed_paths()
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"Warning: --changed-only needs git ({e}); linting everything")
+        else:
+            from .registry import REGISTRY_PATH
+            if os.path.abspath(REGISTRY_PATH) in changed:
+                # Registry metadata changed: everything is in scope
+                changed = None
     
+    tasks = []
+    entries = []
+    for reg_dim, code, meta in registry.items():
+        # Boundary rules are keyed by short dimension codes (FACE -> FA)
+        dim = short_dim(reg_dim)
+        try:
+            path = registry.path(reg_dim, code)
+        except ValueError:
+            path = None
+        if changed is not None and (path is None or os.path.abspath(path) not in changed):
+            continue
+        # Missing folders and files were already reported by registry.check()
+        if path is not None and not os.path.exists(path):
+            path = None
+        entries.append((dim, code, meta, path))
+        if path is not None:
+            tasks.append((path, dim, code, f"{reg_dim}-{code}"))
+
+    cache = LintCache(cache_path) if use_cache else None
+    results = lint_components(tasks, cache, workers)
+    if cache is not None:
+        cache.save()
+
     # Lint registry and components
-    for dim, code_map in codes.items():
-        for code, meta in code_map.items():
-            # Check registry metadata for FA
-            if dim == "FA":
-                ethnicity_keywords = ["Filipina", "Filipino", "Vietnamese", "Korean", "Japanese", "Chinese", "Thai", "Asian", "Caucasian", "Black", "Hispanic", "Latina", "Latino"]
-                meta_str = json.dumps(meta).lower()
-                for kw in ethnicity_keywords:
-                    if kw.lower() in meta_str:
-                        all_errors.append(f"Registry ERROR [{dim}-{code}]: Metadata must be ethnicity-neutral. Found term: {kw}")
-
-            path = get_component_path(dim, code)
-            try:
-                content = load_json(path)
-                errors = validate_component(dim, code, content)
-                all_errors.extend(errors)
-            except Exception as e:
-                all_errors.append(f"Failed to load {path}: {e}")
+    rules = compiled_rules()
+    for dim, code, meta, path in entries:
+        # Check registry metadata (ethnicity neutrality for FA)
+        all_errors.extend(rules.metadata_errors(dim, code, meta))
+        if path is not None:
+            all_errors.extend(results[path])
 
     # Lint bundles/packs? (Optional based on requirements, but let's stick to core)
     
+    return all_errors, (len(tasks) if changed is not None else None)
+
+def run_lint(
+    changed_only: bool = False,
+    workers: Optional[int] = None,
+    use_cache: bool = True,
+    registry=None,
+    cache_path: str = LINT_CACHE_PATH
+):
+    all_errors, changed_count = lint_errors(changed_only, workers, use_cache, registry, cache_path)
+    if changed_count is not None:
+        print(f"Linted {changed_count} changed components")
     if all_errors:
         for err in all_errors:
             print(f"ERROR: {err}")
@@ -1,44 +1,263 @@
 import csv
 import os
+import re
+import heapq
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 
-def write_manifest(batch_name: str, build_results: List[Dict[str, Any]]):
+# Columns: batch_id, output_id, run_id, prompt_version, FA, BT, ET, HR, SC, ST, prompt_json_path, run_json_path, image_path, rating, notes
+HEADERS = [
+    "batch_id", "output_id", "run_id", "prompt_version",
+    "FA", "BT", "ET", "HR", "SC", "ST",
+    "prompt_json_path", "run_json_path", "image_path", "rating", "notes"
+]
+
+# Shard manifests: <batch>__<date>__shard-<i>of<N>.csv. The date is when
+# each shard started, so shards of one batch may differ on it
+SHARD_PATTERN = re.compile(
+    r"^(?P<batch>.+?)(?:__(?P<date>\d{4}-\d{2}-\d{2}))?__shard-(?P<index>\d+)of(?P<count>\d+)\.csv$"
+)
+
+def manifest_path_for(batch_name: str, shard: Optional[Tuple[int, int]] = None) -> str:
     from .registry import BASE_DIR
     date_str = datetime.now().strftime("%Y-%m-%d")
     manifest_filename = f"{batch_name}__{date_str}.csv"
-    manifest_path = os.path.join(BASE_DIR, "builds", "manifests", manifest_filename)
-    
-    # Columns: batch_id, output_id, run_id, prompt_version, FA, BT, ET, HR, SC, ST, prompt_json_path, run_json_path, image_path, rating, notes
-    headers = [
-        "batch_id", "output_id", "run_id", "prompt_version", 
-        "FA", "BT", "ET", "HR", "SC", "ST", 
-        "prompt_json_path", "run_json_path", "image_path", "rating", "notes"
-    ]
-    
-    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
-    
-    with open(manifest_path, 'w', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=headers)
-        writer.writeheader()
+    if shard is not None:
+        manifest_filename = f"{batch_name}__{date_str}__shard-{shard[0]}of{shard[1]}.csv"
+    return os.path.join(BASE_DIR, "builds", "manifests", manifest_filename)
+
+def manifest_row(batch_name: str, res: Dict[str, Any]) -> Dict[str, Any]:
+    meta = res["meta"]
+    codes = meta["selection_codes"]
+    return {
+        "batch_id": batch_name,
+        "output_id": res["run_id"],
+        "run_id": meta["run_id"],
+        "prompt_version": meta["prompt_version"],
+        "FA": codes["FA"],
+        "BT": codes["BT"],
+        "ET": codes["ET"],
+        "HR": codes["HR"],
+        "SC": codes["SC"],
+        "ST": codes["ST"],
+        "prompt_json_path": res["prompt_path"],
+        "run_json_path": res["run_path"],
+        "image_path": meta["image_path"],
+        "rating": meta["rating"],
+        "notes": meta["notes"]
+    }
+
+class ManifestWriter:
+    """
+    Streams manifest rows to disk as builds complete.
+
+    Every row is flushed to the OS as it is written and the file is fsynced
+    every fsync_every rows (and on close), so a crashed batch still leaves
+    a usable manifest of everything built so far. Only the rows since the
+    last sync are held in memory; they are handed to the store's
+    put_manifest (e.g. SQLite) and committed at each sync point, so the
+    writer never holds the store's write lock while worker processes are
+    writing runs.
+
+    The file is created on the first row, so an empty batch writes nothing.
+    When selection is given (see grid.describe_selection), every row gets a
+    trailing "selection" column recording how the combinations were chosen.
+
+    A shard writer (shard=(i, N)) names its file ...__shard-<i>of<N>.csv,
+    adds a trailing "position" column (the job's index in the unsharded
+    batch, see merge_manifests) and creates the file up front, so an empty
+    shard still proves it ran. It also has a "batch_rows" column, filled in
+    by finish() with the row count of the unsharded batch, which lets a
+    merge notice rows missing at the end of the batch (or a shard that
+    never finished).
+
+        with ManifestWriter("face_pass_v01", store=store) as manifest:
+            for res in results:
+                manifest.write(res)
+    """
+
+    def __init__(
+        self, batch_name: str, store=None, path: Optional[str] = None,
+        fsync_every: int = 100, selection: Optional[str] = None,
+        shard: Optional[Tuple[int, int]] = None
+    ):
+        self.batch_name = batch_name
+        self.store = store
+        self.selection = selection
+        self.shard = shard
+        self.headers = (
+            HEADERS + (["selection"] if selection else []) + (["position", "batch_rows"] if shard else [])
+        )
+        self.path = path or manifest_path_for(batch_name, shard)
+        self.fsync_every = fsync_every
+        self.count = 0
+        self._file = None
+        self._writer = None
+        self._pending: List[Dict[str, Any]] = []
+        self._synced = 0
+
+    def __enter__(self) -> "ManifestWriter":
+        if self.shard is not None:
+            self._open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path, 'w', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=self.headers)
+        self._writer.writeheader()
+
+    def write(self, res: Dict[str, Any], position: Optional[int] = None) -> Dict[str, Any]:
+        """Appends the manifest row for one build result."""
+        if self._file is None:
+            self._open()
+        row = manifest_row(self.batch_name, res)
+        if self.selection:
+            row["selection"] = self.selection
+        if self.shard is not None:
+            row["position"] = position
+        self._writer.writerow(row)
+        self._file.flush()
+        self.count += 1
+        if self.store is not None:
+            self._pending.append(row)
+        if self.fsync_every and self.count % self.fsync_every == 0:
+            self.sync()
+        return row
+
+    def sync(self):
+        """fsyncs the CSV and hands rows written since the last sync to the store."""
+        if self._file is None:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        # Backends that index manifests (e.g. SQLite) get the rows as well
+        if self.store is not None and self._pending:
+            self.store.put_manifest(self.batch_name, self.path, self._pending, start=self._synced)
+            # Commit even inside an outer store.batch(): an open SQLite
+            # transaction here would lock out the batch workers
+            self.store.flush()
+            self._synced += len(self._pending)
+            self._pending = []
+
+    def close(self):
+        if self._file is None:
+            return
+        self.sync()
+        self._file.close()
+        self._file = None
+
+    def finish(self, batch_rows: int):
+        """
+        Closes a shard manifest and records batch_rows, the row count of the
+        unsharded batch (known only once its jobs are all enumerated), in
+        every row.
+        """
+        self.close()
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(self.path, 'r', newline='') as src, open(tmp_path, 'w', newline='') as out:
+            writer = csv.DictWriter(out, fieldnames=self.headers)
+            writer.writeheader()
+            for row in csv.DictReader(src):
+                row["batch_rows"] = batch_rows
+                writer.writerow(row)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, self.path)
+
+def write_manifest(batch_name: str, build_results: Iterable[Dict[str, Any]], store=None):
+    """Writes a whole manifest at once; build_results may be any iterable (e.g. a generator)."""
+    with ManifestWriter(batch_name, store=store) as manifest:
         for res in build_results:
-            meta = res["meta"]
-            codes = meta["selection_codes"]
-            writer.writerow({
-                "batch_id": batch_name,
-                "output_id": res["run_id"],
-                "run_id": meta["run_id"],
-                "prompt_version": meta["prompt_version"],
-                "FA": codes["FA"],
-                "BT": codes["BT"],
-                "ET": codes["ET"],
-                "HR": codes["HR"],
-                "SC": codes["SC"],
-                "ST": codes["ST"],
-                "prompt_json_path": res["prompt_path"],
-                "run_json_path": res["run_path"],
-                "image_path": meta["image_path"],
-                "rating": meta["rating"],
-                "notes": meta["notes"]
-            })
-    return manifest_path
+            manifest.write(res)
+    return manifest.path
+
+def merge_manifests(paths: List[str], out_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Combines the shard manifests of one batch into the manifest a single
+    host would have written (same rows, same order, no "position" column).
+
+    Raises ValueError if the shards disagree on batch or shard count, if a
+    shard is missing or given twice, or if rows are missing or duplicated
+    (e.g. a shard that crashed midway). Shards with a "batch_rows" column
+    are also checked for rows missing after the last merged position.
+    Shards may have started on different dates; the merged manifest is
+    named after the earliest.
+    """
+    shards: Dict[int, str] = {}
+    batch = count = None
+    dates = set()
+    for path in paths:
+        match = SHARD_PATTERN.match(os.path.basename(path))
+        if not match:
+            raise ValueError(f"Not a shard manifest: {path}")
+        if batch is None:
+            batch, count = match.group("batch"), int(match.group("count"))
+        elif (match.group("batch"), int(match.group("count"))) != (batch, count):
+            raise ValueError(f"{path} belongs to a different batch or shard count than {paths[0]}")
+        if match.group("date"):
+            dates.add(match.group("date"))
+        index = int(match.group("index"))
+        if index in shards:
+            raise ValueError(f"Duplicate shard {index}/{count}: {shards[index]} and {path}")
+        shards[index] = path
+    if not shards:
+        raise ValueError("No shard manifests given")
+    missing = sorted(set(range(count)) - set(shards))
+    if missing:
+        raise ValueError(f"Missing shards of {count}: {', '.join(str(i) for i in missing)}")
+
+    base = f"{batch}__{min(dates)}" if dates else batch
+    out_path = out_path or os.path.join(os.path.dirname(paths[0]), f"{base}.csv")
+    files = [open(shards[i], 'r', newline='') for i in range(count)]
+    opened = False
+    try:
+        readers = [csv.DictReader(f) for f in files]
+        headers = readers[0].fieldnames or []
+        for reader, i in zip(readers, range(count)):
+            if reader.fieldnames != headers:
+                raise ValueError(f"{shards[i]} has different columns than {shards[0]}")
+        if "position" not in headers:
+            raise ValueError(f"{shards[0]} has no position column")
+
+        # Each shard is already in position order
+        streams = [((int(row["position"]), row) for row in reader) for reader in readers]
+        out_headers = [h for h in headers if h not in ("position", "batch_rows")]
+        batch_rows = None
+        expected = 0
+        os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+        opened = True
+        with open(out_path, 'w', newline='') as out:
+            writer = csv.DictWriter(out, fieldnames=out_headers)
+            writer.writeheader()
+            for position, row in heapq.merge(*streams, key=lambda item: item[0]):
+                if position < expected:
+                    raise ValueError(f"Duplicate row at position {position} ({row['output_id']})")
+                if position > expected:
+                    raise ValueError(f"Rows missing at positions {expected}..{position - 1}")
+                if "batch_rows" in row:
+                    rows = row.pop("batch_rows")
+                    if not rows:
+                        raise ValueError(f"Shard of row {position} ({row['output_id']}) did not finish")
+                    rows = int(rows)
+                    if batch_rows is not None and rows != batch_rows:
+                        raise ValueError(f"Shards disagree on the batch size: {batch_rows} and {rows} rows")
+                    batch_rows = rows
+                del row["position"]
+                writer.writerow(row)
+                expected += 1
+            if batch_rows is not None and expected < batch_rows:
+                raise ValueError(f"Rows missing at positions {expected}..{batch_rows - 1}")
+    except ValueError:
+        # Never leave a partial merge behind
+        if opened:
+            os.remove(out_path)
+        raise
+    finally:
+        for f in files:
+            f.close()
+    return {"path": out_path, "rows": expected, "shards": count}
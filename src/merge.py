@@ -1,34 +1,54 @@
 import copy
-from typing import Dict, Any, List
-from .utils import deep_merge
-from .lint import validate_component
+from typing import Dict, Any, List, Optional
+from .utils import deep_merge, persistent_merge, json_fingerprint
+from .lint import ValidationCache
 
-def merge_prompts(base: Dict[str, Any], component_list: List[Dict[str, Any]], dim_codes: List[str]) -> Dict[str, Any]:
+# Boundary validation results, shared by every merge in the process
+VALIDATION_CACHE = ValidationCache()
+
+# Full prescribed merge order
+MERGE_ORDER = [
+    "BASE", "PF", "SUBJECT_TYPE", "SC", "ET", 
+    "PH_REGION", "VN_REGION", "SKIN", 
+    "FA", "BT", "HR", "ST", "POSE", "NB", "APPEARANCE", "AGE"
+]
+
+def merge_prompts(
+    base: Dict[str, Any],
+    component_list: List[Dict[str, Any]],
+    dim_codes: List[str],
+    fingerprints: Optional[List[Optional[str]]] = None,
+    persistent: bool = False
+) -> Dict[str, Any]:
     """
     Surgical Merge Order (Phase 1):
-    BASE -> PF -> SC -> ET -> [REGION] -> FA -> BT -> HR -> ST -> NB
+    BASE -> PF -> [SUBJECT_TYPE] -> SC -> ET -> [REGION] -> [SKIN] -> FA -> BT -> HR -> ST -> [POSE] -> NB
+
+    fingerprints (parallel to component_list) are content hashes from the
+    component cache; missing ones are computed from the content.
+
+    With persistent=True nothing is copied or mutated: the result is a new
+    tree that shares every untouched subtree with base and the components
+    (path-copying only along merged keys). Inputs can then be cached safely
+    and many variants cost little memory, but the result is read-only.
     """
-    result = copy.deepcopy(base)
+    result = base if persistent else copy.deepcopy(base)
+    merge_step = persistent_merge if persistent else deep_merge
     
     # Map components by dimension for easier access
     comp_map = {dim: comp for dim, comp in zip(dim_codes, component_list)}
+    fp_map = dict(zip(dim_codes, fingerprints or []))
     
-    # Full prescribed merge order
-    order = [
-        "BASE", "PF", "SC", "ET", 
-        "PH_REGION", "VN_REGION", 
-        "FA", "BT", "HR", "ST", "NB", "APPEARANCE", "AGE"
-    ]
-    
-    for dim in order:
+    for dim in MERGE_ORDER:
         if dim in comp_map:
             comp_content = comp_map[dim]
             # Verify boundary before merging
-            errors = validate_component(dim, "merge-check", comp_content)
+            fp = fp_map.get(dim) or json_fingerprint(comp_content)
+            errors = VALIDATION_CACHE.validate(dim, comp_content, fp)
             if errors:
                 # We log instead of raise to allow flexible expansion, but strictly keep boundaries
-                print(f"Warning: Boundary violation during merge for {dim}: {errors}")
+                VALIDATION_CACHE.warn(dim, errors, fp)
             
-            result = deep_merge(result, comp_content)
+            result = merge_step(result, comp_content)
     
     return result
@@ -0,0 +1,141 @@
+"""
+Prefix-sharing merge cache.
+
+The merge order is fixed (see merge.MERGE_ORDER), and grid batches mostly
+vary the later dimensions, so many builds share the same BASE -> PF -> SC
+-> ET ... prefix. MergeTrie stores the merged state after every prefix of
+(dimension, content fingerprint) steps; a build walks the trie as far as
+its prefix is known and only merges the remaining suffix.
+"""
+
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+from .utils import copy_json, json_fingerprint, persistent_merge
+from .merge import MERGE_ORDER, VALIDATION_CACHE
+
+DEFAULT_MAX_NODES = 8192
+
+class _Node:
+    __slots__ = ("state", "children", "tick")
+
+    def __init__(self, state: Dict[str, Any], tick: int):
+        self.state = state
+        self.children: Dict[Tuple[str, str], "_Node"] = {}
+        self.tick = tick
+
+class MergeTrie:
+    """
+    Caches intermediate merge states keyed by the ordered prefix of
+    (dimension, fingerprint) pairs.
+
+    States share untouched subtrees with their parent state and with the
+    (read-only) components, so a snapshot per node costs only the path that
+    changed. By default merge() returns a private copy, so callers may mutate
+    the result; with copy=False the cached state itself is returned and must
+    be treated as read-only.
+    When the trie grows past max_nodes, least recently used leaves are
+    pruned until it fits again.
+    """
+
+    def __init__(self, max_nodes: int = DEFAULT_MAX_NODES):
+        self.max_nodes = max_nodes
+        self._root = _Node({}, 0)
+        self._nodes = 0
+        self._tick = 0
+        self._lock = threading.Lock()
+        self.steps_reused = 0
+        self.steps_merged = 0
+        self.prunes = 0
+
+    def merge(
+        self,
+        component_list: List[Dict[str, Any]],
+        dim_codes: List[str],
+        fingerprints: Optional[List[Optional[str]]] = None,
+        copy: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Same contract as merge_prompts({}, ...) but reuses cached prefixes.
+        component_list entries are treated as read-only and may end up shared
+        with the returned tree when copy=False.
+        """
+        comp_map = {dim: comp for dim, comp in zip(dim_codes, component_list)}
+        fp_map = dict(zip(dim_codes, fingerprints or []))
+
+        steps = []
+        for dim in MERGE_ORDER:
+            if dim in comp_map:
+                comp = comp_map[dim]
+                fp = fp_map.get(dim) or json_fingerprint(comp)
+                # Validation is memoized, so this is a dict lookup per step
+                errors = VALIDATION_CACHE.validate(dim, comp, fp)
+                if errors:
+                    VALIDATION_CACHE.warn(dim, errors, fp)
+                steps.append(((dim, fp), comp))
+
+        with self._lock:
+            self._tick += 1
+            tick = self._tick
+            node = self._root
+            depth = 0
+            while depth < len(steps):
+                child = node.children.get(steps[depth][0])
+                if child is None:
+                    break
+                child.tick = tick
+                node = child
+                depth += 1
+            self.steps_reused += depth
+
+            if depth == len(steps):
+                return copy_json(node.state) if copy else node.state
+
+            # Merge the unseen suffix, keeping a node per intermediate state
+            for key, comp in steps[depth:]:
+                child = _Node(persistent_merge(node.state, comp), tick)
+                node.children[key] = child
+                node = child
+                self._nodes += 1
+            self.steps_merged += len(steps) - depth
+
+            while self.max_nodes and self._nodes > self.max_nodes:
+                self._prune()
+            return copy_json(node.state) if copy else node.state
+
+    def _prune(self):
+        """Drops the least recently used half of the leaves."""
+        leaves = []
+
+        def collect(parent, key, node):
+            if not node.children:
+                leaves.append((node.tick, parent, key))
+            for k, child in node.children.items():
+                collect(node, k, child)
+
+        for k, child in self._root.children.items():
+            collect(self._root, k, child)
+
+        leaves.sort(key=lambda leaf: leaf[0])
+        for _, parent, key in leaves[:max(1, len(leaves) // 2)]:
+            del parent.children[key]
+            self._nodes -= 1
+        self.prunes += 1
+
+    def clear(self):
+        with self._lock:
+            self._root = _Node({}, 0)
+            self._nodes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.steps_reused + self.steps_merged
+            return {
+                "nodes": self._nodes,
+                "max_nodes": self.max_nodes,
+                "steps_reused": self.steps_reused,
+                "steps_merged": self.steps_merged,
+                "reuse_rate": (self.steps_reused / total) if total else 0.0,
+                "prunes": self.prunes
+            }
+
+MERGE_TRIE = MergeTrie()
@@ -0,0 +1,130 @@
+"""
+Constraint-aware grid planning.
+
+Combinations are checked before anything is built, and invalid or
+degenerate ones are dropped with a counted reason. Constraints are declared
+in registry/constraints.json:
+
+    {"rules": [
+        {"name": "ph_region_requires_ph",
+         "when": {"PH_REGION": "*"},
+         "requires": {"ET": ["PH"]}},
+        {"name": "no_bikini_in_studio",
+         "when": {"SC": ["STUDIO"]},
+         "excludes": {"ST": ["TRIBAL_BIKINI", "VS_RUNWAY_BIKINI"]}}
+    ]}
+
+A rule applies when every "when" dimension matches: a list of codes, or
+"*" for any code (an absent/empty dimension never matches). An applying
+rule drops the combination if a "requires" dimension is outside its list
+or an "excludes" dimension is inside its list ("*" again meaning any
+code). On top of the rules, every component the build would merge
+(including the fixed BASE/PF/APPEARANCE/NB) must exist on disk.
+"""
+
+import os
+import json
+from collections import Counter
+from typing import Dict, Any, List, Iterable, Iterator, Optional
+from .registry import BASE_DIR, get_component_path
+
+CONSTRAINTS_PATH = os.path.join(BASE_DIR, "registry", "constraints.json")
+
+Selection = Dict[str, Optional[str]]
+
+def _matches(code: Optional[str], allowed) -> bool:
+    if not code:
+        return False
+    return allowed == "*" or "*" in allowed or code in allowed
+
+class Constraint:
+    def __init__(self, name: str, when: Dict[str, Any], requires: Optional[Dict[str, Any]] = None,
+                 excludes: Optional[Dict[str, Any]] = None, description: str = ""):
+        self.name = name
+        self.when = when
+        self.requires = requires or {}
+        self.excludes = excludes or {}
+        self.description = description
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Constraint":
+        return cls(data["name"], data.get("when", {}), data.get("requires"), data.get("excludes"),
+                   data.get("description", ""))
+
+    def violation(self, selection: Selection) -> Optional[str]:
+        """Reason this rule rejects the selection, or None."""
+        if not all(_matches(selection.get(dim), allowed) for dim, allowed in self.when.items()):
+            return None
+        for dim, allowed in self.requires.items():
+            if not _matches(selection.get(dim), allowed):
+                return f"{self.name}: {dim}={selection.get(dim) or '-'} not allowed"
+        for dim, excluded in self.excludes.items():
+            if _matches(selection.get(dim), excluded):
+                return f"{self.name}: {dim}={selection[dim]} excluded"
+        return None
+
+def load_constraints(path: str = CONSTRAINTS_PATH) -> List[Constraint]:
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return [Constraint.from_dict(rule) for rule in data.get("rules", [])]
+
+class GridPlanner:
+    """
+    Filters selections (dicts of dimension -> code, e.g. FA..ST plus
+    optional PH_REGION / VN_REGION) against the constraints and component
+    existence, counting dropped combinations per reason.
+    """
+
+    def __init__(self, constraints: Optional[List[Constraint]] = None, check_components: bool = True):
+        self.constraints = load_constraints() if constraints is None else constraints
+        self.check_components = check_components
+        self._exists: Dict[str, bool] = {}
+        self.kept = 0
+        self.dropped: Counter = Counter()
+
+    def _missing_component(self, selection: Selection) -> Optional[str]:
+        from .builder import component_selection
+        dims, codes = component_selection(
+            selection["FA"], selection["BT"], selection["ET"], selection["HR"], selection["SC"], selection["ST"],
+            ph_region=selection.get("PH_REGION"), vn_region=selection.get("VN_REGION")
+        )
+        for dim, code in zip(dims, codes):
+            path = get_component_path(dim, code)
+            exists = self._exists.get(path)
+            if exists is None:
+                exists = self._exists[path] = os.path.exists(path)
+            if not exists:
+                return f"missing component: {dim}={code}"
+        return None
+
+    def check(self, selection: Selection) -> Optional[str]:
+        """Reason the selection is dropped, or None if it should be built."""
+        for constraint in self.constraints:
+            reason = constraint.violation(selection)
+            if reason:
+                return reason
+        if self.check_components:
+            return self._missing_component(selection)
+        return None
+
+    def allows(self, selection: Selection) -> bool:
+        reason = self.check(selection)
+        if reason:
+            self.dropped[reason] += 1
+            return False
+        self.kept += 1
+        return True
+
+    def filter(self, selections: Iterable[Selection]) -> Iterator[Selection]:
+        for selection in selections:
+            if self.allows(selection):
+                yield selection
+
+    def report(self) -> List[str]:
+        total = self.kept + sum(self.dropped.values())
+        lines = [f"Planner: {self.kept}/{total} combinations kept, {total - self.kept} dropped"]
+        for reason, count in self.dropped.most_common():
+            lines.append(f"  {count:>6}  {reason}")
+        return lines
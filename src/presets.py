@@ -1,23 +1,129 @@
-from typing import List, Dict, Any
-from .registry import get_all_codes
-from .builder import build_prompt
-
-def face_pass(v: str, runs: int, batch_name: str):
-    codes = get_all_codes()
-    # Fixed: SC=DOOR, ST=POCA, BT=AL, HR=ST
-    # Variable: FA across all face codes matching SG- and MB-
-    # ET across PH, EA
-    
-    fa_codes = [c for c in codes.get("FA", {}) if c.startswith("SG-") or c.startswith("MB-")]
-    et_codes = [c for c in codes.get("ET", {}) if c in ["PH", "EA"]]
-    
-    results = []
-    for fa in fa_codes:
-        for et in et_codes:
-            for r_idx in range(1, runs + 1):
-                r_str = f"{r_idx:02d}"
-                res = build_prompt(
-                    fa=fa, bt="AL", et=et, hr="ST", sc="DOOR", st="POCA", v=v, r=r_str
-                )
-                results.append(res)
-    return results
+"""
+Declarative batch presets.
+
+A preset is a JSON file, registry/presets/<name>.json:
+
+    {"name": "face_pass",
+     "description": "Every SG-/MB- face on PH and EA, fixed body/hair/scene/style",
+     "fixed": {"BT": "AL", "HR": "ST", "SC": "DOOR", "ST": "POCA"},
+     "vary": {
+        "FA": {"prefix": ["SG-", "MB-"]},
+        "ET": {"codes": ["PH", "EA"]}},
+     "runs": 1,
+     "strategy": "full"}
+
+Each grid dimension (FA BT ET HR SC ST) is either fixed to one code or
+varied over the registered codes passing all of its filters:
+
+    codes   explicit codes (unregistered ones are dropped)
+    prefix  a code prefix, or a list of alternatives
+    regex   a pattern the whole code must match
+    status  a registry status, or a list of alternatives
+
+An axis with no filters takes every code of its dimension; axes keep
+registry order. PH_REGION and VN_REGION are optional axes: fixed to a
+code, or varied over explicit "codes" only (regions are not registered),
+with "-" meaning no region, as in `batch --grid`. "runs", "strategy", "sample" and "seed" are optional
+defaults that the matching batch flags override.
+
+Compiling a preset resolves each axis through Registry.select (status and
+prefix indexes, not a scan per preset), and the resulting values feed the
+same lazy grid_jobs pipeline as `batch --grid`.
+"""
+
+import os
+import json
+from typing import Any, Dict, Iterator, List, Optional, Union
+from .registry import BASE_DIR, get_registry
+from .batch import GRID_KEYS, REGION_KEYS, grid_jobs
+
+PRESETS_DIR = os.path.join(BASE_DIR, "registry", "presets")
+
+FILTER_KEYS = ("codes", "prefix", "regex", "status")
+# Batch options a preset may default, and their values when neither it nor a flag sets them
+DEFAULT_OPTIONS = {"runs": 1, "strategy": "full", "sample": None, "seed": 0}
+
+def _as_list(value: Union[str, List[str], None]) -> Optional[List[str]]:
+    if value is None:
+        return None
+    return [value] if isinstance(value, str) else list(value)
+
+class Preset:
+    def __init__(self, name: str, fixed: Dict[str, str], vary: Dict[str, Dict[str, Any]],
+                 options: Optional[Dict[str, Any]] = None, description: str = ""):
+        self.name = name
+        self.fixed = fixed
+        self.vary = vary
+        self.options = options or {}
+        self.description = description
+
+        both = sorted(set(fixed) & set(vary))
+        if both:
+            raise ValueError(f"Preset {name}: {', '.join(both)} both fixed and varied")
+        unknown = sorted((set(fixed) | set(vary)) - set(GRID_KEYS) - set(REGION_KEYS))
+        if unknown:
+            raise ValueError(f"Preset {name}: unknown dimension(s) {', '.join(unknown)} (expected {' '.join(GRID_KEYS + REGION_KEYS)})")
+        missing = [k for k in GRID_KEYS if k not in fixed and k not in vary]
+        if missing:
+            raise ValueError(f"Preset {name}: {', '.join(missing)} neither fixed nor varied")
+        for dim, filters in vary.items():
+            bad = sorted(set(filters) - set(FILTER_KEYS))
+            if bad:
+                raise ValueError(f"Preset {name}: unknown filter(s) {', '.join(bad)} for {dim} (expected {', '.join(FILTER_KEYS)})")
+            if dim in REGION_KEYS and set(filters) != {"codes"}:
+                raise ValueError(f"Preset {name}: {dim} can only be varied over explicit codes")
+        bad = sorted(set(self.options) - set(DEFAULT_OPTIONS))
+        if bad:
+            raise ValueError(f"Preset {name}: unknown option(s) {', '.join(bad)}")
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], name: Optional[str] = None) -> "Preset":
+        name = data.get("name") or name or "preset"
+        options = {k: data[k] for k in DEFAULT_OPTIONS if data.get(k) is not None}
+        return cls(name, data.get("fixed", {}), data.get("vary", {}), options, data.get("description", ""))
+
+    def compile(self, registry=None) -> Dict[str, List[str]]:
+        """Grid values per dimension (as parse_grid returns for --grid)."""
+        registry = registry or get_registry()
+        grid = {}
+        for dim in GRID_KEYS + REGION_KEYS:
+            if dim in self.fixed:
+                grid[dim] = [self.fixed[dim]]
+                continue
+            if dim not in self.vary:
+                continue
+            filters = self.vary[dim]
+            if dim in REGION_KEYS:
+                grid[dim] = _as_list(filters["codes"])
+                continue
+            grid[dim] = registry.select(
+                dim, codes=_as_list(filters.get("codes")), prefix=_as_list(filters.get("prefix")),
+                regex=filters.get("regex"), status=_as_list(filters.get("status"))
+            )
+        return grid
+
+    def jobs(self, v: str, planner=None, registry=None, **overrides) -> Iterator[tuple]:
+        """
+        Lazy batch jobs; overrides (runs, strategy, sample, seed) that are not
+        None take precedence over the preset's own options.
+        """
+        options = dict(DEFAULT_OPTIONS)
+        options.update(self.options)
+        options.update({k: val for k, val in overrides.items() if val is not None})
+        return grid_jobs(self.compile(registry), v, options["runs"], options["strategy"],
+                         options["sample"], options["seed"], planner)
+
+def list_presets(presets_dir: str = PRESETS_DIR) -> List[str]:
+    if not os.path.isdir(presets_dir):
+        return []
+    return sorted(name[:-len(".json")] for name in os.listdir(presets_dir) if name.endswith(".json"))
+
+def load_preset(name: str, presets_dir: str = PRESETS_DIR) -> Preset:
+    """A preset by name (registry/presets/<name>.json) or by path to a JSON file."""
+    path = name if name.endswith(".json") else os.path.join(presets_dir, f"{name}.json")
+    if not os.path.exists(path):
+        available = ", ".join(list_presets(presets_dir)) or "none"
+        raise ValueError(f"Unknown preset: {name} (available: {available})")
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return Preset.from_dict(data, name=os.path.splitext(os.path.basename(path))[0])
@@ -0,0 +1,102 @@
+"""
+Content-addressed store for merged prompts.
+
+Each distinct merged prompt is serialized once, hashed (sha256 of the
+serialized bytes) and written to builds/objects/<hh>/<hash>.json only if
+that object does not exist yet. builds/prompts/<canonical_id>.json stays
+in place for the UI and scripts, but is a hard link to the object, so an
+unchanged rebuild (or run r02..rNN of the same prompt) writes no prompt
+content at all. Because of the links, prompt files must be replaced (by
+rebuilding), never edited in place.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import threading
+from typing import Dict, Any, Tuple
+
+class PromptStore:
+    def __init__(self, builds_dir: str):
+        self.builds_dir = builds_dir
+        self.objects_dir = os.path.join(builds_dir, "objects")
+        self.prompts_dir = os.path.join(builds_dir, "prompts")
+        self._lock = threading.Lock()
+        self.objects_written = 0
+        self.objects_reused = 0
+        self.links_written = 0
+
+    @staticmethod
+    def serialize(prompt: Dict[str, Any]) -> bytes:
+        # Same layout save_json has always produced
+        return json.dumps(prompt, indent=2).encode("utf-8")
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], f"{digest}.json")
+
+    def prompt_path(self, canonical_id: str) -> str:
+        return os.path.join(self.prompts_dir, f"{canonical_id}.json")
+
+    def put(self, prompt: Dict[str, Any]) -> Tuple[str, str, bool]:
+        """
+        Stores prompt under its content hash.
+        Returns (digest, object path, whether the object was newly written).
+        """
+        data = self.serialize(prompt)
+        digest = self.digest(data)
+        path = self.object_path(digest)
+        if os.path.exists(path):
+            with self._lock:
+                self.objects_reused += 1
+            return digest, path, False
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.objects_written += 1
+        return digest, path, True
+
+    def link(self, canonical_id: str, digest: str) -> str:
+        """
+        Points builds/prompts/<canonical_id>.json at the stored object.
+        Nothing is written when it already does.
+        """
+        obj_path = self.object_path(digest)
+        path = self.prompt_path(canonical_id)
+        try:
+            if os.path.samefile(path, obj_path):
+                return path
+        except OSError:
+            pass
+
+        os.makedirs(self.prompts_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.link(obj_path, tmp_path)
+        except OSError:
+            # Filesystems without hard links get a plain copy
+            shutil.copyfile(obj_path, tmp_path)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.links_written += 1
+        return path
+
+    def get(self, digest: str) -> Dict[str, Any]:
+        with open(self.object_path(digest), 'r') as f:
+            return json.load(f)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "objects_written": self.objects_written,
+                "objects_reused": self.objects_reused,
+                "links_written": self.links_written
+            }
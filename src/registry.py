@@ -1,38 +1,399 @@
 import os
+import re
 import json
-from typing import Dict, List, Any
+import bisect
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Callable, Optional, Tuple
+from .utils import load_json, copy_json, json_fingerprint
+from .bundle import open_bundle, compile_bundle, RegistryBundle
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 REGISTRY_PATH = os.path.join(BASE_DIR, "registry", "codes.json")
-COMPONENTS_DIR = os.path.join(BASE_DIR, "components")
+# AVATAR_DB_COMPONENTS_DIR points builds at another component tree
+# (inherited by batch worker processes)
+COMPONENTS_DIR = os.environ.get("AVATAR_DB_COMPONENTS_DIR") or os.path.join(BASE_DIR, "components")
+BUNDLE_PATH = os.path.join(BASE_DIR, "builds", "registry.bundle")
+
+_bundle: Optional[RegistryBundle] = None
+_bundle_checked = False
+
+def get_bundle() -> Optional[RegistryBundle]:
+    """
+    Returns the compiled registry bundle (see `avatar-db compile`), opening
+    it on first use. Set AVATAR_DB_NO_BUNDLE=1 to always read loose files.
+    """
+    global _bundle, _bundle_checked
+    if not _bundle_checked:
+        _bundle_checked = True
+        if not os.environ.get("AVATAR_DB_NO_BUNDLE"):
+            _bundle = open_bundle(BUNDLE_PATH, BASE_DIR)
+    return _bundle
+
+def reset_bundle():
+    """Closes the bundle so the next lookup re-opens it (e.g. after compile)."""
+    global _bundle, _bundle_checked
+    if _bundle is not None:
+        _bundle.close()
+    _bundle = None
+    _bundle_checked = False
+
+# Default LRU cap for the process-wide component cache.
+# Override with AVATAR_DB_COMPONENT_CACHE_SIZE (0 disables eviction).
+DEFAULT_CACHE_SIZE = int(os.environ.get("AVATAR_DB_COMPONENT_CACHE_SIZE", "512"))
+
+class ComponentCache:
+    """
+    Process-wide cache of parsed component JSON files.
+
+    Each file is parsed once and revalidated on every lookup with a cheap
+    stat (mtime + size) or, in "hash" mode, a content hash of the raw bytes.
+    Callers always receive a private copy, so the in-place deep_merge can
+    never corrupt a cached entry.
+
+    Each entry also carries a content fingerprint (see fingerprint()) so
+    downstream caches can key on content without re-serializing it.
+
+    On a miss the compiled bundle is consulted first; a bundled payload is
+    only used when its recorded signature still matches the loose file.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE, validate: str = "mtime", use_bundle: bool = True):
+        if validate not in ("mtime", "hash"):
+            raise ValueError(f"Invalid validation mode: {validate}")
+        self.max_entries = max_entries
+        self.validate = validate
+        self.use_bundle = use_bundle
+        self._entries: "OrderedDict[str, Tuple[Any, Dict[str, Any], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bundle_loads = 0
+
+    def _signature(self, path: str) -> Any:
+        if self.validate == "hash":
+            with open(path, 'rb') as f:
+                return hashlib.sha1(f.read()).hexdigest()
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self, path: str, loader: Callable[[str], Dict[str, Any]] = load_json, copy: bool = True) -> Dict[str, Any]:
+        """
+        Returns the parsed contents of path, parsing it only when the file is
+        new or has changed since it was cached. Paths that cannot be stat'ed are
+        passed straight to loader so its errors surface unchanged.
+
+        With copy=False the shared cached object is returned; the caller must
+        treat it as read-only.
+        """
+        key = os.path.abspath(path)
+        try:
+            sig = self._signature(key)
+        except OSError:
+            return loader(path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == sig:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                data = entry[1]
+                return copy_json(data) if copy else data
+            self.misses += 1
+
+        bundle = get_bundle() if self.use_bundle else None
+        data = bundle.load(key, sig) if bundle is not None else None
+        from_bundle = data is not None
+        if data is None:
+            data = loader(path)
+        fp = json_fingerprint(data)
+        with self._lock:
+            if from_bundle:
+                self.bundle_loads += 1
+            self._entries[key] = (sig, data, fp)
+            self._entries.move_to_end(key)
+            while self.max_entries and len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return copy_json(data) if copy else data
+
+    def fingerprint(self, path: str) -> Optional[str]:
+        """Content fingerprint of a cached entry, or None if path is not cached."""
+        with self._lock:
+            entry = self._entries.get(os.path.abspath(path))
+            return entry[2] if entry is not None else None
+
+    def invalidate(self, path: Optional[str] = None):
+        """Drops one entry, or the whole cache when path is None."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.bundle_loads = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "bundle_loads": self.bundle_loads,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0
+            }
+
+COMPONENT_CACHE = ComponentCache()
 
 def get_all_codes() -> Dict[str, List[str]]:
     if not os.path.exists(REGISTRY_PATH):
         return {}
+    bundle = get_bundle()
+    if bundle is not None:
+        st = os.stat(REGISTRY_PATH)
+        codes = bundle.load(REGISTRY_PATH, (st.st_mtime_ns, st.st_size))
+        if codes is not None:
+            return codes
     with open(REGISTRY_PATH, 'r') as f:
         return json.load(f)
 
+def compile_registry(out_path: str = BUNDLE_PATH) -> Dict[str, Any]:
+    """Compiles codes.json and all components into a bundle at out_path."""
+    info = compile_bundle(out_path, BASE_DIR)
+    if os.path.abspath(out_path) == os.path.abspath(BUNDLE_PATH):
+        reset_bundle()
+        COMPONENT_CACHE.invalidate()
+    return info
+
+# Short (builder/CLI) dimension codes -> registry dimension names
+DIMENSION_ALIASES = {
+    "FA": "FACE",
+    "BT": "BODY",
+    "ET": "ETHNICITY",
+    "HR": "HAIR",
+    "SC": "BACKGROUND",
+    "ST": "OUTFIT"
+}
+REGISTRY_DIMENSIONS = {v: k for k, v in DIMENSION_ALIASES.items()}
+
+# Component folder per dimension (short and registry names both resolve)
+DIMENSION_FOLDERS = {
+    "BASE": "base",
+    "PF": "base",
+    "PH_REGION": "ph_region",
+    "VN_REGION": "vn_region",
+    "SUBJECT_TYPE": "subject",
+    "FACE": "face",
+    "BODY": "body",
+    "ETHNICITY": "ethnicity",
+    "HAIR": "hair",
+    "SKIN": "skin",
+    "BACKGROUND": "background",
+    "OUTFIT": "outfit",
+    "POSE": "pose",
+    "NB": "negative",
+    "APPEARANCE": "appearance",
+    "AGE": "age"
+}
+
+def canonical_dim(dim: str) -> str:
+    """Maps a short dimension code (FA, SC, ...) to its registry name (FACE, BACKGROUND, ...)."""
+    return DIMENSION_ALIASES.get(dim, dim)
+
+def short_dim(dim: str) -> str:
+    """Maps a registry dimension name to the short code used by the builder and lint rules."""
+    return REGISTRY_DIMENSIONS.get(dim, dim)
+
 def get_component_path(dim: str, code: str) -> str:
-    folder_map = {
-        "BASE": "base",
-        "PF": "base",
-        "PH_REGION": "ph_region",
-        "VN_REGION": "vn_region",
-        "FA": "face",
-        "BT": "body",
-        "ET": "ethnicity",
-        "HR": "hair",
-        "SC": "scene",
-        "ST": "outfit",
-        "NB": "negative",
-        "APPEARANCE": "appearance",
-        "AGE": "age"
-    }
-    folder = folder_map.get(dim)
+    folder = DIMENSION_FOLDERS.get(canonical_dim(dim))
     if not folder:
         raise ValueError(f"Invalid dimension: {dim}")
     return os.path.join(COMPONENTS_DIR, folder, f"{code}.json")
 
+class Registry:
+    """
+    Indexed view over registry/codes.json.
+
+    Built once from the parsed registry: code -> metadata and code -> path
+    per dimension, plus status, per-dimension status and sorted-code (prefix)
+    indexes, so lookups never re-read the file or scan a dimension.
+    Dimensions may be addressed by short code (FA) or registry name (FACE).
+    """
+
+    def __init__(self, codes: Dict[str, Dict[str, Any]], components_dir: str = COMPONENTS_DIR):
+        self.components_dir = components_dir
+        self._meta: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._paths: Dict[Tuple[str, str], str] = {}
+        self._by_status: Dict[str, List[Tuple[str, str]]] = {}
+        self._dim_status: Dict[str, Dict[str, List[str]]] = {}
+        self._order: Dict[str, Dict[str, int]] = {}
+        self._sorted: Dict[str, List[str]] = {}
+
+        for dim, code_map in codes.items():
+            self._meta[dim] = dict(code_map)
+            self._order[dim] = {code: i for i, code in enumerate(code_map)}
+            self._sorted[dim] = sorted(code_map)
+            by_status = self._dim_status.setdefault(dim, {})
+            folder = DIMENSION_FOLDERS.get(dim)
+            for code, meta in code_map.items():
+                if folder:
+                    self._paths[(dim, code)] = os.path.join(components_dir, folder, f"{code}.json")
+                status = meta.get("status", "") if isinstance(meta, dict) else ""
+                self._by_status.setdefault(status, []).append((dim, code))
+                by_status.setdefault(status, []).append(code)
+
+    @classmethod
+    def load(cls, path: str = REGISTRY_PATH, components_dir: str = COMPONENTS_DIR) -> "Registry":
+        if path == REGISTRY_PATH:
+            return cls(get_all_codes(), components_dir)
+        if not os.path.exists(path):
+            return cls({}, components_dir)
+        return cls(load_json(path), components_dir)
+
+    def dimensions(self) -> List[str]:
+        return list(self._meta.keys())
+
+    def has_dimension(self, dim: str) -> bool:
+        return canonical_dim(dim) in self._meta
+
+    def codes(self, dim: str, status: Optional[str] = None) -> List[str]:
+        """Codes registered under dim in registry order, optionally filtered by status."""
+        dim = canonical_dim(dim)
+        if status is None:
+            return list(self._meta.get(dim, {}).keys())
+        return list(self._dim_status.get(dim, {}).get(status, []))
+
+    def with_prefix(self, dim: str, prefix: str) -> List[str]:
+        """Codes of dim starting with prefix, in sorted order (a range of the sorted index)."""
+        codes = self._sorted.get(canonical_dim(dim), [])
+        start = bisect.bisect_left(codes, prefix)
+        end = start
+        while end < len(codes) and codes[end].startswith(prefix):
+            end += 1
+        return codes[start:end]
+
+    def select(
+        self, dim: str, codes: Optional[List[str]] = None, prefix: Optional[List[str]] = None,
+        regex: Optional[str] = None, status: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        Codes of dim passing every given filter, in registry order: one of
+        codes, starting with one of prefix, fully matching regex, with one of
+        status. Index lookups narrow the candidates; only regex is tested per code.
+        """
+        dim = canonical_dim(dim)
+        order = self._order.get(dim, {})
+        narrowed = []
+        if codes is not None:
+            narrowed.append({c for c in codes if c in order})
+        if prefix is not None:
+            narrowed.append({c for p in prefix for c in self.with_prefix(dim, p)})
+        if status is not None:
+            by_status = self._dim_status.get(dim, {})
+            narrowed.append({c for s in status for c in by_status.get(s, [])})
+        if narrowed:
+            narrowed.sort(key=len)
+            candidates = narrowed[0].intersection(*narrowed[1:])
+        else:
+            candidates = set(order)
+        if regex is not None:
+            pattern = re.compile(regex)
+            candidates = {c for c in candidates if pattern.fullmatch(c)}
+        return sorted(candidates, key=order.__getitem__)
+
+    def has(self, dim: str, code: str) -> bool:
+        return code in self._meta.get(canonical_dim(dim), {})
+
+    def meta(self, dim: str, code: str) -> Dict[str, Any]:
+        try:
+            return self._meta[canonical_dim(dim)][code]
+        except KeyError:
+            raise ValueError(f"Unknown code: {dim}-{code}")
+
+    def path(self, dim: str, code: str) -> str:
+        """Resolved component path; unregistered codes fall back to the folder convention."""
+        dim = canonical_dim(dim)
+        path = self._paths.get((dim, code))
+        if path is None:
+            folder = DIMENSION_FOLDERS.get(dim)
+            if not folder:
+                raise ValueError(f"Invalid dimension: {dim}")
+            path = os.path.join(self.components_dir, folder, f"{code}.json")
+        return path
+
+    def with_status(self, status: str) -> List[Tuple[str, str]]:
+        """All (dimension, code) pairs whose registry status equals status."""
+        return list(self._by_status.get(status, []))
+
+    def items(self):
+        """Yields (dimension, code, metadata) for every registered code."""
+        for dim, code_map in self._meta.items():
+            for code, meta in code_map.items():
+                yield dim, code, meta
+
+    def check(self) -> List[str]:
+        """Startup check: every registered code must have a component file."""
+        errors = []
+        for dim, code, _ in self.items():
+            if dim not in DIMENSION_FOLDERS:
+                errors.append(f"[{dim}-{code}] No component folder for dimension {dim}")
+                continue
+            path = self._paths[(dim, code)]
+            if not os.path.exists(path):
+                errors.append(f"[{dim}-{code}] Missing component file: {os.path.relpath(path, BASE_DIR)}")
+        return errors
+
+_registry: Optional[Registry] = None
+_registry_sig: Any = None
+
+def get_registry(strict: bool = False) -> Registry:
+    """
+    Returns the process-wide Registry, rebuilding it only when codes.json
+    changes on disk. With strict=True a failed startup check raises.
+    """
+    global _registry, _registry_sig
+    try:
+        st = os.stat(REGISTRY_PATH)
+        sig = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        sig = None
+    if _registry is None or sig != _registry_sig:
+        _registry = Registry.load()
+        _registry_sig = sig
+    if strict:
+        errors = _registry.check()
+        if errors:
+            raise ValueError("Registry check failed:\n" + "\n".join(errors))
+    return _registry
+
+def warm_component_cache(components_dir: Optional[str] = None) -> int:
+    """Loads every component file into COMPONENT_CACHE; returns how many loaded."""
+    count = 0
+    for root, _, files in os.walk(components_dir or COMPONENTS_DIR):
+        for name in files:
+            if name.endswith(".json"):
+                try:
+                    COMPONENT_CACHE.get(os.path.join(root, name), copy=False)
+                    count += 1
+                except ValueError:
+                    # Broken files surface (with context) when a build uses them
+                    pass
+    return count
+
+def load_component(dim: str, code: str) -> Dict[str, Any]:
+    """Loads a component through the process-wide cache."""
+    return COMPONENT_CACHE.get(get_component_path(dim, code))
+
 def get_pack_path(type: str, code: str) -> str:
     if type == "SUB":
         return os.path.join(COMPONENTS_DIR, "packs", "subject", f"{code}.json")
@@ -0,0 +1,91 @@
+"""
+Clause-level render memoization.
+
+Clause renderers are pure functions of small subtrees (appearance.skin_tone,
+appearance.hair_color, subject.hair, body, body_components) that repeat
+across thousands of builds in a batch. ClauseMemo reuses the rendered clause
+for a subtree it has already seen.
+
+Lookups go through two levels:
+  1. identity: the same dict object seen before (merged trees share
+     component subtrees), confirmed against a snapshot so in-place edits
+     are never served stale;
+  2. content: a stable canonical hash of the subtree, for equal subtrees
+     that are distinct objects.
+Both levels are LRU-bounded.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Optional
+from .utils import copy_json, json_fingerprint
+
+DEFAULT_MAX_ENTRIES = 2048
+
+class ClauseMemo:
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._by_id: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._by_content: "OrderedDict[tuple, Optional[str]]" = OrderedDict()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _bump(self, clause_type: str, field: str):
+        counts = self._stats.get(clause_type)
+        if counts is None:
+            counts = self._stats[clause_type] = {"identity_hits": 0, "content_hits": 0, "misses": 0}
+        counts[field] += 1
+
+    def _store(self, table: OrderedDict, key: tuple, value: Any):
+        table[key] = value
+        table.move_to_end(key)
+        while self.max_entries and len(table) > self.max_entries:
+            table.popitem(last=False)
+
+    def render(self, clause_type: str, renderer: Callable[[Dict[str, Any]], Optional[str]], subtree: Any) -> Optional[str]:
+        """Returns renderer(subtree), reusing an earlier result for the same subtree."""
+        if not isinstance(subtree, dict) or not subtree:
+            return renderer(subtree)
+
+        id_key = (clause_type, id(subtree))
+        with self._lock:
+            entry = self._by_id.get(id_key)
+            # entry holds a strong ref to the subtree, so its id cannot be reused
+            if entry is not None and entry[0] is subtree and entry[1] == subtree:
+                self._by_id.move_to_end(id_key)
+                self._bump(clause_type, "identity_hits")
+                return entry[2]
+
+        content_key = (clause_type, json_fingerprint(subtree))
+        with self._lock:
+            if content_key in self._by_content:
+                clause = self._by_content[content_key]
+                self._by_content.move_to_end(content_key)
+                self._store(self._by_id, id_key, (subtree, copy_json(subtree), clause))
+                self._bump(clause_type, "content_hits")
+                return clause
+
+        clause = renderer(subtree)
+        with self._lock:
+            self._store(self._by_content, content_key, clause)
+            self._store(self._by_id, id_key, (subtree, copy_json(subtree), clause))
+            self._bump(clause_type, "misses")
+        return clause
+
+    def clear(self):
+        with self._lock:
+            self._by_id.clear()
+            self._by_content.clear()
+            self._stats.clear()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per clause type: identity hits, content hits, misses and overall hit rate."""
+        with self._lock:
+            out = {}
+            for clause_type, counts in self._stats.items():
+                hits = counts["identity_hits"] + counts["content_hits"]
+                total = hits + counts["misses"]
+                out[clause_type] = dict(counts, hit_rate=(hits / total) if total else 0.0)
+            return out
+
+CLAUSE_MEMO = ClauseMemo()
@@ -1,9 +1,10 @@
-from typing import Dict, Any, Optional, List
-from .hair_color_renderer import render_hair_color_from_appearance
-from .skin_tone_renderer import render_skin_tone_from_appearance
+from typing import Dict, Any, Optional, List, Tuple, Callable
+from .hair_color_renderer import render_hair_color_clause
+from .skin_tone_renderer import render_skin_tone_clause
 from .age_renderer import render_age_clause
 from .body_renderer import render_body_clause, render_body_components_clause
 from .hair_renderer import render_hair_clause
+from .render_memo import CLAUSE_MEMO
 
 def render_viewing_angle_clause(va: Dict[str, Any]) -> Optional[str]:
     if not va: return None
@@ -25,109 +26,125 @@ def render_lighting_clause(l: Dict[str, Any]) -> Optional[str]:
     if not source: return None
     return f"Lighting: {quality.lower()} {source.lower()}."
 
-def render_final_prompt(prompt_json: Dict[str, Any]) -> str:
-    """
-    Renders the full natural-language prompt from the merged JSON.
-    This combines the foundation (from base/scene/face/body) with the 
-    modular appearance clauses (skin tone, hair structure, hair color, age).
-    """
-    clauses = []
-    
+# Clause renderers receive the merged prompt JSON and the clauses rendered
+# so far, and return a clause string or None. The list order is the order
+# clauses appear in the final prompt; append to it to add a new clause type.
+ClauseRenderer = Callable[[Dict[str, Any], Dict[str, Optional[str]]], Optional[str]]
+
+def _body_profile(p: Dict[str, Any], clauses: Dict[str, Optional[str]]) -> Optional[str]:
     # 1. Body (Archetype/Base)
-    body_data = prompt_json.get("body", {})
-    body_clause = render_body_clause(body_data)
-    if body_clause:
-        clauses.append(body_clause)
-    else:
-        # Fallback to old build field if new body system not used
-        subject = prompt_json.get("subject", {})
-        build = subject.get("build", "")
-        if build:
-            clauses.append(build)
-            
+    return CLAUSE_MEMO.render("body_profile", render_body_clause, p.get("body", {}))
+
+def _body_build(p: Dict[str, Any], clauses: Dict[str, Optional[str]]) -> Optional[str]:
+    # Fallback to old build field if new body system not used
+    if clauses.get("body_profile"):
+        return None
+    return p.get("subject", {}).get("build", "") or None
+
+def _body_components(p: Dict[str, Any], clauses: Dict[str, Optional[str]]) -> Optional[str]:
     # 2. Body Components (Additive Composition)
-    body_components = prompt_json.get("body_components")
-    body_components_clause = render_body_components_clause(body_components)
-    if body_components_clause:
-        clauses.append(body_components_clause)
-        
+    return CLAUSE_MEMO.render("body_components", render_body_components_clause, p.get("body_components"))
+
+def _age_profile(p: Dict[str, Any], clauses: Dict[str, Optional[str]]) -> Optional[str]:
     # 3. Age Profile
-    subject = prompt_json.get("subject", {})
-    age_clause = render_age_clause(subject)
-    if age_clause:
-        clauses.append(age_clause)
-         
-    # 4. Skin Tone (Modular Appearance)
-    appearance = prompt_json.get("appearance", {})
-    skin_clause = render_skin_tone_from_appearance(appearance)
-    if skin_clause:
-        clauses.append(skin_clause)
-        
+    return render_age_clause(p.get("subject", {}))
+
+def _skin_tone(p: Dict[str, Any], clauses: Dict[str, Optional[str]]) -> Optional[str]:
+    # 4. Skin Tone (Modular Appearance), structured format only
+    skin_tone = p.get("appearance", {}).get("skin_tone")
+    if not isinstance(skin_tone, dict):
+        return None
+    return CLAUSE_MEMO.render("skin_tone", render_skin_tone_clause, skin_tone)
+
+def _hair_structure(p: Dict[str, Any], clauses: Dict[str, Optional[str]]) -> Optional[str]:
     # 5. Hair Structure (Modular Subject)
-    hair_data = subject.get("hair", {})
-    hair_clause = render_hair_clause(hair_data)
-    if hair_clause:
-        clauses.append(hair_clause)
-        
-    # 6. Hair Color (Modular Appearance)
-    hair_color_clause = render_hair_color_from_appearance(appearance)
-    if hair_color_clause:
-        clauses.append(hair_color_clause)
-        
+    return CLAUSE_MEMO.render("hair_structure", render_hair_clause, p.get("subject", {}).get("hair", {}))
+
+def _hair_color(p: Dict[str, Any], clauses: Dict[str, Optional[str]]) -> Optional[str]:
+    # 6. Hair Color (Modular Appearance), structured format only
+    hair_color = p.get("appearance", {}).get("hair_color")
+    if not isinstance(hair_color, dict):
+        return None
+    return CLAUSE_MEMO.render("hair_color", render_hair_color_clause, hair_color)
+
+def _viewing_angle(p: Dict[str, Any], clauses: Dict[str, Optional[str]]) -> Optional[str]:
     # 7. Camera & Optics (New Technical Layer)
-    va = prompt_json.get("viewing_angle", {})
-    va_clause = render_viewing_angle_clause(va)
-    if va_clause:
-        clauses.append(va_clause)
-        
-    optics = prompt_json.get("optics")
-    optics_clause = render_optics_clause(optics)
-    if optics_clause:
-        clauses.append(optics_clause)
-        
+    return render_viewing_angle_clause(p.get("viewing_angle", {}))
+
+def _optics(p: Dict[str, Any], clauses: Dict[str, Optional[str]]) -> Optional[str]:
+    return render_optics_clause(p.get("optics"))
+
+def _lighting(p: Dict[str, Any], clauses: Dict[str, Optional[str]]) -> Optional[str]:
     # 8. Lighting
-    lighting = prompt_json.get("lighting", {})
-    lighting_clause = render_lighting_clause(lighting)
-    if lighting_clause:
-        clauses.append(lighting_clause)
+    return render_lighting_clause(p.get("lighting", {}))
 
+def _scene(p: Dict[str, Any], clauses: Dict[str, Optional[str]]) -> Optional[str]:
     # 9. Scene/Background
-    setting = prompt_json.get("setting", {})
-    env = setting.get("environment", "")
-    if env:
-        clauses.append(f"Scene: {env}")
-        
-    return " ".join(clauses)
+    env = p.get("setting", {}).get("environment", "")
+    return f"Scene: {env}" if env else None
+
+CLAUSE_RENDERERS: List[Tuple[str, ClauseRenderer]] = [
+    ("body_profile", _body_profile),
+    ("body_build", _body_build),
+    ("body_components", _body_components),
+    ("age_profile", _age_profile),
+    ("skin_tone", _skin_tone),
+    ("hair_structure", _hair_structure),
+    ("hair_color", _hair_color),
+    ("viewing_angle", _viewing_angle),
+    ("optics", _optics),
+    ("lighting", _lighting),
+    ("scene", _scene),
+]
+
+def render_clause_map(
+    prompt_json: Dict[str, Any],
+    renderers: Optional[List[Tuple[str, ClauseRenderer]]] = None
+) -> Dict[str, Optional[str]]:
+    """
+    Runs every clause renderer once, in order, and returns the clauses keyed
+    by name (None where a renderer produced nothing).
+    """
+    clauses: Dict[str, Optional[str]] = {}
+    for name, renderer in (CLAUSE_RENDERERS if renderers is None else renderers):
+        clauses[name] = renderer(prompt_json, clauses)
+    return clauses
+
+def join_clauses(clauses: Dict[str, Optional[str]]) -> str:
+    """Joins the non-empty clauses of a clause map, in order, into the final prompt."""
+    return " ".join(c for c in clauses.values() if c)
+
+def render_final_prompt(prompt_json: Dict[str, Any]) -> str:
+    """
+    Renders the full natural-language prompt from the merged JSON.
+    This combines the foundation (from base/scene/face/body) with the 
+    modular appearance clauses (skin tone, hair structure, hair color, age).
+    """
+    return join_clauses(render_clause_map(prompt_json))
 
 def enrich_prompt_with_renderings(prompt_json: Dict[str, Any]) -> Dict[str, Any]:
     """
     Adds rendered string fields to the prompt JSON for UI display.
+    The clause map is rendered once; both the joined prompt and the
+    per-clause dictionary are derived from it.
     """
     # Create a copy to avoid mutating the original merged JSON
+    # (metadata is copied too, the merged tree may be shared with a cache)
     enriched = prompt_json.copy()
     
-    # Generate the final string
-    final_prompt_string = render_final_prompt(enriched)
+    clauses = render_clause_map(enriched)
     
     # Add to a new 'metadata' or 'rendered' field
-    if "metadata" not in enriched:
-        enriched["metadata"] = {}
-    
-    enriched["metadata"]["rendered_prompt"] = final_prompt_string
+    enriched["metadata"] = dict(enriched.get("metadata", {}))
+    enriched["metadata"]["rendered_prompt"] = join_clauses(clauses)
     
     # Also add individual clauses for granular UI access
-    appearance = enriched.get("appearance", {})
-    subject = enriched.get("subject", {})
-    
-    bc_clause = render_body_components_clause(enriched.get("body_components"))
-    base_body = render_body_clause(enriched.get("body", {}))
-    
     enriched["metadata"]["clauses"] = {
-        "skin_tone": render_skin_tone_from_appearance(appearance),
-        "hair_structure": render_hair_clause(subject.get("hair", {})),
-        "hair_color": render_hair_color_from_appearance(appearance),
-        "age_profile": render_age_clause(subject),
-        "body": f"{base_body or ''} {bc_clause or ''}".strip()
+        "skin_tone": clauses["skin_tone"],
+        "hair_structure": clauses["hair_structure"],
+        "hair_color": clauses["hair_color"],
+        "age_profile": clauses["age_profile"],
+        "body": f"{clauses['body_profile'] or ''} {clauses['body_components'] or ''}".strip()
     }
     
     return enriched
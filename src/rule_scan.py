@@ -0,0 +1,81 @@
+"""
+Single-pass keyword matching over JSON trees for lint.
+
+KeywordScanner compiles a keyword list into one case-insensitive regex
+shaped like a trie (shared prefixes are factored out), so each string is
+scanned once however many keywords there are. iter_strings walks the keys
+and string leaves of a parsed JSON value with their JSON paths, so a
+component is never re-serialized to be searched.
+"""
+
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+def _trie_pattern(node: Dict[str, Any]) -> str:
+    # "" marks the end of a keyword; greedy branches prefer the longest match
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch != ""]
+    if not branches:
+        return ""
+    alternation = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        return ("(?:" + alternation + ")?") if len(branches) == 1 else alternation + "?"
+    return alternation
+
+class KeywordScanner:
+    """
+    Finds every keyword that occurs as a substring, case-insensitively.
+
+    The compiled pattern is a lookahead, so a match can start at every
+    position; at each one the longest keyword wins, and the shorter keywords
+    it starts with are reported alongside it.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = list(dict.fromkeys(keywords))
+        self._canonical: Dict[str, str] = {}
+        for kw in self.keywords:
+            self._canonical.setdefault(kw.lower(), kw)
+        self._prefixes: Dict[str, List[str]] = {}
+        trie: Dict[str, Any] = {}
+        for lowered in self._canonical:
+            node = trie
+            for ch in lowered:
+                node = node.setdefault(ch, {})
+            node[""] = {}
+        for lowered in self._canonical:
+            self._prefixes[lowered] = [
+                self._canonical[lowered[:i]] for i in range(1, len(lowered) + 1) if lowered[:i] in self._canonical
+            ]
+        self.pattern = re.compile("(?=(" + _trie_pattern(trie) + "))", re.IGNORECASE) if trie else None
+
+    def find(self, text: str) -> Iterator[str]:
+        """Keywords occurring in text, as declared (repeats possible)."""
+        if self.pattern is None:
+            return
+        for m in self.pattern.finditer(text):
+            yield from self._prefixes[m.group(1).lower()]
+
+    def scan(self, value: Any, path: str = "") -> Dict[str, str]:
+        """First JSON path at which each keyword occurs in a parsed JSON value (found at path)."""
+        hits: Dict[str, str] = {}
+        for at, text in iter_strings(value, path):
+            for kw in self.find(text):
+                hits.setdefault(kw, at)
+        return hits
+
+def _join(path: str, key: str) -> str:
+    return f"{path}.{key}" if path else key
+
+def iter_strings(value: Any, path: str = "") -> Iterator[Tuple[str, str]]:
+    """(JSON path, text) for every key and string leaf, depth first."""
+    if isinstance(value, dict):
+        for key, child in value.items():
+            key = str(key)
+            child_path = _join(path, key)
+            yield child_path, key
+            yield from iter_strings(child, child_path)
+    elif isinstance(value, list):
+        for i, child in enumerate(value):
+            yield from iter_strings(child, f"{path}[{i}]")
+    elif isinstance(value, str):
+        yield path or "$", value
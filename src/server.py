@@ -0,0 +1,268 @@
+"""
+Warm build daemon for `avatar-db serve`.
+
+One process keeps the registry, component cache, merge trie, validation
+cache and clause memo warm and serves them over localhost HTTP or a Unix
+socket, one thread per connection (HTTP/1.1 keep-alive). Every endpoint
+takes and returns JSON:
+
+    GET  /health   uptime, request counts and cache statistics
+    POST /build    {"FA", "BT", "ET", "HR", "SC", "ST", "v", "r"} plus optional
+                   "ph_region", "vn_region", "appearance", "age", "overrides",
+                   "include_prompt": builds and records the run
+    POST /render   the same selection without "v"/"r": the merged and
+                   rendered prompt, nothing written
+    POST /batch    {"grid" | "preset", "v", "batch_name"} plus optional
+                   "runs", "strategy", "sample", "seed", "resume": runs the
+                   batch pipeline and writes its manifest
+    POST /lint     {"changed_only"}: registry and component lint
+
+Selection keys may also use registry dimension names (FACE, BODY, ...).
+Builds share the process-wide caches, which are thread-safe; batches and
+lints each run one at a time.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .registry import COMPONENT_CACHE, get_registry, warm_component_cache
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+class RequestError(Exception):
+    """A client error, answered with status (default 400) and the message."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+class BuildService:
+    """The warm state behind the daemon and one method per endpoint."""
+
+    def __init__(self, store=None, store_kind: Optional[str] = None, builds_dir: Optional[str] = None):
+        from .build_store import open_build_store
+        self.store = store or open_build_store(store_kind, builds_dir=builds_dir)
+        self.started = time.time()
+        self.requests: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._batch_lock = threading.Lock()
+        self._lint_lock = threading.Lock()
+
+    def warm(self) -> int:
+        """Loads the registry and every component file; returns the component count."""
+        get_registry()
+        return warm_component_cache()
+
+    def count(self, endpoint: str):
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def health(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        from .merge import VALIDATION_CACHE
+        from .merge_plan import MERGE_TRIE
+        from .render_memo import CLAUSE_MEMO
+        with self._lock:
+            requests = dict(self.requests)
+        return {
+            "status": "ok",
+            "pid": os.getpid(),
+            "uptime_s": round(time.time() - self.started, 3),
+            "requests": requests,
+            "caches": {
+                "components": COMPONENT_CACHE.stats(),
+                "validation": VALIDATION_CACHE.stats(),
+                "merge_trie": MERGE_TRIE.stats(),
+                "clauses": CLAUSE_MEMO.stats()
+            }
+        }
+
+    def build(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        from .builder import build_prompt, parse_selection
+        sel = parse_selection(body, require_run=True)
+        res = build_prompt(*sel["codes"], sel["v"], sel["r"], store=self.store, **sel["options"])
+        if body.get("include_prompt"):
+            res["prompt"] = self.store.get_prompt(res["prompt_hash"])
+        return res
+
+    def render(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        from .builder import compose_prompt, parse_selection
+        sel = parse_selection(body)
+        prompt = compose_prompt(*sel["codes"], **sel["options"])
+        return {"prompt": prompt, "rendered_prompt": prompt["metadata"]["rendered_prompt"]}
+
+    def batch(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        from .batch import batch_jobs, run_jobs
+        from .journal import BatchJournal
+        from .manifest import ManifestWriter
+        if not body.get("v") or not body.get("batch_name"):
+            raise RequestError("Missing required parameters: v, batch_name")
+        if bool(body.get("grid")) == bool(body.get("preset")):
+            raise RequestError("Pass exactly one of grid, preset")
+        planner, jobs, options = batch_jobs(
+            body["v"], grid=body.get("grid"), preset=body.get("preset"),
+            **{k: body.get(k) for k in ["runs", "strategy", "sample", "seed"]}
+        )
+        selection = None
+        if options["strategy"] != "full":
+            from .grid import describe_selection
+            selection = describe_selection(options["strategy"], options["sample"], options["seed"])
+        with self._batch_lock:
+            with ManifestWriter(body["batch_name"], store=self.store, selection=selection) as manifest:
+                with BatchJournal(body["batch_name"], resume=bool(body.get("resume"))) as journal:
+                    for res in run_jobs(jobs, store=self.store, journal=journal):
+                        manifest.write(res)
+        return {
+            "runs": manifest.count,
+            "manifest": manifest.path if manifest.count else None,
+            "reused": journal.reused,
+            "planner": planner.report()
+        }
+
+    def lint(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        from .lint import lint_errors
+        # One lint at a time: they share the on-disk lint cache
+        with self._lint_lock:
+            errors, changed = lint_errors(changed_only=bool(body.get("changed_only")), workers=1)
+        return {"success": not errors, "errors": errors, "changed_components": changed}
+
+    def close(self):
+        self.store.close()
+
+ROUTES: Dict[Tuple[str, str], str] = {
+    ("GET", "/health"): "health",
+    ("POST", "/build"): "build",
+    ("POST", "/render"): "render",
+    ("POST", "/batch"): "batch",
+    ("POST", "/lint"): "lint"
+}
+
+class BuildRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "avatar-db"
+    service: BuildService = None
+    quiet = False
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str):
+        t0 = time.perf_counter()
+        path = self.path.split("?", 1)[0].rstrip("/") or "/"
+        endpoint = ROUTES.get((method, path))
+        try:
+            if endpoint is None:
+                raise RequestError(f"No route for {method} {path}", 404)
+            body = self._read_body()
+            self.service.count(endpoint)
+            status, payload = 200, getattr(self.service, endpoint)(body)
+        except RequestError as e:
+            status, payload = e.status, {"error": str(e)}
+        except FileNotFoundError as e:
+            status, payload = 404, {"error": f"Not found: {e.filename or e}"}
+        except ValueError as e:
+            status, payload = 400, {"error": str(e)}
+        except Exception as e:
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+        self._send(status, payload, time.perf_counter() - t0)
+
+    def _read_body(self) -> Dict[str, Any]:
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            raise RequestError("Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            # The unread body would be parsed as the next keep-alive request
+            self.close_connection = True
+            raise RequestError("Request body too large", 413)
+        if not length:
+            return {}
+        try:
+            body = json.loads(self.rfile.read(length))
+        except ValueError as e:
+            raise RequestError(f"Invalid JSON body: {e}")
+        if not isinstance(body, dict):
+            raise RequestError("Request body must be a JSON object")
+        return body
+
+    def _send(self, status: int, payload: Dict[str, Any], elapsed: float):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("X-Elapsed-Ms", f"{elapsed * 1000:.3f}")
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self) -> str:
+        # Unix socket peers have no (host, port) address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format: str, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        # A socket file left by a previous daemon would make bind fail
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        super().server_bind()
+
+def make_server(service: BuildService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                socket_path: Optional[str] = None, quiet: bool = False):
+    """An HTTP server bound to host:port, or to socket_path when given, serving service."""
+    # Headers and body go out as separate writes; without TCP_NODELAY the
+    # client's delayed ACK adds ~40ms to every keep-alive response
+    handler = type("Handler", (BuildRequestHandler,), {
+        "service": service, "quiet": quiet, "disable_nagle_algorithm": not socket_path
+    })
+    if socket_path:
+        return ThreadingUnixHTTPServer(socket_path, handler)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def server_url(server) -> str:
+    if isinstance(server.server_address, str):
+        return f"unix:{server.server_address}"
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, socket_path: Optional[str] = None,
+          store_kind: Optional[str] = None, builds_dir: Optional[str] = None, quiet: bool = False,
+          ready: Optional[Callable[[Any], None]] = None):
+    service = BuildService(store_kind=store_kind, builds_dir=builds_dir)
+    t0 = time.perf_counter()
+    components = service.warm()
+    server = make_server(service, host, port, socket_path, quiet)
+    print(f"Warmed {components} components in {time.perf_counter() - t0:.2f}s")
+    print(f"Serving on {server_url(server)}", flush=True)
+    if ready:
+        ready(server)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Shutting down", file=sys.stderr)
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+        service.close()
@@ -0,0 +1,130 @@
+"""
+Streaming JSONL builds for `avatar-db build-stream`.
+
+Reads one JSON selection per line (see builder.parse_selection, plus an
+optional "id" echoed back) and writes one JSON result per line, in input
+order:
+
+    {"line": 1, "id": ..., "canonical_id": ..., "run_id": ..., "prompt_hash": ...,
+     "rendered_prompt": ..., "prompt": {...}, "timings": {"compose_ms": ..., "hash_ms": ...}}
+
+or {"line": N, "id": ..., "error": "..."} for a line that cannot be built.
+Prompts go through builder.compose_prompt, the merge and render path of
+build_prompt, and nothing is written under builds/. prompt_hash is the
+hash the build stores would give the prompt.
+
+Input is read lazily. With workers > 1, lines go to a process pool in
+chunks, and at most read_ahead lines are in flight. Results are written
+in input order.
+"""
+
+import sys
+import json
+import time
+import itertools
+from collections import deque
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_READ_AHEAD = 256
+DEFAULT_CHUNK_SIZE = 16
+
+def build_line(number: int, line: str, default_v: Optional[str] = None, include_prompt: bool = True) -> Tuple[str, bool]:
+    """(JSON result line, whether it is an error) for input line number."""
+    from .builder import parse_selection, canonical_id_for, compose_prompt
+    from .prompt_store import PromptStore
+
+    out: Dict[str, Any] = {"line": number}
+    try:
+        data = json.loads(line)
+        if not isinstance(data, dict):
+            raise ValueError("Selection must be a JSON object")
+        if "id" in data:
+            out["id"] = data["id"]
+        sel = parse_selection(data)
+        v = sel["v"] or default_v
+        if not v:
+            raise ValueError("Missing required parameters: v")
+        opts = sel["options"]
+        t0 = time.perf_counter()
+        prompt = compose_prompt(*sel["codes"], **opts)
+        t1 = time.perf_counter()
+        prompt_hash = PromptStore.digest(PromptStore.serialize(prompt))
+        t2 = time.perf_counter()
+    except ValueError as e:
+        out["error"] = str(e)
+        return json.dumps(out), True
+    except Exception as e:
+        # One bad selection must not end the stream
+        out["error"] = f"{type(e).__name__}: {e}"
+        return json.dumps(out), True
+
+    canonical_id = canonical_id_for(
+        *sel["codes"], v, ph_region=opts["ph_region"], vn_region=opts["vn_region"],
+        appearance_code=opts.get("appearance_code", "PORCELAIN_COOL"), age_code=opts["age_code"],
+        **{k: opts[k] for k in ["base_code", "subject_type_code", "skin_code", "pose_code"] if k in opts}
+    )
+    out["canonical_id"] = canonical_id
+    if sel["r"]:
+        out["run_id"] = f"{canonical_id}__r{sel['r']}"
+    out["prompt_hash"] = prompt_hash
+    out["rendered_prompt"] = prompt["metadata"]["rendered_prompt"]
+    if include_prompt:
+        out["prompt"] = prompt
+    out["timings"] = {"compose_ms": round((t1 - t0) * 1000, 3), "hash_ms": round((t2 - t1) * 1000, 3)}
+    return json.dumps(out), False
+
+def _init_worker():
+    from .registry import warm_component_cache
+    # Merge warnings are printed; keep them off the JSONL output stream
+    sys.stdout = sys.stderr
+    warm_component_cache()
+
+def _build_chunk(chunk: List[Tuple[int, str]], default_v: Optional[str], include_prompt: bool) -> List[Tuple[str, bool]]:
+    return [build_line(number, line, default_v, include_prompt) for number, line in chunk]
+
+def _numbered(lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    for number, line in enumerate(lines, 1):
+        if line.strip():
+            yield number, line
+
+def stream_results(
+    lines: Iterable[str], workers: int = 1, read_ahead: int = DEFAULT_READ_AHEAD,
+    chunk_size: int = DEFAULT_CHUNK_SIZE, default_v: Optional[str] = None, include_prompt: bool = True
+) -> Iterator[Tuple[str, bool]]:
+    """(result line, is error) per non-blank input line, in input order."""
+    numbered = _numbered(lines)
+    if workers <= 1:
+        for number, line in numbered:
+            yield build_line(number, line, default_v, include_prompt)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    chunk_size = max(1, min(chunk_size, read_ahead // workers or 1))
+    max_chunks = max(1, read_ahead // chunk_size)
+    chunks = iter(lambda: list(itertools.islice(numbered, chunk_size)), [])
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending = deque(
+            pool.submit(_build_chunk, chunk, default_v, include_prompt)
+            for chunk in itertools.islice(chunks, max_chunks)
+        )
+        while pending:
+            results = pending.popleft().result()
+            for chunk in itertools.islice(chunks, 1):
+                pending.append(pool.submit(_build_chunk, chunk, default_v, include_prompt))
+            yield from results
+
+def run_stream(
+    infile: IO[str], outfile: IO[str], workers: int = 1, read_ahead: int = DEFAULT_READ_AHEAD,
+    chunk_size: int = DEFAULT_CHUNK_SIZE, default_v: Optional[str] = None, include_prompt: bool = True
+) -> Dict[str, int]:
+    """Streams infile selections to outfile results; returns line and error counts."""
+    from contextlib import redirect_stdout
+    counts = {"lines": 0, "errors": 0}
+    # In-process merge warnings go to stderr so stdout stays valid JSONL
+    with redirect_stdout(sys.stderr):
+        for result, is_error in stream_results(infile, workers, read_ahead, chunk_size, default_v, include_prompt):
+            outfile.write(result + "\n")
+            outfile.flush()
+            counts["lines"] += 1
+            counts["errors"] += is_error
+    return counts
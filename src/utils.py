@@ -1,5 +1,6 @@
 import json
 import os
+import hashlib
 from typing import Any, Dict
 
 def deep_merge(base: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
@@ -21,6 +22,40 @@ def deep_merge(base: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
             base[key] = value
     return base
 
+def persistent_merge(base: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    deep_merge semantics without mutation: returns a new dict and leaves
+    base and update untouched. Only the dicts along merged keys are copied;
+    every other subtree is shared with the inputs, so neither the inputs nor
+    the result may be mutated in place afterwards.
+    """
+    result = dict(base)
+    for key, value in update.items():
+        current = result.get(key)
+        if isinstance(value, dict) and isinstance(current, dict):
+            result[key] = persistent_merge(current, value)
+        else:
+            result[key] = value
+    return result
+
+def copy_json(data: Any) -> Any:
+    """
+    Copies a parsed JSON tree (dicts, lists, scalars).
+    Much cheaper than copy.deepcopy since there is no memo or type dispatch.
+    """
+    if isinstance(data, dict):
+        return {k: copy_json(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [copy_json(v) for v in data]
+    return data
+
+def json_fingerprint(data: Any) -> str:
+    """
+    Stable content hash of a JSON tree (key order does not matter).
+    """
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
 def load_json(path: str) -> Dict[str, Any]:
     with open(path, 'r') as f:
         return json.load(f)
@@ -0,0 +1,56 @@
+"""
+Shared pytest fixtures.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import registry
+
+# Components every build merges besides the six grid dimensions
+FIXED_COMPONENTS = {"BASE": ["BASE", "POSTURE_FRAMING"], "APPEARANCE": ["PORCELAIN_COOL"], "NB": ["NB"]}
+
+
+def _default_content(dim, code):
+    return {"setting": {dim.lower(): f"{dim} {code}"}}
+
+
+@pytest.fixture
+def component_tree(tmp_path, monkeypatch):
+    """
+    Factory for a synthetic component tree under tmp_path/components.
+
+    component_tree(grid, content=None) writes one file per code of grid (a
+    spec such as "FA=F1,F2 BT=B1 ..." or {dim: code or [codes]}) plus the
+    fixed base/appearance/negative components, with content(dim, code) as
+    the JSON (default {"setting": {dim: "DIM CODE"}}). The registry module
+    and the environment (for spawned workers) are pointed at the tree;
+    returns its path.
+    """
+    def make(grid, content=None):
+        from src.batch import parse_grid
+        content = content or _default_content
+        if isinstance(grid, str):
+            grid = parse_grid(grid)
+        codes = dict(FIXED_COMPONENTS)
+        codes.update({
+            registry.canonical_dim(dim): [values] if isinstance(values, str) else list(values)
+            for dim, values in grid.items()
+        })
+        components = tmp_path / "components"
+        for dim, values in codes.items():
+            folder = components / registry.DIMENSION_FOLDERS[dim]
+            os.makedirs(folder, exist_ok=True)
+            for code in values:
+                (folder / f"{code}.json").write_text(json.dumps(content(dim, code), indent=2))
+        monkeypatch.setenv("AVATAR_DB_COMPONENTS_DIR", str(components))
+        monkeypatch.setenv("AVATAR_DB_NO_BUNDLE", "1")
+        monkeypatch.setattr(registry, "COMPONENTS_DIR", str(components))
+        monkeypatch.setattr(registry, "BASE_DIR", str(tmp_path))
+        return str(components)
+    return make
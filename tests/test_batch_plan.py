@@ -0,0 +1,77 @@
+"""
+Tests for `batch --plan` estimates (src/batch_plan.py).
+"""
+
+import os
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import builder
+from src.batch import parse_grid, grid_jobs, run_jobs
+from src.batch_plan import plan_batch, format_plan
+from src.build_store import FileBuildStore
+from src.manifest import write_manifest
+
+GRID = "FA=F1,F2,F3 BT=B1 ET=E1,E2 HR=H1,H2 SC=S1 ST=T1"
+
+def _content(dim, code):
+    return {"setting": {dim.lower(): {f"k{i}": f"{dim} {code} value {i}" for i in range(10)}}}
+
+def _dir_stats(path):
+    files, size, inodes = 0, 0, set()
+    for root, _, names in os.walk(path):
+        for name in names:
+            st = os.stat(os.path.join(root, name))
+            files += 1
+            if st.st_ino not in inodes:
+                inodes.add(st.st_ino)
+                size += st.st_size
+    return files, size
+
+def test_plan_matches_real_batch(tmp_path, component_tree):
+    component_tree(GRID, _content)
+    jobs = lambda: grid_jobs(parse_grid(GRID), "01", 3)
+
+    plan = plan_batch(jobs(), sample=4)
+    assert (plan["runs"], plan["prompts"]) == (36, 12)
+    assert plan["calibration"]["builds"] == 4
+    # The plan builds nothing under builds/
+    assert not os.path.exists(tmp_path / "builds")
+
+    builds = tmp_path / "builds"
+    results = list(run_jobs(jobs(), store=FileBuildStore(str(builds))))
+    write_manifest("plan_check", results)
+    files, size = _dir_stats(builds)
+    # Every canonical prompt has its own content here, so the file count is exact
+    assert files == plan["files"]
+    estimate = plan["prompt_bytes"] + plan["run_bytes"] + plan["manifest_bytes"]
+    assert 0.7 * size < estimate < 1.3 * size
+
+    lines = format_plan(plan, "plan_check")
+    assert lines[1].split() == ["Runs:", "36"]
+
+def test_time_estimate_builds_each_prompt_once(component_tree):
+    component_tree(GRID, _content)
+    build_canonical = builder.build_canonical
+
+    def slow_build(*args, **kwargs):
+        # A prompt build that clearly dominates emitting a run
+        time.sleep(0.02)
+        return build_canonical(*args, **kwargs)
+
+    with patch.object(builder, "build_canonical", side_effect=slow_build):
+        plan = plan_batch(grid_jobs(parse_grid(GRID), "01", 10), sample=2)
+    cal = plan["calibration"]
+    assert (plan["prompts"], plan["runs"]) == (12, 120)
+    assert cal["seconds_per_build"] >= 0.02 > cal["seconds_per_emit"]
+    assert plan["seconds"] == 12 * cal["seconds_per_build"] + 120 * cal["seconds_per_emit"]
+    # Charging every run a full build would be ~10x this
+    assert plan["seconds"] < 0.5 * 120 * cal["seconds_per_build"]
+
+if __name__ == "__main__":
+    import pytest
+    # Needs the tmp_path / component_tree fixtures
+    sys.exit(pytest.main([__file__, "-q"]))
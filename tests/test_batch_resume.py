@@ -0,0 +1,80 @@
+"""
+Tests for resumable batches (src/journal.py + batch.run_jobs(journal=...)).
+"""
+
+import json
+import os
+import sys
+from itertools import islice
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import builder
+from src.batch import parse_grid, grid_jobs, run_jobs
+from src.build_store import open_build_store
+from src.journal import BatchJournal
+from src.manifest import write_manifest
+
+GRID = "FA=F1,F2 BT=B1 ET=E1 HR=H1,H2,H3 SC=S1 ST=T1"
+
+def _setup(tmp_path, component_tree):
+    component_tree(GRID)
+    return open_build_store("files", builds_dir=str(tmp_path / "builds"))
+
+def _batch(store, resume, stop_after=None):
+    jobs = grid_jobs(parse_grid(GRID), "01", 1)
+    with BatchJournal("resume_test", resume=resume) as journal:
+        results = list(islice(run_jobs(jobs, store=store, chunk_size=2, journal=journal), stop_after))
+    return results, journal
+
+def test_resume_skips_completed_jobs(tmp_path, component_tree):
+    store = _setup(tmp_path, component_tree)
+    full, _ = _batch(store, resume=False)
+    with open(write_manifest("resume_test", full), 'rb') as f:
+        expected = f.read()
+
+    # Interrupted run: only the first 4 of 6 jobs complete
+    _batch(store, resume=False, stop_after=4)
+    with patch.object(builder, "build_canonical", wraps=builder.build_canonical) as build:
+        resumed, journal = _batch(store, resume=True)
+    assert build.call_count == 2
+    assert (journal.reused, journal.recorded) == (4, 2)
+    with open(write_manifest("resume_test", resumed), 'rb') as f:
+        assert f.read() == expected
+
+def test_changed_inputs_are_rebuilt(tmp_path, component_tree):
+    store = _setup(tmp_path, component_tree)
+    _batch(store, resume=False)
+
+    changed = tmp_path / "components" / "hair" / "H2.json"
+    changed.write_text(json.dumps({"setting": {"hr": "HR H2 (edited)"}}))
+    os.utime(changed, ns=(1, 1))
+    with patch.object(builder, "build_canonical", wraps=builder.build_canonical) as build:
+        _, journal = _batch(store, resume=True)
+    # H2 appears once per face code
+    assert [c.args[3] for c in build.call_args_list] == ["H2", "H2"]
+    assert journal.reused == 4
+
+
+def test_torn_line_survives_repeated_resumes(tmp_path):
+    path = str(tmp_path / "torn.jsonl")
+    with BatchJournal("torn", path=path) as journal:
+        journal.record(0, ["a"], "h0", {})
+        journal.record(1, ["b"], "h1", {})
+    # Crash mid-write of entry 2
+    with open(path, 'a') as f:
+        f.write('{"index": 2, "job": ["c"], "inp')
+
+    with BatchJournal("torn", path=path, resume=True) as journal:
+        assert len(journal) == 2
+        journal.record(2, ["c"], "h2", {})
+        journal.record(3, ["d"], "h3", {})
+    with BatchJournal("torn", path=path, resume=True) as journal:
+        assert len(journal) == 4
+        assert all(journal.lookup(i, [job], f"h{i}") is not None for i, job in enumerate("abcd"))
+
+if __name__ == "__main__":
+    import pytest
+    # Needs the tmp_path / component_tree fixtures
+    sys.exit(pytest.main([__file__, "-q"]))
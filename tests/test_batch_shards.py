@@ -0,0 +1,137 @@
+"""
+Tests for sharded batches and `manifest merge` (batch.shard_jobs, manifest.merge_manifests).
+"""
+
+import csv
+import glob
+import os
+import shutil
+import sys
+
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.batch import parse_grid, grid_jobs, parse_shard, shard_of, shard_jobs
+from src import cli
+from src.cli import build_parser
+from src.manifest import merge_manifests
+
+GRID = "FA=F1,F2,F3 BT=B1 ET=E1,E2 HR=H1,H2 SC=S1 ST=T1"
+
+def _setup(component_tree, monkeypatch):
+    component_tree(GRID)
+    monkeypatch.setenv("AVATAR_DB_STORE", "files")
+
+def _batch(*extra):
+    args = build_parser().parse_args(["batch", "--grid", GRID, "--v", "01", "--runs", "2", "--batch_name", "sweep", *extra])
+    args.handler(args)
+
+def test_shards_partition_jobs():
+    jobs = list(grid_jobs(parse_grid(GRID), "01", 2))
+    shards = [list(shard_jobs(iter(jobs), i, 3)) for i in range(3)]
+    positions = sorted(p for shard in shards for p, _ in shard)
+    assert positions == list(range(len(jobs)))
+    # Runs of one canonical ID never straddle shards
+    owner = {}
+    for i, shard in enumerate(shards):
+        for _, job in shard:
+            assert owner.setdefault(job[:7], i) == i
+    assert shard_of("FA-GOLD__v01", 4) == shard_of("FA-GOLD__v01", 4)
+    with pytest.raises(ValueError):
+        parse_shard("3/3")
+
+def test_merged_shards_match_single_host(tmp_path, component_tree, monkeypatch):
+    _setup(component_tree, monkeypatch)
+    manifests = tmp_path / "builds" / "manifests"
+    _batch()
+    (single,) = glob.glob(str(manifests / "sweep__*.csv"))
+    with open(single, 'rb') as f:
+        expected = f.read()
+    os.remove(single)
+
+    for i in range(3):
+        _batch("--shard", f"{i}/3")
+    shards = sorted(glob.glob(str(manifests / "sweep__*__shard-*of3.csv")))
+    assert len(shards) == 3
+
+    info = merge_manifests(shards)
+    assert info["path"] == single
+    assert info["rows"] == 24
+    with open(single, 'rb') as f:
+        assert f.read() == expected
+
+def test_merge_detects_missing_and_duplicate_shards(tmp_path, component_tree, monkeypatch):
+    _setup(component_tree, monkeypatch)
+    for i in range(2):
+        _batch("--shard", f"{i}/2")
+    shards = sorted(glob.glob(str(tmp_path / "builds" / "manifests" / "*shard*")))
+
+    with pytest.raises(ValueError, match="Missing shards of 2: 1"):
+        merge_manifests(shards[:1])
+
+    copy_dir = tmp_path / "copy"
+    os.makedirs(copy_dir)
+    duplicate = str(copy_dir / os.path.basename(shards[0]))
+    shutil.copy(shards[0], duplicate)
+    with pytest.raises(ValueError, match="Duplicate shard 0/2"):
+        merge_manifests(shards + [duplicate])
+
+def test_merge_detects_rows_lost_at_the_end(tmp_path, component_tree, monkeypatch):
+    _setup(component_tree, monkeypatch)
+    for i in range(3):
+        _batch("--shard", f"{i}/3")
+    shards = sorted(glob.glob(str(tmp_path / "builds" / "manifests" / "*shard*")))
+    # Drop the final two rows (both runs of the last combination) from the shard that holds them
+    def last_position(path):
+        with open(path, newline='') as f:
+            return max((int(row["position"]) for row in csv.DictReader(f)), default=-1)
+    last = max(shards, key=last_position)
+    with open(last) as f:
+        lines = f.read().splitlines(keepends=True)
+    with open(last, 'w') as f:
+        f.writelines(lines[:-2])
+
+    with pytest.raises(ValueError, match=r"Rows missing at positions 22\.\.23"):
+        merge_manifests(shards)
+    assert not glob.glob(str(tmp_path / "builds" / "manifests" / "sweep__????-??-??.csv"))
+
+def test_merge_accepts_shards_started_on_different_days(tmp_path, component_tree, monkeypatch):
+    _setup(component_tree, monkeypatch)
+    with patch("src.cli._batch_jobs", wraps=cli._batch_jobs) as expand:
+        for i in range(2):
+            _batch("--shard", f"{i}/2")
+    # The grid is expanded once per shard
+    assert expand.call_count == 2
+    manifests = tmp_path / "builds" / "manifests"
+    first, second = sorted(glob.glob(str(manifests / "*shard*")))
+    moved = str(manifests / "sweep__2026-01-02__shard-1of2.csv")
+    os.rename(second, moved)
+    os.rename(first, str(manifests / "sweep__2026-01-01__shard-0of2.csv"))
+
+    info = merge_manifests([moved, str(manifests / "sweep__2026-01-01__shard-0of2.csv")])
+    assert info["path"] == str(manifests / "sweep__2026-01-01.csv")
+    assert info["rows"] == 24
+
+def test_merge_rejects_unfinished_shard(tmp_path, component_tree, monkeypatch):
+    _setup(component_tree, monkeypatch)
+    for i in range(2):
+        _batch("--shard", f"{i}/2")
+    shards = sorted(glob.glob(str(tmp_path / "builds" / "manifests" / "*shard*")))
+    # A crashed shard never fills in batch_rows
+    with open(shards[1], newline='') as f:
+        reader = csv.DictReader(f)
+        headers, rows = reader.fieldnames, list(reader)
+    with open(shards[1], 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=headers)
+        writer.writeheader()
+        writer.writerows(dict(row, batch_rows="") for row in rows)
+
+    with pytest.raises(ValueError, match="did not finish"):
+        merge_manifests(shards)
+
+if __name__ == "__main__":
+    test_shards_partition_jobs()
+    print("Shard partition test passed")
@@ -0,0 +1,78 @@
+"""
+Tests for `lint --builds` (src/build_lint.py, CompiledRules.validate_prompt).
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import build_lint, lint
+
+GOOD = {
+    "subject": {"face_anchor": "soft oval", "do_not_change": ["eyes"]},
+    "negative_prompt": "blur",
+    "metadata": {"rendered_prompt": "Hair: long."}
+}
+
+
+def _write_prompts(root, n):
+    folder = root / "prompts"
+    os.makedirs(folder / "nested", exist_ok=True)
+    for i in range(n):
+        prompt = json.loads(json.dumps(GOOD))
+        if i % 3 == 1:
+            del prompt["metadata"]
+        if i % 5 == 2:
+            prompt["subject"]["face_anchor"] = "Korean glam"
+        target = folder / "nested" if i % 2 else folder
+        (target / f"P{i:04d}.json").write_text(json.dumps(prompt))
+    (folder / "broken.json").write_text("{")
+    return folder
+
+
+def test_validate_prompt_classes():
+    rules = lint.compiled_rules()
+    assert rules.validate_prompt(GOOD) == []
+    bad = {"subject": {"face_anchor": "Thai look"}, "mock": 1, "metadata": {"rendered_prompt": " "}}
+    assert [cls for cls, _ in rules.validate_prompt(bad)] == [
+        "invalid_top_level_key", "missing_required_key", "missing_required_key",
+        "missing_rendered_prompt", "ethnicity_term"
+    ]
+    assert rules.validate_prompt(bad)[-1][1].endswith("Found term: Thai (at subject.face_anchor)")
+
+
+def test_report_counts_examples_and_failures(tmp_path):
+    _write_prompts(tmp_path, 30)
+    report_path = tmp_path / "report.json"
+    assert build_lint.run_build_lint(str(tmp_path), workers=1, report_path=str(report_path), examples=2) == 1
+
+    report = json.loads(report_path.read_text())
+    summary = report["summary"]
+    assert summary["files"] == 31
+    assert summary["errors"] == {"missing_rendered_prompt": 10, "ethnicity_term": 6, "unreadable": 1}
+    assert summary["failed"] == len(report["failures"]) == 15
+    assert all(len(examples) <= 2 for examples in summary["examples"].values())
+
+
+def test_parallel_matches_serial(tmp_path):
+    folder = _write_prompts(tmp_path, lint.PARALLEL_THRESHOLD * 3)
+    paths = list(build_lint.iter_prompt_files([str(folder)]))
+    serial = list(build_lint.lint_prompts(paths, workers=1))
+    parallel = list(build_lint.lint_prompts(iter(paths), workers=2, chunk_size=16))
+    assert serial == parallel
+    assert [p for p, _ in serial] == paths
+
+
+def test_clean_builds_pass_and_missing_path_fails(tmp_path, capsys):
+    (tmp_path / "ok.json").write_text(json.dumps(GOOD))
+    assert build_lint.run_build_lint(str(tmp_path / "ok.json"), report_path=None) == 0
+    assert "0 failed" in capsys.readouterr().out
+    assert build_lint.run_build_lint(str(tmp_path / "missing"), report_path=None) == 1
+
+
+if __name__ == "__main__":
+    import pytest
+    # Needs the tmp_path / capsys fixtures
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,127 @@
+"""
+Tests for the build store backends (src/build_store.py).
+"""
+
+import json
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.build_store import FileBuildStore, SQLiteBuildStore
+
+
+def _meta(hr, rating="", r="01", v="01"):
+    return {
+        "timestamp": f"2026-01-0{r[-1]}T10:00:00",
+        "selection_codes": {"FA": "GOLD", "BT": "GOLD", "ET": "GOLD", "HR": hr, "SC": "BEACH_PH", "ST": "POCA",
+                            "APPEARANCE": "PORCELAIN_COOL", "PH_REGION": None, "VN_REGION": None,
+                            "BASE": "BASE", "PF": "POSTURE_FRAMING", "NB": "NB"},
+        "prompt_version": v,
+        "run_id": r,
+        "prompt_json_path": "",
+        "image_path": "",
+        "rating": rating,
+        "notes": ""
+    }
+
+
+def _fill(store):
+    with store.batch():
+        for hr, rating in [("SLEEK_POWER_WOMAN", "5"), ("SLEEK_POWER_WOMAN", "3"), ("MINIMAL_CHIC", "4"), ("SLEEK_POWER_WOMAN", "")]:
+            canonical_id = f"FA-GOLD__HR-{hr}__v01"
+            prompt_hash, _ = store.put_prompt(canonical_id, {"subject": {"hair": {"preset": hr}}})
+            n = len(store.query_runs(codes={"HR": hr})) + 1
+            meta = dict(_meta(hr, rating, r=f"{n:02d}"), prompt_hash=prompt_hash)
+            store.put_run(f"{canonical_id}__r{n:02d}", canonical_id, meta)
+
+
+def test_sqlite_query_by_code_and_rating(tmp_path):
+    store = SQLiteBuildStore(str(tmp_path / "store.sqlite"), str(tmp_path / "builds"))
+    _fill(store)
+    runs = store.query_runs(codes={"HR": "SLEEK_POWER_WOMAN"}, min_rating=4)
+    assert [r["output_id"] for r in runs] == ["FA-GOLD__HR-SLEEK_POWER_WOMAN__v01__r01"]
+    assert len(store.query_runs(min_rating=4)) == 2
+    assert len(store.query_runs(since="2026-01-02")) == 2
+
+    store.set_rating("FA-GOLD__HR-SLEEK_POWER_WOMAN__v01__r03", 4)
+    assert len(store.query_runs(codes={"HR": "SLEEK_POWER_WOMAN"}, min_rating=4)) == 2
+    store.close()
+
+
+def test_sqlite_queries_use_indexes(tmp_path):
+    store = SQLiteBuildStore(str(tmp_path / "store.sqlite"), str(tmp_path / "builds"))
+    plan = " ".join(store.explain("SELECT output_id FROM runs WHERE HR = ? AND rating >= ?", ("X", 4)))
+    assert "USING INDEX idx_runs_hr" in plan
+    plan = " ".join(store.explain("SELECT output_id FROM runs WHERE prompt_version = ?", ("01",)))
+    assert "USING INDEX idx_runs_version" in plan
+    store.close()
+
+
+def test_file_and_sqlite_backends_agree(tmp_path):
+    files = FileBuildStore(str(tmp_path / "files"))
+    db = SQLiteBuildStore(str(tmp_path / "store.sqlite"), str(tmp_path / "exported"))
+    _fill(files)
+    _fill(db)
+
+    query = {"codes": {"HR": "SLEEK_POWER_WOMAN"}, "min_rating": 3}
+    assert files.query_runs(**query) == db.query_runs(**query)
+
+    # Exporting the database reproduces the loose-file layout byte for byte
+    db.export_loose()
+    for sub in ["prompts", "runs"]:
+        a, b = tmp_path / "files" / sub, tmp_path / "exported" / sub
+        assert sorted(os.listdir(a)) == sorted(os.listdir(b))
+        for name in os.listdir(a):
+            assert (a / name).read_bytes() == (b / name).read_bytes()
+    db.close()
+
+
+def test_build_prompt_writes_to_sqlite(tmp_path):
+    from src.builder import build_prompt
+    from src.manifest import write_manifest
+    store = SQLiteBuildStore(str(tmp_path / "store.sqlite"), str(tmp_path / "builds"))
+    with patch("src.builder.load_json", return_value={"setting": {"environment": "Beach"}}), \
+         patch("src.builder.get_component_path", side_effect=lambda dim, code: f"fake/{dim}/{code}.json"), \
+         patch("src.registry.BASE_DIR", str(tmp_path)):
+        with store.batch():
+            results = [build_prompt("GOLD", "GOLD", "GOLD", hr, "GOLD", "GOLD", "01", "01", store=store)
+                       for hr in ["GOLD", "MINIMAL_CHIC"]]
+            write_manifest("sqlite_test", results, store=store)
+
+    assert not os.path.exists(tmp_path / "builds" / "runs")
+    assert [r["selection_codes"]["HR"] for r in store.query_runs(codes={"HR": "MINIMAL_CHIC"})] == ["MINIMAL_CHIC"]
+    assert store.get_prompt(results[0]["prompt_hash"])["setting"]["environment"] == "Beach"
+    rows = store._conn.execute("SELECT output_id FROM manifests WHERE batch_id = 'sqlite_test' ORDER BY position").fetchall()
+    assert [r[0] for r in rows] == [res["run_id"] for res in results]
+    store.close()
+
+
+def test_build_pack_uses_selected_store(tmp_path):
+    from src.cli import build_parser
+    args = build_parser().parse_args(["build-pack", "--SUB", "S", "--STY", "Y", "--v", "01", "--r", "01", "--store", "sqlite"])
+    packs = {"SUB": {"FA": "GOLD", "BT": "GOLD", "ET": "GOLD", "HR": "GOLD"}, "STY": {"SC": "GOLD", "ST": "GOLD"}}
+    seen = {}
+
+    def fake_build(**kwargs):
+        seen["store"] = kwargs["store"]
+        return {"run_id": "x"}
+
+    with patch.dict(os.environ, {"AVATAR_DB_STORE_PATH": str(tmp_path / "store.sqlite")}), \
+         patch("src.registry.get_pack_path", side_effect=lambda kind, code: kind), \
+         patch("src.utils.load_json", side_effect=packs.get), \
+         patch("src.builder.build_prompt", side_effect=fake_build):
+        args.handler(args)
+    assert isinstance(seen["store"], SQLiteBuildStore)
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    for fn in [test_sqlite_query_by_code_and_rating, test_sqlite_queries_use_indexes,
+               test_file_and_sqlite_backends_agree, test_build_prompt_writes_to_sqlite,
+               test_build_pack_uses_selected_store]:
+        with tempfile.TemporaryDirectory() as d:
+            fn(pathlib.Path(d))
+    print("Test passed: build store.")
@@ -0,0 +1,78 @@
+"""
+Tests for streaming JSONL builds (src/stream.py).
+"""
+
+import io
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.build_store import FileBuildStore
+from src.builder import build_prompt
+from src.stream import run_stream, stream_results
+
+SELECTION = {"FA": "F1", "BT": "B1", "ET": "E1", "HR": "H1", "SC": "S1", "ST": "T1"}
+
+
+GRID = {dim: [code, code + "X"] for dim, code in SELECTION.items()}
+
+
+def _lines(n):
+    lines = []
+    for i in range(n):
+        sel = {dim: code + ("X" if (i >> k) & 1 else "") for k, (dim, code) in enumerate(SELECTION.items())}
+        lines.append(json.dumps(dict(sel, id=i, v="01", r=f"{i % 9 + 1:02d}")) + "\n")
+    return lines
+
+
+def test_stream_matches_stored_builds_and_writes_nothing(tmp_path, component_tree):
+    component_tree(GRID)
+    out = io.StringIO()
+    counts = run_stream(io.StringIO("".join(_lines(3))), out)
+    assert counts == {"lines": 3, "errors": 0}
+    assert not os.path.exists(tmp_path / "builds")
+
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [res["id"] for res in results] == [0, 1, 2]
+    store = FileBuildStore(str(tmp_path / "stored"))
+    stored = build_prompt("F1X", "B1", "E1", "H1", "S1", "T1", "01", "02", store=store)
+    assert results[1]["run_id"] == stored["run_id"]
+    assert results[1]["prompt_hash"] == stored["prompt_hash"]
+    assert results[1]["prompt"] == store.get_prompt(stored["prompt_hash"])
+    assert set(results[1]["timings"]) == {"compose_ms", "hash_ms"}
+
+
+def test_bad_lines_are_reported_in_place(component_tree):
+    component_tree(GRID)
+    lines = _lines(2)
+    lines[1:1] = ["not json\n", "\n", json.dumps({"FA": "F1", "id": "short"}) + "\n",
+                  json.dumps(dict(SELECTION, FA="NOPE", v="01")) + "\n", json.dumps(SELECTION) + "\n"]
+    results = [json.loads(line) for line, _ in stream_results(lines, include_prompt=False)]
+    assert [res["line"] for res in results] == [1, 2, 4, 5, 6, 7]
+    assert "error" in results[1]
+    assert results[2] == {"line": 4, "id": "short", "error": "Missing required parameters: BT, ET, HR, SC, ST"}
+    assert results[3]["error"].startswith("FileNotFoundError")
+    assert results[4]["error"] == "Missing required parameters: v"
+    assert "prompt" not in results[0] and "rendered_prompt" in results[0]
+
+    # --v supplies the version for lines without one
+    (res, is_error), = stream_results([json.dumps(SELECTION)], default_v="03")
+    assert not is_error and json.loads(res)["canonical_id"].endswith("v03")
+
+
+def test_parallel_stream_keeps_input_order(component_tree):
+    component_tree(GRID)
+    lines = _lines(40)
+    serial = list(stream_results(lines))
+    parallel = list(stream_results(iter(lines), workers=2, read_ahead=8, chunk_size=3))
+    strip = lambda results: [{k: v for k, v in json.loads(r).items() if k != "timings"} for r, _ in results]
+    assert strip(parallel) == strip(serial)
+    assert [json.loads(r)["id"] for r, _ in parallel] == list(range(40))
+
+
+if __name__ == "__main__":
+    import pytest
+    # Needs the tmp_path / component_tree fixtures
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,62 @@
+"""
+Tests for the single-pass clause pipeline (src/renderer.py).
+"""
+
+import os
+import sys
+from contextlib import ExitStack
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.renderer as renderer
+from src.renderer import enrich_prompt_with_renderings, render_clause_map, render_final_prompt, CLAUSE_RENDERERS
+
+PROMPT = {
+    "subject": {
+        "build": "Lean athletic",
+        "hair": {"enabled": True, "preset": "Sleek Power Woman", "length": "Medium", "texture": "Pin-straight"}
+    },
+    "appearance": {"skin_tone": {"base_tone": "Medium tan"}, "hair_color": {"base_color": "Espresso brunette"}},
+    "viewing_angle": {"camera_distance": "Medium shot"},
+    "lighting": {"primary_light_source": "Sunlight", "quality": "Hard"},
+    "setting": {"environment": "Tropical beach"}
+}
+
+
+def test_each_clause_rendered_once():
+    targets = ["render_hair_clause", "render_hair_color_clause", "render_skin_tone_clause",
+               "render_age_clause", "render_body_clause", "render_body_components_clause"]
+    renderer.CLAUSE_MEMO.clear()
+    with ExitStack() as stack:
+        spies = {t: stack.enter_context(patch.object(renderer, t, wraps=getattr(renderer, t))) for t in targets}
+        enrich_prompt_with_renderings(PROMPT)
+    for name, spy in spies.items():
+        assert spy.call_count <= 1, f"{name} called {spy.call_count} times"
+
+
+def test_prompt_and_clauses_agree():
+    enriched = enrich_prompt_with_renderings(PROMPT)
+    meta = enriched["metadata"]
+    assert meta["rendered_prompt"] == render_final_prompt(PROMPT)
+    assert meta["clauses"]["hair_structure"] in meta["rendered_prompt"]
+    assert meta["clauses"]["hair_color"] in meta["rendered_prompt"]
+    # No body blueprint, so the legacy build field is used in the prompt
+    assert meta["rendered_prompt"].startswith("Lean athletic")
+    assert meta["rendered_prompt"].endswith("Scene: Tropical beach")
+    assert "metadata" not in PROMPT
+
+
+def test_custom_renderer_list():
+    extra = ("mood", lambda p, clauses: f"Mood: {p['overall_mood']}." if p.get("overall_mood") else None)
+    clauses = render_clause_map({**PROMPT, "overall_mood": "Confident"}, CLAUSE_RENDERERS + [extra])
+    assert list(clauses)[-1] == "mood"
+    assert clauses["mood"] == "Mood: Confident."
+    assert clauses["scene"] == "Scene: Tropical beach"
+
+
+if __name__ == "__main__":
+    test_each_clause_rendered_once()
+    test_prompt_and_clauses_agree()
+    test_custom_renderer_list()
+    print("Test passed: clause pipeline.")
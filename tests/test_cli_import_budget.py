@@ -0,0 +1,57 @@
+"""
+Import-time budget for CLI startup.
+Runs the CLI under `python -X importtime` and fails if a command imports
+more modules than tests/import_budget.json allows or loads a forbidden one.
+The max_import_ms wall-clock budget depends on machine load, so it is only
+checked when AVATAR_DB_CHECK_IMPORT_MS=1.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_PATH = os.path.join(ROOT_DIR, "tests", "import_budget.json")
+CHECK_IMPORT_MS = os.environ.get("AVATAR_DB_CHECK_IMPORT_MS") == "1"
+
+with open(BUDGET_PATH) as f:
+    BUDGET = json.load(f)["commands"]
+
+
+def _import_profile(args):
+    """Returns {module: self_us} for every module imported by the CLI invocation."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "src.cli"] + args.split(),
+        cwd=ROOT_DIR, capture_output=True, text=True
+    )
+    errors = "\n".join(line for line in proc.stderr.splitlines() if not line.startswith("import time:"))
+    assert proc.returncode == 0, f"`{args}` exited with {proc.returncode}:\n{errors}"
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(self_us)
+    return modules
+
+
+@pytest.mark.parametrize("command", sorted(BUDGET))
+def test_cli_import_budget(command):
+    budget = BUDGET[command]
+    modules = _import_profile(command)
+    total_ms = sum(modules.values()) / 1000
+
+    loaded = [m for m in budget["forbidden"] if m in modules]
+    assert not loaded, f"`{command}` eagerly imports {loaded}"
+    assert len(modules) <= budget["max_modules"], f"`{command}` imported {len(modules)} modules (budget {budget['max_modules']})"
+    if CHECK_IMPORT_MS:
+        assert total_ms <= budget["max_import_ms"], f"`{command}` spent {total_ms:.1f}ms importing (budget {budget['max_import_ms']}ms)"
+
+
+if __name__ == "__main__":
+    for command in sorted(BUDGET):
+        test_cli_import_budget(command)
+    print("Test passed: CLI import budget.")
@@ -0,0 +1,107 @@
+"""
+Tests for the process-wide component cache (src/registry.py).
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.registry import ComponentCache
+from src.utils import deep_merge
+
+
+def _write(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+
+def test_parses_once_and_counts_hits(tmp_path):
+    path = tmp_path / "FA.json"
+    _write(path, {"subject": {"face_anchor": "soft"}})
+    cache = ComponentCache()
+
+    for _ in range(5):
+        assert cache.get(str(path)) == {"subject": {"face_anchor": "soft"}}
+
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 4
+
+
+def test_revalidates_on_change(tmp_path):
+    path = tmp_path / "HR.json"
+    _write(path, {"subject": {"hair": {"length": "Long"}}})
+    cache = ComponentCache()
+    cache.get(str(path))
+
+    _write(path, {"subject": {"hair": {"length": "Medium", "texture": "Wavy"}}})
+    # Force a distinct mtime even on coarse-grained filesystems
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    assert cache.get(str(path))["subject"]["hair"]["length"] == "Medium"
+    assert cache.stats()["misses"] == 2
+
+
+def test_hash_mode_revalidates_on_content(tmp_path):
+    path = tmp_path / "SC.json"
+    _write(path, {"setting": {"environment": "Beach"}})
+    cache = ComponentCache(validate="hash")
+    cache.get(str(path))
+    _write(path, {"setting": {"environment": "Jungle"}})
+    assert cache.get(str(path))["setting"]["environment"] == "Jungle"
+
+
+def test_lru_eviction(tmp_path):
+    cache = ComponentCache(max_entries=2)
+    paths = []
+    for i in range(3):
+        p = tmp_path / f"{i}.json"
+        _write(p, {"i": i})
+        paths.append(str(p))
+        cache.get(str(p))
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+
+    # Oldest entry was evicted and has to be parsed again
+    cache.get(paths[0])
+    assert cache.stats()["misses"] == 4
+
+
+def test_merge_cannot_corrupt_cached_entry(tmp_path):
+    path = tmp_path / "BASE.json"
+    _write(path, {"lighting": {"quality": "Soft"}, "camera": {"lens": "85mm"}})
+    cache = ComponentCache()
+
+    result = deep_merge({}, cache.get(str(path)))
+    deep_merge(result, {"lighting": {"quality": "Hard"}})
+    result["camera"]["lens"] = "135mm"
+
+    assert cache.get(str(path)) == {"lighting": {"quality": "Soft"}, "camera": {"lens": "85mm"}}
+
+
+def test_missing_file_defers_to_loader(tmp_path):
+    cache = ComponentCache()
+    calls = []
+
+    def loader(path):
+        calls.append(path)
+        return {"mock": "data"}
+
+    assert cache.get(str(tmp_path / "missing.json"), loader=loader) == {"mock": "data"}
+    assert calls and cache.stats()["entries"] == 0
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    for fn in [test_parses_once_and_counts_hits, test_revalidates_on_change,
+               test_hash_mode_revalidates_on_content, test_lru_eviction,
+               test_merge_cannot_corrupt_cached_entry, test_missing_file_defers_to_loader]:
+        with tempfile.TemporaryDirectory() as d:
+            fn(pathlib.Path(d))
+    print("Test passed: component cache.")
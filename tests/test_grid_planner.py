@@ -0,0 +1,78 @@
+"""
+Tests for the constraint-aware grid planner (src/planner.py).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.batch import parse_grid, grid_jobs
+from src.planner import Constraint, GridPlanner, load_constraints
+
+RULES = [
+    Constraint("ph_region_requires_ph", when={"PH_REGION": "*"}, requires={"ET": ["PH"]}),
+    Constraint("no_bikini_in_studio", when={"SC": ["STUDIO"]}, excludes={"ST": ["BIKINI"]}),
+]
+
+def _sel(**codes):
+    base = {"FA": "GOLD", "BT": "GOLD", "ET": "PH", "HR": "GOLD", "SC": "BEACH", "ST": "BIKINI"}
+    base.update(codes)
+    return base
+
+
+def test_requires_and_excludes():
+    planner = GridPlanner(RULES, check_components=False)
+    assert planner.check(_sel(PH_REGION="ILOCOS")) is None
+    assert planner.check(_sel(ET="VN", PH_REGION="ILOCOS")) == "ph_region_requires_ph: ET=VN not allowed"
+    # Rules only apply when their "when" dimensions are present
+    assert planner.check(_sel(ET="VN")) is None
+    assert planner.check(_sel(SC="STUDIO")) == "no_bikini_in_studio: ST=BIKINI excluded"
+    assert planner.check(_sel(SC="STUDIO", ST="POCA")) is None
+
+
+def test_shipped_rules_couple_regions_to_ethnicity():
+    planner = GridPlanner(load_constraints(), check_components=False)
+    assert planner.check(_sel(ET="EA", VN_REGION="HANOI")).startswith("vn_region_requires_vn")
+    assert planner.check(_sel(ET="PH", PH_REGION="BICOL")) is None
+
+
+def test_missing_components_are_pruned_with_report(component_tree):
+    component_tree("FA=F1,F2 BT=B1 ET=E1 HR=H1 SC=S1 ST=T1")
+
+    planner = GridPlanner([])
+    jobs = list(grid_jobs(parse_grid("FA=F1,F2,F3 BT=B1 ET=E1 HR=H1,H2 SC=S1 ST=T1"), "01", 2, planner=planner))
+    assert {(job[0], job[3]) for job in jobs} == {("F1", "H1"), ("F2", "H1")}
+    assert len(jobs) == 4
+    assert planner.kept == 2
+    # The first missing component in merge order (FA before HR) is reported
+    assert planner.dropped == {"missing component: HR=H2": 2, "missing component: FA=F3": 2}
+    assert planner.report()[0] == "Planner: 2/6 combinations kept, 4 dropped"
+
+
+def test_shipped_rules_prune_grid_region_axes(tmp_path, component_tree):
+    from src.batch import run_jobs
+    from src.build_store import FileBuildStore
+    grid = "FA=F1 BT=B1 ET=PH,VN,EA HR=H1 SC=S1 ST=T1 PH_REGION=-,ILOCOS VN_REGION=-,HANOI"
+    component_tree(grid.replace("-,", ""))
+
+    planner = GridPlanner(load_constraints())
+    jobs = list(grid_jobs(parse_grid(grid), "01", 1, planner=planner))
+    assert [(job[2],) + job[8:] for job in jobs] == [
+        ("PH", None, None), ("PH", "ILOCOS", None), ("VN", None, None), ("VN", None, "HANOI"), ("EA", None, None)
+    ]
+    assert planner.dropped == {
+        "ph_region_requires_ph: ET=VN not allowed": 2, "ph_region_requires_ph: ET=EA not allowed": 2,
+        "vn_region_requires_vn: ET=PH not allowed": 2, "vn_region_requires_vn: ET=EA not allowed": 1
+    }
+
+    results = list(run_jobs(jobs, store=FileBuildStore(str(tmp_path / "builds"))))
+    assert "PH_REGION-ILOCOS" in results[1]["run_id"]
+    assert results[1]["meta"]["selection_codes"]["PH_REGION"] == "ILOCOS"
+    assert results[1]["prompt_hash"] != results[0]["prompt_hash"]
+
+
+if __name__ == "__main__":
+    test_requires_and_excludes()
+    test_shipped_rules_couple_regions_to_ethnicity()
+    print("Grid planner tests passed")
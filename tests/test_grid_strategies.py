@@ -0,0 +1,74 @@
+"""
+Tests for grid expansion strategies (src/grid.py).
+"""
+
+import csv
+import itertools
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.grid import expand_grid, grid_size, describe_selection
+from src.manifest import ManifestWriter
+
+VALUES = [[f"{dim}{i}" for i in range(n)] for dim, n in zip(["FA", "BT", "ET", "HR", "SC", "ST"], [10, 6, 8, 12, 6, 5])]
+
+
+def test_pairwise_covers_every_pair():
+    rows = list(expand_grid(VALUES, "pairwise", seed=7))
+    for a, b in itertools.combinations(range(len(VALUES)), 2):
+        covered = {(row[a], row[b]) for row in rows}
+        assert covered == set(itertools.product(VALUES[a], VALUES[b]))
+    # A tiny fraction of the 172,800-combination product
+    assert len(rows) < grid_size(VALUES) / 1000
+
+
+def test_random_sample_is_seeded_and_distinct():
+    rows = list(expand_grid(VALUES, "random", sample=50, seed=3))
+    assert len(set(rows)) == 50
+    assert rows == list(expand_grid(VALUES, "random", sample=50, seed=3))
+    assert rows != list(expand_grid(VALUES, "random", sample=50, seed=4))
+    assert all(code in VALUES[d] for row in rows for d, code in enumerate(row))
+
+
+def test_random_sample_beyond_maxsize():
+    huge = [[f"{dim}{i}" for i in range(1000)] for dim in "ABCDEFGH"]
+    assert grid_size(huge) > sys.maxsize
+    rows = list(expand_grid(huge, "random", sample=100, seed=5))
+    assert len(set(rows)) == 100
+    # Product order
+    assert rows == sorted(rows, key=lambda row: [int(code[1:]) for code in row])
+
+
+def test_stratified_covers_every_code():
+    rows = list(expand_grid(VALUES, "stratified", seed=1))
+    assert len(rows) == 12
+    for d, codes in enumerate(VALUES):
+        assert {row[d] for row in rows} == set(codes)
+
+
+def test_full_is_product_order():
+    small = [["A", "B"], ["X", "Y"]]
+    assert list(expand_grid(small)) == [("A", "X"), ("A", "Y"), ("B", "X"), ("B", "Y")]
+
+
+def test_selection_recorded_in_manifest(tmp_path):
+    res = {
+        "run_id": "FA-A__v01__r01", "prompt_path": "p.json", "run_path": "r.json",
+        "meta": {"selection_codes": dict.fromkeys(["FA", "BT", "ET", "HR", "SC", "ST"], "A"),
+                 "prompt_version": "01", "run_id": "01", "image_path": "", "rating": "", "notes": ""}
+    }
+    path = str(tmp_path / "m.csv")
+    with ManifestWriter("sampled", path=path, selection=describe_selection("random", 50, 3)) as manifest:
+        manifest.write(res)
+    with open(path, newline='') as f:
+        assert [row["selection"] for row in csv.DictReader(f)] == ["random k=50 seed=3"]
+
+
+if __name__ == "__main__":
+    test_pairwise_covers_every_pair()
+    test_random_sample_is_seeded_and_distinct()
+    test_stratified_covers_every_code()
+    test_full_is_product_order()
+    print("Grid strategy tests passed")
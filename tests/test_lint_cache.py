@@ -0,0 +1,122 @@
+"""
+Tests for incremental lint (src/lint.py LintCache / run_lint).
+"""
+
+import json
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import lint
+from src.registry import Registry
+
+GOOD_FA = {"subject": {"face_anchor": "soft", "do_not_change": ["eyes"]}}
+
+
+def _catalog(tmp_path, n=6):
+    codes = {"FACE": {}, "HAIR": {}}
+    for i in range(n):
+        dim, folder = ("FACE", "face") if i % 2 == 0 else ("HAIR", "hair")
+        code = f"C{i}"
+        os.makedirs(tmp_path / "components" / folder, exist_ok=True)
+        content = GOOD_FA if dim == "FACE" else {"subject": {"hair": {"length": "long"}}}
+        (tmp_path / "components" / folder / f"{code}.json").write_text(json.dumps(content))
+        codes[dim][code] = {"code": code, "status": "active"}
+    (tmp_path / "codes.json").write_text(json.dumps(codes))
+    return lambda: Registry.load(str(tmp_path / "codes.json"), str(tmp_path / "components"))
+
+
+def _lint(registry, tmp_path, **kwargs):
+    return lint.run_lint(registry=registry(), cache_path=str(tmp_path / "lint-cache.json"), workers=1, **kwargs)
+
+
+def test_unchanged_files_are_not_revalidated(tmp_path):
+    registry = _catalog(tmp_path)
+    with patch("src.lint.validate_component", wraps=lint.validate_component) as validate:
+        assert _lint(registry, tmp_path) == 0
+        assert validate.call_count == 6
+        assert _lint(registry, tmp_path) == 0
+        assert validate.call_count == 6
+
+        # An edit invalidates just that file, and its new errors are reported
+        path = tmp_path / "components" / "face" / "C2.json"
+        path.write_text(json.dumps({"subject": {"face_anchor": "Korean glam", "do_not_change": []}}))
+        assert _lint(registry, tmp_path) == 1
+        assert validate.call_count == 7
+
+
+def test_touched_but_unchanged_file_reuses_result(tmp_path):
+    registry = _catalog(tmp_path)
+    _lint(registry, tmp_path)
+    os.utime(tmp_path / "components" / "hair" / "C1.json", ns=(1, 1))
+    with patch("src.lint.validate_component", wraps=lint.validate_component) as validate:
+        _lint(registry, tmp_path)
+    assert validate.call_count == 0
+
+
+def test_rules_change_discards_cache(tmp_path):
+    registry = _catalog(tmp_path)
+    _lint(registry, tmp_path)
+    with patch.object(lint, "LINT_RULES_VERSION", lint.LINT_RULES_VERSION + 1), \
+         patch("src.lint.validate_component", wraps=lint.validate_component) as validate:
+        _lint(registry, tmp_path)
+    assert validate.call_count == 6
+
+
+def test_changed_only_lints_git_changes(tmp_path, capsys):
+    registry = _catalog(tmp_path)
+    changed = {os.path.abspath(tmp_path / "components" / "hair" / "C3.json")}
+    with patch("src.lint.git_changed_paths", return_value=changed), \
+         patch("src.lint.validate_component", wraps=lint.validate_component) as validate:
+        assert _lint(registry, tmp_path, changed_only=True) == 0
+    assert validate.call_count == 1
+    assert "Linted 1 changed components" in capsys.readouterr().out
+
+
+def test_parallel_matches_serial(tmp_path):
+    registry = _catalog(tmp_path, n=lint.PARALLEL_THRESHOLD + 6)
+    tasks = [(registry().path(dim, code), dim, code, f"{dim}-{code}") for dim, code, _ in registry().items()]
+    serial = lint.lint_components(tasks, workers=1)
+    parallel = lint.lint_components(tasks, workers=2)
+    assert serial == parallel
+
+
+def test_concurrent_saves_do_not_collide(tmp_path):
+    import threading
+    path = str(tmp_path / "lint-cache.json")
+    errors = []
+
+    def save(i):
+        cache = lint.LintCache(path)
+        for n in range(20):
+            cache.entries[f"{i}-{n}"] = {"errors": []}
+            cache._dirty = True
+            try:
+                cache.save()
+            except OSError as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=save, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    with open(path) as f:
+        assert json.load(f)["rules"] == lint.rules_fingerprint()
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_missing_file_is_reported_once(tmp_path):
+    registry = _catalog(tmp_path)
+    os.remove(tmp_path / "components" / "hair" / "C3.json")
+    errors, _ = lint.lint_errors(registry=registry(), cache_path=str(tmp_path / "lint-cache.json"), workers=1)
+    reported = [e for e in errors if "C3" in e]
+    assert len(reported) == 1 and reported[0].startswith("Registry ERROR [HAIR-C3] Missing component file")
+
+if __name__ == "__main__":
+    import pytest
+    # Needs the tmp_path / capsys fixtures
+    sys.exit(pytest.main([__file__, "-q"]))
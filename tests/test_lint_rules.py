@@ -0,0 +1,78 @@
+"""
+Tests for the compiled lint rules (src/rule_scan.py, src/lint.py CompiledRules).
+"""
+
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import lint
+from src.rule_scan import KeywordScanner, iter_strings
+
+
+def test_scanner_matches_naive_substring_search():
+    rng = random.Random(7)
+    alphabet = "abc"
+    keywords = sorted({"".join(rng.choice(alphabet) for _ in range(rng.randint(1, 5))) for _ in range(40)})
+    scanner = KeywordScanner(keywords)
+    for _ in range(200):
+        text = "".join(rng.choice(alphabet + alphabet.upper()) for _ in range(rng.randint(0, 30)))
+        expected = {kw for kw in keywords if kw in text.lower()}
+        assert set(scanner.find(text)) == expected, text
+
+
+def test_overlapping_and_prefix_keywords_are_all_reported():
+    scanner = KeywordScanner(lint.ETHNICITY_KEYWORDS)
+    assert set(scanner.find("a CAUCASIAN latina")) == {"Caucasian", "Asian", "Latina"}
+    assert set(KeywordScanner(["Latin", "Latina"]).find("latina")) == {"Latin", "Latina"}
+
+
+def test_iter_strings_reports_json_paths_for_keys_and_leaves():
+    content = {"subject": {"face_anchor": "soft", "do_not_change": ["eyes", 3]}}
+    assert list(iter_strings(content)) == [
+        ("subject", "subject"),
+        ("subject.face_anchor", "face_anchor"),
+        ("subject.face_anchor", "soft"),
+        ("subject.do_not_change", "do_not_change"),
+        ("subject.do_not_change[0]", "eyes"),
+    ]
+
+
+def test_validate_component_reports_hit_paths():
+    content = {"subject": {"face_anchor": "soft Korean glam", "do_not_change": ["Thai nose"]}}
+    assert lint.validate_component("FA", "X", content) == [
+        "[FA-X] FA module must be ethnicity-neutral. Found term: Korean (at subject.face_anchor)",
+        "[FA-X] FA module must be ethnicity-neutral. Found term: Thai (at subject.do_not_change[0])",
+    ]
+
+
+def test_boundary_style_and_required_rules():
+    assert lint.validate_component("SC", "S", {"subject": {"face_anchor": "x"}, "bogus": 1}) == [
+        "[SC-S] Invalid top-level key: bogus",
+        "[SC-S] Dimension SC not allowed to write to top-level key: bogus",
+        "[SC-S] Style dimension SC prohibited from writing to subject.face_anchor",
+    ]
+    assert lint.validate_component("FA", "F", {"subject": {"face_anchor": "x"}}) == [
+        "[FA-F] Missing required key: subject.do_not_change"
+    ]
+    assert lint.validate_component("NB", "N", {}) == ["[NB-N] Missing required key: negative_prompt"]
+
+
+def test_metadata_errors():
+    rules = lint.compiled_rules()
+    assert rules.metadata_errors("FA", "F", {"label": "Japanese doll"}) == [
+        "Registry ERROR [FA-F]: Metadata must be ethnicity-neutral. Found term: Japanese (at label)"
+    ]
+    assert rules.metadata_errors("HR", "H", {"label": "Japanese bob"}) == []
+
+
+if __name__ == "__main__":
+    test_scanner_matches_naive_substring_search()
+    test_overlapping_and_prefix_keywords_are_all_reported()
+    test_iter_strings_reports_json_paths_for_keys_and_leaves()
+    test_validate_component_reports_hit_paths()
+    test_boundary_style_and_required_rules()
+    test_metadata_errors()
+    print("Test passed: compiled lint rules.")
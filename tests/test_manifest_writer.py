@@ -0,0 +1,81 @@
+"""
+Tests for the streaming manifest writer (src/manifest.py).
+"""
+
+import csv
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.manifest import ManifestWriter
+from src.build_store import SQLiteBuildStore
+
+
+def _result(i):
+    return {
+        "run_id": f"FA-GOLD__HR-H{i}__v01__r01",
+        "prompt_path": f"builds/prompts/FA-GOLD__HR-H{i}__v01.json",
+        "run_path": f"builds/runs/FA-GOLD__HR-H{i}__v01__r01.json",
+        "meta": {
+            "selection_codes": {"FA": "GOLD", "BT": "GOLD", "ET": "GOLD", "HR": f"H{i}", "SC": "GOLD", "ST": "GOLD"},
+            "prompt_version": "01", "run_id": "01", "image_path": "", "rating": "", "notes": ""
+        }
+    }
+
+
+def _rows(path):
+    with open(path, newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def test_rows_visible_while_batch_runs(tmp_path):
+    path = str(tmp_path / "manifests" / "stream.csv")
+    with ManifestWriter("stream", path=path, fsync_every=2) as manifest:
+        for i in range(3):
+            manifest.write(_result(i))
+            assert [r["HR"] for r in _rows(path)] == [f"H{j}" for j in range(i + 1)]
+    assert manifest.count == 3
+
+
+def test_partial_manifest_survives_crash(tmp_path):
+    path = str(tmp_path / "crash.csv")
+    try:
+        with ManifestWriter("crash", path=path) as manifest:
+            for i in range(5):
+                if i == 3:
+                    raise RuntimeError("build failed")
+                manifest.write(_result(i))
+    except RuntimeError:
+        pass
+    assert [r["output_id"] for r in _rows(path)] == [_result(i)["run_id"] for i in range(3)]
+
+
+def test_empty_batch_writes_no_file(tmp_path):
+    path = str(tmp_path / "empty.csv")
+    with ManifestWriter("empty", path=path) as manifest:
+        pass
+    assert manifest.count == 0
+    assert not os.path.exists(path)
+
+
+def test_store_receives_rows_in_chunks(tmp_path):
+    store = SQLiteBuildStore(str(tmp_path / "store.sqlite"), str(tmp_path / "builds"))
+    path = str(tmp_path / "chunks.csv")
+    with patch.object(store, "put_manifest", wraps=store.put_manifest) as put:
+        with ManifestWriter("chunks", store=store, path=path, fsync_every=4) as manifest:
+            for i in range(10):
+                manifest.write(_result(i))
+    assert [len(c.args[2]) for c in put.call_args_list] == [4, 4, 2]
+    rows = store._conn.execute("SELECT output_id FROM manifests WHERE batch_id = 'chunks' ORDER BY position").fetchall()
+    assert [r[0] for r in rows] == [_result(i)["run_id"] for i in range(10)]
+    store.close()
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    with tempfile.TemporaryDirectory() as d:
+        test_rows_visible_while_batch_runs(Path(d))
+    print("Manifest streaming test passed")
@@ -0,0 +1,79 @@
+"""
+Tests for the prefix-sharing merge cache (src/merge_plan.py).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.merge import merge_prompts
+from src.merge_plan import MergeTrie
+from src.utils import copy_json
+
+BASE = {"camera": {"lens": "85mm", "angle": "eye level"}, "lighting": {"quality": "Soft"}}
+SCENES = {
+    "BEACH": {"setting": {"environment": "Beach"}, "lighting": {"quality": "Hard"}},
+    "JUNGLE": {"setting": {"environment": "Jungle"}}
+}
+HAIR = {
+    "ST": {"subject": {"hair": {"length": "Long", "constraints": ["No flyaways"]}}},
+    "BOB": {"subject": {"hair": {"length": "Short"}}}
+}
+FACE = {"subject": {"face_anchor": "soft", "do_not_change": ["eyes"]}}
+
+
+def _combo(sc, hr):
+    dims = ["BASE", "SC", "FA", "HR"]
+    return [BASE, SCENES[sc], FACE, HAIR[hr]], dims
+
+
+def test_matches_naive_merge():
+    trie = MergeTrie()
+    for sc in SCENES:
+        for hr in HAIR:
+            comps, dims = _combo(sc, hr)
+            expected = merge_prompts({}, [copy_json(c) for c in comps], dims)
+            assert trie.merge(comps, dims) == expected
+            assert trie.merge(comps, dims, copy=False) == expected
+
+
+def test_only_suffix_is_merged():
+    trie = MergeTrie()
+    trie.merge(*_combo("BEACH", "ST"))
+    assert trie.stats()["steps_merged"] == 4
+
+    # Same BASE -> SC -> FA prefix, only HR differs
+    trie.merge(*_combo("BEACH", "BOB"))
+    stats = trie.stats()
+    assert stats["steps_merged"] == 5
+    assert stats["steps_reused"] == 3
+
+
+def test_inputs_and_cache_are_never_mutated():
+    before = copy_json(BASE), copy_json(SCENES), copy_json(HAIR)
+    trie = MergeTrie()
+    result = trie.merge(*_combo("BEACH", "ST"))
+    result["lighting"]["quality"] = "Mutated"
+    result["subject"]["hair"]["constraints"].append("Mutated")
+
+    assert (BASE, SCENES, HAIR) == before
+    assert trie.merge(*_combo("BEACH", "ST"))["lighting"]["quality"] == "Hard"
+
+
+def test_prune_bounds_node_count():
+    trie = MergeTrie(max_nodes=6)
+    for sc in SCENES:
+        for hr in HAIR:
+            trie.merge(*_combo(sc, hr))
+    stats = trie.stats()
+    assert stats["prunes"] >= 1
+    assert stats["nodes"] <= 6
+
+
+if __name__ == "__main__":
+    test_matches_naive_merge()
+    test_only_suffix_is_merged()
+    test_inputs_and_cache_are_never_mutated()
+    test_prune_bounds_node_count()
+    print("Test passed: merge trie.")
@@ -0,0 +1,89 @@
+"""
+Tests for the structural-sharing persistent merge (src/utils.py, src/merge.py).
+"""
+
+import os
+import sys
+import tracemalloc
+from itertools import product
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.merge import merge_prompts
+from src.utils import persistent_merge, deep_merge, copy_json, json_fingerprint
+
+
+def _component(tag, size=6):
+    return {f"{tag}_{i}": {"value": f"{tag} value {i}", "tags": [f"{tag}-{j}" for j in range(2)]} for i in range(size)}
+
+
+def test_matches_deep_merge_without_mutation():
+    base = {"subject": {"hair": {"length": "Long", "color": "Black"}, "face_anchor": "soft"}, "camera": {"lens": "85mm"}}
+    update = {"subject": {"hair": {"length": "Short"}, "build": "Athletic"}, "lighting": {"quality": "Hard"}}
+    base_before, update_before = copy_json(base), copy_json(update)
+
+    result = persistent_merge(base, update)
+
+    assert result == deep_merge(copy_json(base), copy_json(update))
+    assert base == base_before and update == update_before
+
+
+def test_untouched_subtrees_are_shared():
+    base = {"camera": {"lens": "85mm"}, "subject": {"hair": {"length": "Long"}, "face_anchor": "soft"}}
+    update = {"subject": {"hair": {"length": "Short"}}}
+    result = persistent_merge(base, update)
+
+    # Unchanged branches are the same objects; only the merged path is new
+    assert result["camera"] is base["camera"]
+    assert result["subject"] is not base["subject"]
+    assert result["subject"]["hair"] is not base["subject"]["hair"]
+
+
+def test_merge_prompts_persistent_mode():
+    comps = [{"camera": {"lens": "85mm"}}, {"setting": {"environment": "Beach"}}, {"negative_prompt": ["blur"]}]
+    dims = ["BASE", "SC", "NB"]
+    before = copy_json(comps)
+    assert merge_prompts({}, comps, dims, persistent=True) == merge_prompts({}, copy_json(comps), dims)
+    assert comps == before
+
+
+def test_in_memory_batch_memory_drops():
+    """10k merged prompts held in memory: persistent mode must use far less."""
+    base = _component("base")
+    scenes = [{"setting": _component(f"sc{i}")} for i in range(10)]
+    faces = [{"subject": {"face": _component(f"fa{i}", 2)}} for i in range(10)]
+    hairs = [{"subject": {"hair": _component(f"hr{i}", 2)}} for i in range(10)]
+    outfits = [{"clothing": _component(f"st{i}", 2)} for i in range(10)]
+    combos = list(product(scenes, faces, hairs, outfits))
+    assert len(combos) == 10_000
+    dims = ["BASE", "SC", "FA", "HR", "ST"]
+    # Fingerprints come from the component cache in real builds
+    fps = {id(c): json_fingerprint(c) for c in [base, *scenes, *faces, *hairs, *outfits]}
+
+    def peak(persistent):
+        tracemalloc.start()
+        batch = []
+        for c in combos:
+            comps = [base, *c]
+            fingerprints = [fps[id(x)] for x in comps]
+            if not persistent:
+                # Copy-per-build, as components were handed out before
+                comps = [copy_json(x) for x in comps]
+            batch.append(merge_prompts({}, comps, dims, fingerprints, persistent=persistent))
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert len(batch) == 10_000
+        return peak_bytes
+
+    naive_peak = peak(False)
+    persistent_peak = peak(True)
+    print(f"naive peak {naive_peak / 1e6:.1f}MB, persistent peak {persistent_peak / 1e6:.1f}MB")
+    assert persistent_peak < naive_peak * 0.25, f"persistent {persistent_peak} vs naive {naive_peak}"
+
+
+if __name__ == "__main__":
+    test_matches_deep_merge_without_mutation()
+    test_untouched_subtrees_are_shared()
+    test_merge_prompts_persistent_mode()
+    test_in_memory_batch_memory_drops()
+    print("Test passed: persistent merge.")
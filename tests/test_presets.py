@@ -0,0 +1,135 @@
+"""
+Tests for declarative presets (src/presets.py) and Registry.select.
+"""
+
+import json
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import presets
+from src.presets import Preset, load_preset, list_presets
+from src.registry import Registry
+
+CODES = {
+    "FACE": {c: {"code": c, "status": s} for c, s in [
+        ("SG-PH-A", "active"), ("MB-VN-A", "active"), ("GOLD", "active"),
+        ("SG-PH-B", "draft"), ("SGX", "active"), ("MB-PH-C", "active")
+    ]},
+    "ETHNICITY": {c: {"code": c, "status": "active"} for c in ["VN", "EA", "PH"]},
+    "BODY": {"AL": {"status": "active"}},
+    "HAIR": {"ST": {"status": "active"}, "WV": {"status": "active"}},
+    "BACKGROUND": {"DOOR": {"status": "active"}},
+    "OUTFIT": {"POCA": {"status": "active"}},
+}
+
+
+def test_select_filters_use_indexes_and_keep_registry_order():
+    registry = Registry(CODES)
+    assert registry.select("FA", prefix=["SG-", "MB-"]) == ["SG-PH-A", "MB-VN-A", "SG-PH-B", "MB-PH-C"]
+    assert registry.select("FA", prefix=["SG-"], status=["active"]) == ["SG-PH-A"]
+    assert registry.select("FA", regex=r".*-PH-.") == ["SG-PH-A", "SG-PH-B", "MB-PH-C"]
+    assert registry.select("FA", codes=["GOLD", "NOPE"]) == ["GOLD"]
+    assert registry.select("HR") == ["ST", "WV"]
+    assert registry.with_prefix("FA", "SG") == ["SG-PH-A", "SG-PH-B", "SGX"]
+    assert registry.codes("FA", status="draft") == ["SG-PH-B"]
+
+
+def test_face_pass_preset_compiles_to_the_old_hard_coded_selection():
+    preset = load_preset("face_pass")
+    grid = preset.compile(Registry(CODES))
+    assert grid == {
+        "FA": ["SG-PH-A", "MB-VN-A", "SG-PH-B", "MB-PH-C"], "BT": ["AL"], "ET": ["EA", "PH"],
+        "HR": ["ST"], "SC": ["DOOR"], "ST": ["POCA"]
+    }
+    jobs = list(preset.jobs("01", registry=Registry(CODES), runs=2))
+    assert len(jobs) == 4 * 2 * 2
+    assert jobs[:2] == [("SG-PH-A", "AL", "EA", "ST", "DOOR", "POCA", "01", "01"),
+                        ("SG-PH-A", "AL", "EA", "ST", "DOOR", "POCA", "01", "02")]
+    assert "face_pass" in list_presets()
+
+
+def test_preset_options_are_defaults_for_flags(tmp_path):
+    path = tmp_path / "sampled.json"
+    path.write_text(json.dumps({
+        "fixed": {"BT": "AL", "ET": "PH", "SC": "DOOR", "ST": "POCA"},
+        "vary": {"FA": {"status": "active"}, "HR": {}},
+        "runs": 3, "strategy": "random", "sample": 2, "seed": 5
+    }))
+    preset = load_preset(str(path))
+    assert preset.name == "sampled"
+    registry = Registry(CODES)
+    assert len(list(preset.jobs("01", registry=registry))) == 2 * 3
+    assert len(list(preset.jobs("01", registry=registry, runs=1, strategy="full"))) == 5 * 2
+
+
+def test_preset_region_axes_reach_the_planner():
+    from src.planner import GridPlanner, load_constraints
+    preset = Preset.from_dict({
+        "fixed": {"FA": "GOLD", "BT": "AL", "HR": "ST", "SC": "DOOR", "ST": "POCA", "VN_REGION": "-"},
+        "vary": {"ET": {"codes": ["PH", "EA"]}, "PH_REGION": {"codes": ["-", "BICOL"]}}
+    })
+    assert preset.compile(Registry(CODES))["PH_REGION"] == ["-", "BICOL"]
+    planner = GridPlanner(load_constraints(), check_components=False)
+    jobs = list(preset.jobs("01", planner=planner, registry=Registry(CODES)))
+    assert [(job[2], job[8]) for job in jobs] == [("EA", None), ("PH", None), ("PH", "BICOL")]
+    assert planner.dropped == {"ph_region_requires_ph: ET=EA not allowed": 1}
+    try:
+        Preset.from_dict({"fixed": preset.fixed, "vary": {"ET": {}, "PH_REGION": {"prefix": "B"}}})
+    except ValueError as e:
+        assert "PH_REGION can only be varied over explicit codes" in str(e)
+    else:
+        raise AssertionError("region prefix filter accepted")
+
+
+def test_invalid_presets_are_rejected(tmp_path):
+    base = {"fixed": {"BT": "AL", "ET": "PH", "SC": "DOOR", "ST": "POCA", "HR": "ST"}, "vary": {"FA": {}}}
+    Preset.from_dict(base)
+    for broken, message in [
+        ({**base, "vary": {}}, "FA neither fixed nor varied"),
+        ({**base, "vary": {"FA": {"suffix": "A"}}}, "unknown filter"),
+        ({**base, "vary": {"FA": {}, "HR": {}}}, "both fixed and varied"),
+        ({**base, "vary": {"FA": {}, "XX": {}}}, "unknown dimension"),
+        ({**base, "workers": 4}, None),
+    ]:
+        if message is None:
+            Preset.from_dict(broken)  # unrelated keys are ignored
+            continue
+        try:
+            Preset.from_dict(broken)
+        except ValueError as e:
+            assert message in str(e)
+        else:
+            raise AssertionError(f"accepted {broken}")
+    try:
+        load_preset("nope", presets_dir=str(tmp_path))
+    except ValueError as e:
+        assert "Unknown preset: nope" in str(e)
+    else:
+        raise AssertionError("unknown preset loaded")
+
+
+def test_cli_runs_presets_through_the_grid_pipeline():
+    from src.cli import build_parser, _batch_jobs
+    args = build_parser().parse_args(["batch", "--preset", "face_pass", "--v", "01", "--batch_name", "x", "--runs", "2"])
+    with patch.object(presets, "get_registry", return_value=Registry(CODES)):
+        planner, jobs, options = _batch_jobs(args)
+        # The planner prunes combinations whose components are missing on disk
+        with patch.object(planner, "check", return_value=None):
+            assert len(list(jobs)) == 16
+    assert options == {"runs": 2, "strategy": "full", "sample": None, "seed": 0}
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    test_select_filters_use_indexes_and_keep_registry_order()
+    test_face_pass_preset_compiles_to_the_old_hard_coded_selection()
+    test_preset_region_axes_reach_the_planner()
+    for fn in [test_preset_options_are_defaults_for_flags, test_invalid_presets_are_rejected]:
+        with tempfile.TemporaryDirectory() as d:
+            fn(pathlib.Path(d))
+    test_cli_runs_presets_through_the_grid_pipeline()
+    print("Test passed: declarative presets.")
@@ -0,0 +1,76 @@
+"""
+Tests for the content-addressed prompt store (src/prompt_store.py).
+"""
+
+import json
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.prompt_store import PromptStore
+
+PROMPT = {"subject": {"hair": {"length": "Long"}}, "metadata": {"rendered_prompt": "Hair: long."}}
+
+
+def test_object_written_once(tmp_path):
+    store = PromptStore(str(tmp_path))
+    digest, path, written = store.put(PROMPT)
+    assert written
+    for _ in range(5):
+        assert store.put(json.loads(json.dumps(PROMPT))) == (digest, path, False)
+    assert store.stats()["objects_written"] == 1
+    assert store.get(digest) == PROMPT
+    assert path.endswith(os.path.join(digest[:2], f"{digest}.json"))
+
+
+def test_canonical_path_points_at_object(tmp_path):
+    store = PromptStore(str(tmp_path))
+    digest, obj_path, _ = store.put(PROMPT)
+
+    path = store.link("FA-GOLD__v01", digest)
+    assert path == str(tmp_path / "prompts" / "FA-GOLD__v01.json")
+    with open(path) as f:
+        assert json.load(f) == PROMPT
+
+    # Relinking to the same object writes nothing
+    store.link("FA-GOLD__v01", digest)
+    assert store.stats()["links_written"] == 1
+
+    # A changed prompt under the same canonical ID is relinked
+    changed = {**PROMPT, "subject": {"hair": {"length": "Short"}}}
+    new_digest, _, _ = store.put(changed)
+    store.link("FA-GOLD__v01", new_digest)
+    with open(path) as f:
+        assert json.load(f)["subject"]["hair"]["length"] == "Short"
+    # The old object is untouched
+    assert store.get(digest) == PROMPT
+
+
+def test_runs_share_one_prompt_object(tmp_path):
+    from src import builder
+    from src.build_store import FileBuildStore
+    build_store = FileBuildStore(str(tmp_path / "builds"))
+    store = build_store.prompts
+    with patch.object(builder, "BUILD_STORE", build_store), \
+         patch("src.builder.load_json", return_value={"setting": {"environment": "Beach"}}), \
+         patch("src.builder.get_component_path", side_effect=lambda dim, code: f"fake/{dim}/{code}.json"):
+        results = [
+            builder.build_prompt(fa="GOLD", bt="GOLD", et="GOLD", hr="GOLD", sc="GOLD", st="GOLD", v="01", r=f"{r:02d}")
+            for r in range(1, 6)
+        ]
+
+    assert len({res["prompt_hash"] for res in results}) == 1
+    assert store.stats()["objects_written"] == 1
+    assert store.stats()["links_written"] == 1
+    assert len(os.listdir(tmp_path / "builds" / "runs")) == 5
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    for fn in [test_object_written_once, test_canonical_path_points_at_object, test_runs_share_one_prompt_object]:
+        with tempfile.TemporaryDirectory() as d:
+            fn(pathlib.Path(d))
+    print("Test passed: prompt store.")
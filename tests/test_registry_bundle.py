@@ -0,0 +1,80 @@
+"""
+Tests for the compiled registry bundle (src/bundle.py).
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.registry as registry
+from src.bundle import compile_bundle, open_bundle
+from src.registry import ComponentCache
+
+
+def _make_tree(root):
+    (root / "registry").mkdir()
+    (root / "components" / "hair").mkdir(parents=True)
+    (root / "components" / "face").mkdir(parents=True)
+    (root / "registry" / "codes.json").write_text(json.dumps({"HAIR": {"ST": {"status": "active"}}}, indent=2))
+    (root / "components" / "hair" / "ST.json").write_text(json.dumps({"subject": {"hair": {"length": "Long"}}}, indent=2))
+    (root / "components" / "face" / "GOLD.json").write_text(json.dumps({"subject": {"face_anchor": "soft"}}, indent=2))
+
+
+def test_compile_and_lazy_load(tmp_path):
+    _make_tree(tmp_path)
+    out = tmp_path / "out" / "registry.bundle"
+    info = compile_bundle(str(out), str(tmp_path))
+    assert info["entries"] == 3
+
+    bundle = open_bundle(str(out), str(tmp_path))
+    hair_path = str(tmp_path / "components" / "hair" / "ST.json")
+    assert hair_path in bundle
+    assert bundle.load(hair_path) == {"subject": {"hair": {"length": "Long"}}}
+    assert bundle.load(str(tmp_path / "registry" / "codes.json"))["HAIR"]["ST"]["status"] == "active"
+    assert bundle.load(str(tmp_path / "components" / "hair" / "MISSING.json")) is None
+    bundle.close()
+
+
+def test_content_hash_is_deterministic(tmp_path):
+    _make_tree(tmp_path)
+    a = compile_bundle(str(tmp_path / "a.bundle"), str(tmp_path))
+    b = compile_bundle(str(tmp_path / "b.bundle"), str(tmp_path))
+    assert a["content_hash"] == b["content_hash"]
+
+
+def test_stale_entry_falls_back_to_loose_file(tmp_path, monkeypatch):
+    _make_tree(tmp_path)
+    out = tmp_path / "registry.bundle"
+    compile_bundle(str(out), str(tmp_path))
+    bundle = open_bundle(str(out), str(tmp_path))
+    monkeypatch.setattr(registry, "get_bundle", lambda: bundle)
+
+    hair_path = tmp_path / "components" / "hair" / "ST.json"
+    cache = ComponentCache()
+    assert cache.get(str(hair_path))["subject"]["hair"]["length"] == "Long"
+    assert cache.stats()["bundle_loads"] == 1
+
+    hair_path.write_text(json.dumps({"subject": {"hair": {"length": "Short"}}}))
+    st = os.stat(hair_path)
+    os.utime(hair_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    assert cache.get(str(hair_path))["subject"]["hair"]["length"] == "Short"
+    assert cache.stats()["bundle_loads"] == 1
+    bundle.close()
+
+
+def test_rejects_foreign_file(tmp_path):
+    bogus = tmp_path / "bogus.bundle"
+    bogus.write_bytes(b"not a bundle at all, just some bytes")
+    assert open_bundle(str(bogus), str(tmp_path)) is None
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    for fn in [test_compile_and_lazy_load, test_content_hash_is_deterministic, test_rejects_foreign_file]:
+        with tempfile.TemporaryDirectory() as d:
+            fn(pathlib.Path(d))
+    print("Test passed: registry bundle.")
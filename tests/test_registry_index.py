@@ -0,0 +1,74 @@
+"""
+Tests for the indexed Registry (src/registry.py).
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.registry import Registry, canonical_dim, short_dim, get_component_path, get_registry
+
+
+CODES = {
+    "FACE": {
+        "GOLD": {"code": "GOLD", "label": "Soft Goddess Face", "status": "active"},
+        "SG-A": {"code": "SG-A", "label": "Soft Glam", "status": "locked"}
+    },
+    "BACKGROUND": {
+        "BEACH_PH": {"code": "BEACH_PH", "label": "Beach", "status": "active"}
+    }
+}
+
+
+def _registry(tmp_path):
+    (tmp_path / "face").mkdir()
+    (tmp_path / "background").mkdir()
+    (tmp_path / "face" / "GOLD.json").write_text("{}")
+    (tmp_path / "background" / "BEACH_PH.json").write_text("{}")
+    return Registry(CODES, components_dir=str(tmp_path))
+
+
+def test_alias_resolution():
+    assert canonical_dim("FA") == "FACE"
+    assert canonical_dim("SC") == "BACKGROUND"
+    assert canonical_dim("APPEARANCE") == "APPEARANCE"
+    assert short_dim("BACKGROUND") == "SC"
+    assert short_dim("SKIN") == "SKIN"
+    # Short and registry names resolve to the same folder
+    assert get_component_path("SC", "BEACH_PH") == get_component_path("BACKGROUND", "BEACH_PH")
+    assert get_component_path("SC", "BEACH_PH").endswith(os.path.join("background", "BEACH_PH.json"))
+
+
+def test_indexes(tmp_path):
+    reg = _registry(tmp_path)
+    assert reg.codes("FA") == ["GOLD", "SG-A"]
+    assert reg.codes("FACE", status="locked") == ["SG-A"]
+    assert reg.has("SC", "BEACH_PH")
+    assert not reg.has("SC", "DOOR")
+    assert reg.meta("FA", "GOLD")["label"] == "Soft Goddess Face"
+    assert reg.path("SC", "BEACH_PH") == str(tmp_path / "background" / "BEACH_PH.json")
+    assert reg.with_status("active") == [("FACE", "GOLD"), ("BACKGROUND", "BEACH_PH")]
+
+
+def test_check_reports_missing_files(tmp_path):
+    reg = _registry(tmp_path)
+    errors = reg.check()
+    assert len(errors) == 1
+    assert "FACE-SG-A" in errors[0]
+
+
+def test_repo_registry_files_exist():
+    assert get_registry().check() == []
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    test_alias_resolution()
+    for fn in [test_indexes, test_check_reports_missing_files]:
+        with tempfile.TemporaryDirectory() as d:
+            fn(pathlib.Path(d))
+    test_repo_registry_files_exist()
+    print("Test passed: registry indexes.")
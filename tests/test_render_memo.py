@@ -0,0 +1,90 @@
+"""
+Tests for clause-level render memoization (src/render_memo.py) and the
+renderer purity it relies on.
+"""
+
+import glob
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.render_memo import ClauseMemo
+from src.utils import load_json, copy_json
+from src.hair_renderer import render_hair_clause
+from src.hair_color_renderer import render_hair_color_clause
+from src.skin_tone_renderer import render_skin_tone_clause
+from src.body_renderer import render_body_clause, render_body_components_clause
+
+
+def _subtrees():
+    """(renderer, subtree) pairs drawn from the repo's components and examples."""
+    pairs = []
+    for path in sorted(glob.glob(os.path.join(ROOT_DIR, "components", "*", "*.json")) +
+                       glob.glob(os.path.join(ROOT_DIR, "docs", "examples", "*.json"))):
+        data = load_json(path)
+        appearance = data.get("appearance", {})
+        if isinstance(appearance.get("hair_color"), dict):
+            pairs.append((render_hair_color_clause, appearance["hair_color"]))
+        if isinstance(appearance.get("skin_tone"), dict):
+            pairs.append((render_skin_tone_clause, appearance["skin_tone"]))
+        if isinstance(data.get("subject", {}).get("hair"), dict):
+            pairs.append((render_hair_clause, data["subject"]["hair"]))
+        if data.get("body"):
+            pairs.append((render_body_clause, data["body"]))
+        if data.get("body_components"):
+            pairs.append((render_body_components_clause, data["body_components"]))
+    return pairs
+
+
+SUBTREES = _subtrees()
+
+
+@pytest.mark.parametrize("renderer,subtree", SUBTREES, ids=lambda x: getattr(x, "__name__", None))
+def test_renderers_are_pure(renderer, subtree):
+    """Memoization is only safe if renderers neither mutate nor depend on object identity."""
+    before = copy_json(subtree)
+    first = renderer(subtree)
+    assert subtree == before, f"{renderer.__name__} mutated its input"
+    assert renderer(copy_json(subtree)) == first
+    assert renderer(subtree) == first
+
+
+def test_identity_and_content_hits():
+    memo = ClauseMemo()
+    hair = {"enabled": True, "preset": "Sleek Power Woman", "length": "Medium"}
+    expected = render_hair_clause(hair)
+
+    assert memo.render("hair_structure", render_hair_clause, hair) == expected
+    assert memo.render("hair_structure", render_hair_clause, hair) == expected
+    assert memo.render("hair_structure", render_hair_clause, copy_json(hair)) == expected
+
+    stats = memo.stats()["hair_structure"]
+    assert (stats["misses"], stats["identity_hits"], stats["content_hits"]) == (1, 1, 1)
+
+
+def test_in_place_edit_is_not_served_stale():
+    memo = ClauseMemo()
+    hair = {"enabled": True, "preset": "Sleek Power Woman", "length": "Medium"}
+    memo.render("hair_structure", render_hair_clause, hair)
+    hair["length"] = "Long"
+    assert memo.render("hair_structure", render_hair_clause, hair) == render_hair_clause(hair)
+
+
+def test_bounded():
+    memo = ClauseMemo(max_entries=4)
+    for i in range(20):
+        memo.render("hair_structure", render_hair_clause, {"preset": f"Preset {i}"})
+    assert len(memo._by_content) <= 4 and len(memo._by_id) <= 4
+
+
+if __name__ == "__main__":
+    for renderer, subtree in SUBTREES:
+        test_renderers_are_pure(renderer, subtree)
+    test_identity_and_content_hits()
+    test_in_place_edit_is_not_served_stale()
+    test_bounded()
+    print("Test passed: render memo.")
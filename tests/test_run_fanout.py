@@ -0,0 +1,72 @@
+"""
+Tests for build-once-emit-many runs (builder.build_canonical / emit_runs).
+"""
+
+import json
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import builder
+from src.batch import parse_grid, grid_jobs, run_jobs
+from src.build_store import FileBuildStore
+
+COMPONENT = {"setting": {"environment": "Beach"}}
+
+
+def _fake_components():
+    return [
+        patch("src.builder.load_json", return_value=COMPONENT),
+        patch("src.builder.get_component_path", side_effect=lambda dim, code: f"fake/{dim}/{code}.json"),
+    ]
+
+
+def test_runs_share_one_prompt_build(tmp_path):
+    store = FileBuildStore(str(tmp_path / "builds"))
+    patches = _fake_components()
+    for p in patches:
+        p.start()
+    try:
+        jobs = grid_jobs(parse_grid("FA=A,B BT=X ET=E HR=H SC=S ST=T"), "01", 10)
+        with patch.object(builder, "build_canonical", wraps=builder.build_canonical) as build:
+            results = list(run_jobs(jobs, store=store, chunk_size=64))
+    finally:
+        for p in patches:
+            p.stop()
+
+    assert build.call_count == 2
+    assert len(results) == 20
+    assert [r["run_id"][-3:] for r in results[:10]] == [f"r{i:02d}" for i in range(1, 11)]
+    assert len(os.listdir(tmp_path / "builds" / "runs")) == 20
+    assert len({r["prompt_hash"] for r in results}) == 1
+
+
+def test_emit_run_matches_build_prompt(tmp_path):
+    store = FileBuildStore(str(tmp_path / "builds"))
+    patches = _fake_components()
+    for p in patches:
+        p.start()
+    try:
+        direct = builder.build_prompt("A", "X", "E", "H", "S", "T", "01", "03", ph_region="ILOCOS", store=store)
+        canonical = builder.build_canonical("A", "X", "E", "H", "S", "T", "01", ph_region="ILOCOS", store=store)
+        (emitted,) = builder.emit_runs(canonical, ["03"], store=store)
+    finally:
+        for p in patches:
+            p.stop()
+
+    for res in (direct, emitted):
+        res["meta"].pop("timestamp")
+    assert emitted == direct
+    with open(direct["run_path"]) as f:
+        assert json.load(f)["selection_codes"]["PH_REGION"] == "ILOCOS"
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+    for fn in [test_runs_share_one_prompt_build, test_emit_run_matches_build_prompt]:
+        with tempfile.TemporaryDirectory() as d:
+            fn(pathlib.Path(d))
+    print("Test passed: run fan-out.")
@@ -0,0 +1,178 @@
+"""
+Tests for the warm build daemon (src/server.py).
+"""
+
+import http.client
+import json
+import os
+import socket
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import registry
+from src.build_store import FileBuildStore
+from src.server import BuildService, make_server
+
+SELECTION = {"FA": "F1", "BT": "B1", "ET": "E1", "HR": "H1", "SC": "S1", "ST": "T1"}
+
+
+def _setup(tmp_path, component_tree):
+    component_tree(SELECTION)
+    return BuildService(store=FileBuildStore(str(tmp_path / "builds")))
+
+
+class _Server:
+    def __init__(self, service, socket_path=None):
+        self.server = make_server(service, port=0, socket_path=socket_path, quiet=True)
+        self.socket_path = socket_path
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def connection(self):
+        if self.socket_path:
+            conn = http.client.HTTPConnection("localhost")
+            conn.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conn.sock.connect(self.socket_path)
+            return conn
+        return http.client.HTTPConnection(*self.server.server_address[:2])
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _call(conn, method, path, body=None):
+    conn.request(method, path, json.dumps(body) if body is not None else None, {"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    return resp.status, json.loads(resp.read())
+
+
+def test_build_render_and_errors_over_http(tmp_path, component_tree):
+    service = _setup(tmp_path, component_tree)
+    assert service.warm() == 10
+    srv = _Server(service)
+    try:
+        conn = srv.connection()
+        status, res = _call(conn, "POST", "/build", dict(SELECTION, v="01", r="02", include_prompt=True))
+        assert status == 200
+        assert res["run_id"].endswith("__r02")
+        assert res["prompt"]["metadata"]["rendered_prompt"] is not None
+        assert os.path.exists(res["run_path"])
+
+        # Registry dimension names work too; render writes nothing
+        runs_before = len(os.listdir(tmp_path / "builds" / "runs"))
+        body = {registry.canonical_dim(dim): code for dim, code in SELECTION.items()}
+        status, rendered = _call(conn, "POST", "/render", body)
+        assert status == 200
+        assert rendered["prompt"] == res["prompt"]
+        assert len(os.listdir(tmp_path / "builds" / "runs")) == runs_before
+
+        status, err = _call(conn, "POST", "/build", {"FA": "F1"})
+        assert status == 400 and "Missing required parameters" in err["error"]
+        status, err = _call(conn, "POST", "/build", dict(SELECTION, FA="NOPE", v="01", r="01"))
+        assert status == 404
+        status, _ = _call(conn, "GET", "/nowhere")
+        assert status == 404
+
+        # The same keep-alive connection served every request
+        status, health = _call(conn, "GET", "/health")
+        assert status == 200
+        assert health["requests"] == {"build": 3, "render": 1, "health": 1}
+        assert health["caches"]["components"]["hits"] > 0
+        conn.close()
+    finally:
+        srv.close()
+
+
+def test_ui_selection_builds_without_optional_defaults(tmp_path, component_tree):
+    # The UI names every dimension by registry name, including subject
+    # type, skin and pose; this tree has no PF or NB component
+    extra = {"SUBJECT_TYPE": "TYPE", "SKIN": "K1", "POSE": "P1"}
+    components = component_tree(dict(SELECTION, **extra))
+    os.remove(os.path.join(components, "base", "POSTURE_FRAMING.json"))
+    os.remove(os.path.join(components, "negative", "NB.json"))
+    service = BuildService(store=FileBuildStore(str(tmp_path / "builds")))
+
+    body = {registry.canonical_dim(dim): code for dim, code in SELECTION.items()}
+    body.update(extra, BASE="BASE", APPEARANCE="PORCELAIN_COOL", v="01", r="01", include_prompt=True)
+    res = service.build(body)
+    setting = res["prompt"]["setting"]
+    assert (setting["subject_type"], setting["skin"], setting["pose"]) == ("SUBJECT_TYPE TYPE", "SKIN K1", "POSE P1")
+    assert "SKIN-K1" in res["canonical_id"] and "POSE-P1" in res["canonical_id"]
+    assert res["meta"]["selection_codes"]["PF"] is None
+
+
+def test_batch_endpoint_writes_manifest(tmp_path, component_tree):
+    service = _setup(tmp_path, component_tree)
+    srv = _Server(service)
+    try:
+        conn = srv.connection()
+        grid = " ".join(f"{dim}={code}" for dim, code in SELECTION.items())
+        status, res = _call(conn, "POST", "/batch", {"grid": grid, "v": "01", "runs": 3, "batch_name": "served"})
+        assert status == 200
+        assert res["runs"] == 3
+        with open(res["manifest"]) as f:
+            assert len(f.read().splitlines()) == 4
+        status, err = _call(conn, "POST", "/batch", {"v": "01", "batch_name": "x"})
+        assert status == 400
+        conn.close()
+    finally:
+        srv.close()
+
+
+def test_oversized_body_closes_the_connection(tmp_path, component_tree):
+    from src.server import MAX_BODY_BYTES
+    srv = _Server(_setup(tmp_path, component_tree))
+    try:
+        sock = socket.create_connection(srv.server.server_address[:2])
+        # Only the start of the announced body arrives; the rest must not be parsed as a request
+        sock.sendall(
+            f"POST /build HTTP/1.1\r\nHost: x\r\nContent-Length: {MAX_BODY_BYTES + 1}\r\n\r\n".encode()
+            + b"GET /health HTTP/1.1\r\nHost: x\r\n\r\n"
+        )
+        sock.settimeout(5)
+        response = b""
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                break
+            response += data
+        sock.close()
+    finally:
+        srv.close()
+    assert response.startswith(b"HTTP/1.1 413")
+    assert b"Connection: close" in response
+    assert response.count(b"HTTP/1.1") == 1
+
+
+def test_concurrent_builds_over_unix_socket(tmp_path, component_tree):
+    service = _setup(tmp_path, component_tree)
+    socket_path = str(tmp_path / "daemon.sock")
+    srv = _Server(service, socket_path=socket_path)
+    results = []
+
+    def client(i):
+        conn = srv.connection()
+        for r in range(5):
+            results.append(_call(conn, "POST", "/build", dict(SELECTION, v="01", r=f"{i}{r}")))
+        conn.close()
+
+    try:
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        srv.close()
+    assert [status for status, _ in results] == [200] * 20
+    assert len({res["prompt_hash"] for _, res in results}) == 1
+    assert len(os.listdir(tmp_path / "builds" / "runs")) == 20
+
+
+if __name__ == "__main__":
+    import pytest
+    # Needs the tmp_path / component_tree fixtures
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,62 @@
+"""
+Tests for memoized boundary validation during merge (src/lint.py, src/merge.py).
+"""
+
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.lint import ValidationCache
+from src.merge import merge_prompts
+from src.utils import json_fingerprint
+
+
+FA_OK = {"subject": {"face_anchor": "soft", "do_not_change": ["eyes"]}}
+FA_BAD = {"subject": {"face_anchor": "Korean soft glam", "do_not_change": []}}
+
+
+def test_validates_each_component_once():
+    cache = ValidationCache()
+    with patch("src.lint.validate_component", wraps=__import__("src.lint", fromlist=["x"]).validate_component) as spy:
+        for _ in range(10):
+            assert cache.validate("FA", FA_OK) == []
+            assert cache.validate("FA", FA_BAD)
+    assert spy.call_count == 2
+    assert cache.stats()["hits"] == 18
+
+
+def test_fingerprint_ignores_key_order():
+    assert json_fingerprint({"a": 1, "b": {"c": 2}}) == json_fingerprint({"b": {"c": 2}, "a": 1})
+    assert json_fingerprint({"a": 1}) != json_fingerprint({"a": 2})
+
+
+def test_warnings_deduplicated_with_count(capsys):
+    cache = ValidationCache()
+    fp = json_fingerprint(FA_BAD)
+    errors = cache.validate("FA", FA_BAD, fp)
+    for _ in range(5):
+        cache.warn("FA", errors, fp)
+    cache.summarize()
+
+    out = capsys.readouterr().out
+    assert out.count("Boundary violation during merge for FA") == 1
+    assert "occurred 5 times" in out
+
+
+def test_merge_uses_shared_cache(capsys):
+    from src.merge import VALIDATION_CACHE
+    VALIDATION_CACHE.clear()
+    for _ in range(3):
+        merged = merge_prompts({}, [{"subject": {"face_anchor": "Thai"}}], ["FA"])
+    assert merged["subject"]["face_anchor"] == "Thai"
+    assert VALIDATION_CACHE.stats()["misses"] == 1
+    assert capsys.readouterr().out.count("Boundary violation") == 1
+    VALIDATION_CACHE.clear()
+
+
+if __name__ == "__main__":
+    test_validates_each_component_once()
+    test_fingerprint_ignores_key_order()
+    print("Test passed: validation cache.")
@@ -1,6 +1,7 @@
 import { NextResponse } from 'next/server';
 import { execSync } from 'child_process';
 import path from 'path';
+import { DAEMON_URL, callDaemon } from '@/lib/daemon';
 
 const ROOT_DIR = path.resolve(process.cwd(), '..');
 
@@ -8,6 +9,15 @@ export async function POST(request: Request) {
     const body = await request.json();
     const { grid, preset, v, runs, batch_name } = body;
 
+    if (DAEMON_URL) {
+        const { status, data } = await callDaemon('/batch', { grid: preset ? undefined : grid, preset, v, runs: runs ? Number(runs) : undefined, batch_name });
+        if (status !== 200) {
+            return NextResponse.json({ success: false, error: data.error }, { status });
+        }
+        const output = [...data.planner, data.manifest ? `Batch completed. Manifest: ${data.manifest}` : 'No runs generated.'].join('\n');
+        return NextResponse.json({ success: true, output, ...data });
+    }
+
     let cmd = `python3 -m src.cli batch --v ${v} --runs ${runs} --batch_name ${batch_name}`;
     if (preset) cmd += ` --preset ${preset}`;
     else if (grid) cmd += ` --grid "${grid}"`;
@@ -1,11 +1,27 @@
 import { NextRequest, NextResponse } from 'next/server';
 import { buildPrompt } from '@/lib/prompt-builder';
+import { DAEMON_URL, callDaemon } from '@/lib/daemon';
 
 export async function POST(request: NextRequest) {
     try {
         const body = await request.json();
         const { BASE, SUBJECT_TYPE, FACE, BODY, HAIR, ETHNICITY, SKIN, APPEARANCE, AGE, OUTFIT, POSE, BACKGROUND, v, r, overrides } = body;
 
+        if (DAEMON_URL) {
+            // Same merge engine as the CLI, served warm by `avatar-db serve`
+            const { status, data } = await callDaemon('/build', { ...body, v: v || '01', r: r || '01', include_prompt: true });
+            if (status !== 200) {
+                return NextResponse.json({ error: data.error }, { status });
+            }
+            return NextResponse.json({
+                success: true,
+                canonical_id: data.canonical_id,
+                run_id: data.run_id,
+                prompt: data.prompt,
+                dims: { ...data.meta.selection_codes, v: v || '01', r: r || '01' }
+            });
+        }
+
         // Validate required parameters
         if (!BASE || !SUBJECT_TYPE || !FACE || !BODY || !HAIR || !ETHNICITY || !SKIN || !OUTFIT || !POSE || !BACKGROUND) {
             return NextResponse.json(
@@ -1,10 +1,19 @@
 import { NextResponse } from 'next/server';
 import { execSync } from 'child_process';
 import path from 'path';
+import { DAEMON_URL, callDaemon } from '@/lib/daemon';
 
 const ROOT_DIR = path.resolve(process.cwd(), '..');
 
 export async function POST() {
+    if (DAEMON_URL) {
+        const { status, data } = await callDaemon('/lint', {});
+        if (status !== 200) {
+            return NextResponse.json({ success: false, output: data.error }, { status });
+        }
+        const output = data.success ? 'Lint passed!' : data.errors.map((e: string) => `ERROR: ${e}`).join('\n');
+        return NextResponse.json({ success: data.success, output }, { status: data.success ? 200 : 400 });
+    }
     try {
         const stdout = execSync('python3 -m src.cli lint', { cwd: ROOT_DIR }).toString();
         return NextResponse.json({ success: true, output: stdout });
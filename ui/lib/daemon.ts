@@ -0,0 +1,18 @@
+/**
+ * Client for the warm Python build daemon (`avatar-db serve`).
+ *
+ * When AVATAR_DB_DAEMON_URL is set (e.g. http://127.0.0.1:8765), the build,
+ * batch and lint routes call the daemon instead of the TypeScript builder or
+ * a python3 subprocess per request, so the UI uses the same merge engine as
+ * the CLI without paying a cold start.
+ */
+export const DAEMON_URL = process.env.AVATAR_DB_DAEMON_URL;
+
+export async function callDaemon(endpoint: string, body: unknown): Promise<{ status: number; data: any }> {
+    const res = await fetch(`${DAEMON_URL!.replace(/\/$/, '')}${endpoint}`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(body ?? {}),
+    });
+    return { status: res.status, data: await res.json() };
+}